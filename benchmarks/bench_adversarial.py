@@ -0,0 +1,113 @@
+"""
+Worst-case scan time per MB of each built-in detector on crafted inputs.
+
+Each detector gets inputs built to make a backtracking engine retry long
+attempts at every position: long runs of its repeated class without the
+character that must end it, its prefix repeated back to back, separators
+followed by endless whitespace, and so on. Every input is scanned by a scanner
+holding that detector alone and by the full detector set; the slowest of all
+is reported per detector and asserted to stay under --max-seconds-per-mb.
+Runs for every available backend (re, and re2 when installed).
+
+Run:
+    python benchmarks/bench_adversarial.py [--chars N] [--max-seconds-per-mb S]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, List
+
+from safe2share.analyzers.regex_backend import re2_available
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.analyzers.scanner import CompiledScanner
+
+
+def adversarial_inputs(n: int) -> Dict[str, List[str]]:
+    def rep(s: str) -> str:
+        return (s * (n // len(s) + 1))[:n]
+
+    half = n // 2
+    return {
+        "CREDENTIAL": [
+            "password" + " " * n,
+            rep("pass"),
+            "password:" + " " * n + ",",
+            rep("pwd is "),
+        ],
+        "SECRET": ["token" + " " * n, rep("api key"), rep("api_"), rep("token:")],
+        "JWT": [
+            rep("eyJ"),
+            "eyJ" + "a" * n,
+            "eyJ" + "a" * 25 + "." + "a" * n,
+            rep("eyJ" + "a" * 21 + "."),
+        ],
+        "API_KEY": [rep("sk-"), "sk-" + "a" * n, rep("sk-a")],
+        "EMAIL": [
+            "a" * n + "@",
+            rep("a@"),
+            "a@" + "a" * n,
+            "a" * half + "@" + "a" * half,
+            rep("a.") + "@",
+            rep("a@a."),
+        ],
+        "PHONE": [
+            "1" + " " * n,
+            rep("1 ") + "x",
+            rep("("),
+            "1" * n,
+            rep("+1"),
+            rep("1-"),
+            "1" + "-" * n,
+        ],
+        "PRIVATE_KEY": ["-----BEGIN " + " " * n, rep("-----BEGIN ")],
+        "HIGH_ENTROPY": [
+            "a" * n,
+            rep("a" * 31 + " "),
+            rep("+/"),
+            "a" * half + "=" * half,
+        ],
+    }
+
+
+def worst_seconds_per_mb(backend: str, chars: int) -> Dict[str, float]:
+    detectors = {d.label: d for d in RuleBasedAnalyzer.DETECTORS}
+    full = CompiledScanner(RuleBasedAnalyzer.DETECTORS, backend)
+    worst: Dict[str, float] = {}
+    for label, texts in adversarial_inputs(chars).items():
+        alone = CompiledScanner([detectors[label]], backend)
+        for text in texts:
+            for scanner in (alone, full):
+                t0 = time.perf_counter()
+                scanner.scan(text)
+                per_mb = (time.perf_counter() - t0) / (len(text) / 1e6)
+                worst[label] = max(worst.get(label, 0.0), per_mb)
+    return worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chars", type=int, default=1_000_000)
+    parser.add_argument("--max-seconds-per-mb", type=float, default=2.0)
+    args = parser.parse_args()
+
+    backends = ["re"] + (["re2"] if re2_available() else [])
+    results = {b: worst_seconds_per_mb(b, args.chars) for b in backends}
+
+    print(f"worst case, s/MB, {args.chars / 1e6:g} MB inputs")
+    print(f"{'detector':>13} " + " ".join(f"{b:>8}" for b in backends))
+    for label in results["re"]:
+        cells = " ".join(f"{results[b][label]:>8.2f}" for b in backends)
+        print(f"{label:>13} {cells}")
+
+    for backend, worst in results.items():
+        for label, per_mb in worst.items():
+            assert per_mb <= args.max_seconds_per_mb, (
+                f"{label} on {backend}: {per_mb:.2f} s/MB "
+                f"(limit {args.max_seconds_per_mb} s/MB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
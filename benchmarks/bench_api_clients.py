@@ -0,0 +1,117 @@
+"""
+LLM request latency: a new service (and OpenAI client) per request vs the shared
+ServiceRegistry used by the API, against a local OpenAI-compatible stub server.
+
+The stub answers instantly, so the numbers are client-side overhead: client and
+connection-pool construction plus TCP connection setup.
+
+Run:
+    python benchmarks/bench_api_clients.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REQUESTS = 300
+
+REPLY = json.dumps(
+    {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": json.dumps(
+                        {
+                            "score": 0,
+                            "reasons": [],
+                            "detections": [],
+                            "suggested_rewrites": ["hello"],
+                        }
+                    ),
+                },
+            }
+        ],
+    }
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Send headers and body in one segment (avoids Nagle/delayed-ACK stalls)
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    connections = 0
+
+    def setup(self) -> None:
+        super().setup()
+        StubHandler.connections += 1
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def measure(label: str, call) -> None:
+    StubHandler.connections = 0
+    call()  # warm-up
+    timings = []
+    for _ in range(REQUESTS):
+        t0 = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    print(
+        f"{label:>22} {statistics.mean(timings):>8.2f} "
+        f"{timings[len(timings) // 2]:>8.2f} {timings[int(len(timings) * 0.95)]:>8.2f} "
+        f"{StubHandler.connections:>12}"
+    )
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Settings are read at import time
+    os.environ["S2S_LLM_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["S2S_LLM_MODEL"] = "stub"
+    from safe2share.providers import Provider
+    from safe2share.service import Safe2ShareService, ServiceRegistry
+
+    print(f"{REQUESTS} sequential LLM requests to a local stub")
+    print(f"{'':>22} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'connections':>12}")
+
+    measure(
+        "service per request",
+        lambda: Safe2ShareService(provider=Provider.LLM).analyze("hello"),
+    )
+
+    with ServiceRegistry() as registry:
+        measure(
+            "shared registry",
+            lambda: registry.get(Provider.LLM).analyze("hello"),
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Response size and serialization time of full vs compact results.
+
+The input repeats a handful of emails, phone numbers and credentials, as a log
+does. "full" serializes the AnalysisResult as /analyze returns it; "compact"
+first compacts it (grouping detections by label and span, capping reasons) and
+serializes that, so its time includes the compaction; "compact, no rewrite"
+also leaves out the redacted copy of the input.
+
+Run:
+    python benchmarks/bench_compact.py [lines]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import time
+
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.compact import compact_result
+
+REPEAT = 5
+
+
+def measure(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        gc.collect()
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, len(out)
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    text = "\n".join(
+        f"{i} login user{i % 5}@example.com +1 613 555 000{i % 3} password=hunter{i % 2}42"
+        for i in range(lines)
+    )
+    result = RuleBasedAnalyzer().analyze(text)
+    print(f"input: {len(text) / 1e6:.1f} MB, {len(result.detections)} detections")
+    print(f"{'mode':>20} {'time ms':>9} {'size KB':>10}")
+    for name, fn in (
+        ("full", lambda: result.model_dump_json()),
+        ("compact", lambda: compact_result(result).model_dump_json()),
+        (
+            "compact, no rewrite",
+            lambda: compact_result(result, include_rewrite=False).model_dump_json(),
+        ),
+    ):
+        elapsed, size = measure(fn)
+        print(f"{name:>20} {elapsed * 1000:>9.1f} {size / 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
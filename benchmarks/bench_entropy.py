@@ -0,0 +1,85 @@
+"""
+Cost of entropy scoring for HIGH_ENTROPY candidates.
+
+Rows:
+  "counter"     entropy of each candidate with a Counter per span (the fallback
+                without NumPy)
+  "vectorized"  all candidates at once over a packed buffer (NumPy)
+  "analyze"     RuleBasedAnalyzer.analyze on a text holding the candidates,
+                hint word included, so every one of them is scored
+
+Candidates: random base64 keys, hex digests and repetitive runs, 32-64 chars.
+
+Run:
+    python benchmarks/bench_entropy.py [--candidates N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import time
+
+from safe2share.analyzers import entropy
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+
+REPEAT = 3
+
+
+def candidates(count: int, rng: random.Random) -> list[str]:
+    base64 = string.ascii_letters + string.digits + "+/"
+    spans = []
+    for i in range(count):
+        size = rng.randint(32, 64)
+        if i % 3 == 0:
+            spans.append("".join(rng.choice(base64) for _ in range(size)))
+        elif i % 3 == 1:
+            spans.append("".join(rng.choice("0123456789abcdef") for _ in range(size)))
+        else:
+            spans.append(("ab" * size)[:size])
+    return spans
+
+
+def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=200_000)
+    args = parser.parse_args()
+
+    spans = candidates(args.candidates, random.Random(9))
+    text = "token:\n" + "\n".join(spans)
+    analyzer = RuleBasedAnalyzer()
+
+    rows = {"counter": lambda: entropy._entropy_and_max_py(spans)}
+    if entropy.np is not None:
+        vectorized = entropy._entropy_and_max_np(spans)
+        fallback = entropy._entropy_and_max_py(spans)
+        assert all(
+            abs(a - b) < 1e-9
+            for got, want in zip(vectorized, fallback)
+            for a, b in zip(got, want)
+        )
+        rows["vectorized"] = lambda: entropy._entropy_and_max_np(spans)
+    else:
+        print("numpy is not installed: vectorized row skipped")
+    rows["analyze"] = lambda: analyzer.analyze(text)
+
+    print(f"{len(spans)} candidates, {len(text) / 1e6:.1f} MB text, best of {REPEAT}")
+    for row, fn in rows.items():
+        seconds = best_of(fn)
+        print(
+            f"{row:>10} {seconds * 1e3:>9.1f} ms {len(spans) / seconds:>12,.0f} spans/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Peak RSS and wall time of file scanning: current text path vs mmap bytes mode.
+
+Each mode runs in a fresh interpreter so peak RSS is not shared between runs.
+"text" is what `safe2share --file` did before (read_text + strip + analyze),
+"stream" is the windowed text scan and "mmap" is RuleBasedAnalyzer.analyze_file.
+
+Note: pages of a memory-mapped file that have been read count towards RSS, but
+they are clean page-cache pages the kernel can drop at any time, unlike the
+decoded str copies of the text path.
+
+Run:
+    python benchmarks/bench_file_scan.py [size_mb]
+"""
+
+from __future__ import annotations
+
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+CHILD = r"""
+import resource, sys, time
+from pathlib import Path
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.cli import iter_file_chunks
+
+mode, path = sys.argv[1], Path(sys.argv[2])
+analyzer = RuleBasedAnalyzer()
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+if mode == "text":
+    result = analyzer.analyze(path.read_text(encoding="utf-8").strip())
+elif mode == "stream":
+    result = analyzer.analyze_stream(iter_file_chunks(path))
+else:
+    result = analyzer.analyze_file(path)
+elapsed = time.perf_counter() - t0
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, (peak - base) / 1024, len(result.detections))
+"""
+
+LINES = (
+    "INFO request handled in 12ms user=bob path=/api/v1/items status=200\n",
+    "DEBUG cache miss for key items:42, fetching from upstream replica-3\n",
+    "WARN slow query (830ms): SELECT * FROM orders WHERE customer_id = 1234\n",
+)
+SECRETS = (
+    "ERROR auth failed, password: hunter42 for user alice@example.com\n",
+    "INFO call +1 (613) 555-1212 re: token=abc123\n",
+)
+
+
+def make_file(path: Path, size_mb: int) -> None:
+    rng = random.Random(7)
+    target = size_mb * 1_000_000
+    written = 0
+    with path.open("w", encoding="utf-8") as fh:
+        while written < target:
+            block = "".join(
+                rng.choice(SECRETS) if rng.random() < 0.001 else rng.choice(LINES)
+                for _ in range(1000)
+            )
+            fh.write(block)
+            written += len(block)
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dump.log"
+        make_file(path, size_mb)
+        print(f"file: {size_mb} MB of log lines")
+        print(f"{'mode':>6} {'time s':>8} {'extra peak RSS MB':>18} {'detections':>11}")
+        for mode in ("text", "stream", "mmap"):
+            out = subprocess.run(
+                [sys.executable, "-c", CHILD, mode, str(path)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            elapsed, rss, count = float(out[0]), float(out[1]), int(out[2])
+            print(f"{mode:>6} {elapsed:>8.2f} {rss:>18.1f} {count:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Concurrent slow LLM requests: the sync analyzer on a 40-thread pool (what a
+plain `def` FastAPI endpoint gets from Starlette's threadpool) vs the async
+analyzer awaited on the event loop, against a local stub with fixed latency.
+
+Run:
+    python benchmarks/bench_llm_concurrency.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REQUESTS = 400
+LATENCY = 1.0  # seconds per LLM call (real backends: seconds)
+THREADPOOL = 40  # Starlette/anyio default worker threads
+
+REPLY = json.dumps(
+    {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": '{"score": 0}'},
+            }
+        ],
+    }
+).encode()
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(LATENCY)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def main() -> None:
+    ThreadingHTTPServer.request_queue_size = 1024  # listen backlog
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["S2S_LLM_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["S2S_LLM_MODEL"] = "stub"
+    os.environ["S2S_LLM_MAX_CONNECTIONS"] = str(THREADPOOL)
+    from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+
+    analyzer = OpenAICompatibleAnalyzer()
+    print(f"{REQUESTS} concurrent LLM requests, {LATENCY * 1000:.0f} ms each")
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(THREADPOOL) as pool:
+        list(pool.map(analyzer.analyze, ["hello"] * REQUESTS))
+    sync_s = time.perf_counter() - t0
+    print(
+        f"  sync, {THREADPOOL} threads  {sync_s:6.2f} s  {REQUESTS / sync_s:7.1f} req/s"
+    )
+
+    async def run() -> float:
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            *(analyzer.analyze_async("hello") for _ in range(REQUESTS))
+        )
+        elapsed = time.perf_counter() - t0
+        await analyzer.aclose()
+        return elapsed
+
+    async_s = asyncio.run(run())
+    print(f"  async, 1 thread   {async_s:6.2f} s  {REQUESTS / async_s:7.1f} req/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
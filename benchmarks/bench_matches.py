@@ -0,0 +1,98 @@
+"""
+Time and allocations of the rule engine on an input with 100k matches.
+
+"pydantic" is what the engine did before: a validated Detection per regex match,
+with the keyword boost applied through pydantic attribute assignment. "slots"
+is the current path: a slotted Match per regex match, boosted in place, and
+converted to Detection models without validation when the result is built.
+Both start from the same pre-collected regex matches and build the same
+detections, so only the per-match representation is compared; "analyze" is the
+whole RuleBasedAnalyzer.analyze call on the same input for scale. Peak is the
+tracemalloc peak of each stage.
+
+Run:
+    python benchmarks/bench_matches.py [matches]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from safe2share.analyzers.matches import to_detections
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.analyzers.scanner import compile_scanner
+from safe2share.models import Detection
+
+REPEAT = 5
+BOOST = 20
+
+
+def pydantic_path(found):
+    detections = []
+    for det, m in found:
+        start, end = m.span(det.redact_group)
+        detections.append(
+            Detection(
+                label=det.label,
+                span=m.group(det.redact_group),
+                score=det.base_score,
+                start=start,
+                end=end,
+            )
+        )
+    for d in detections:
+        d.score = min(100, d.score + BOOST)
+    return detections
+
+
+def slots_path(found):
+    matches = [det.to_match(m) for det, m in found]
+    for m in matches:
+        m.score = min(100, m.score + BOOST)
+    return to_detections(matches)
+
+
+def measure(fn, *args):
+    best = float("inf")
+    for _ in range(REPEAT):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    text = "api token list\n" + "\n".join(
+        f"user{i} <user{i}@example.com> +1 613 555 {i % 10000:04d}"
+        for i in range(count // 2)
+    )
+    analyzer = RuleBasedAnalyzer()
+    found = list(compile_scanner(tuple(analyzer.DETECTORS)).iter_matches(text))
+    assert [d.model_dump() for d in pydantic_path(found)] == [
+        d.model_dump() for d in slots_path(found)
+    ]
+
+    print(f"input: {len(text) / 1e6:.1f} MB, {len(found)} matches")
+    print(f"{'path':>9} {'time ms':>9} {'peak MB':>8}")
+    for name, fn in (
+        ("pydantic", pydantic_path),
+        ("slots", slots_path),
+    ):
+        elapsed, peak = measure(fn, found)
+        print(f"{name:>9} {elapsed * 1000:>9.1f} {peak / 1e6:>8.1f}")
+    elapsed, peak = measure(analyzer.analyze, text)
+    print(f"{'analyze':>9} {elapsed * 1000:>9.1f} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Throughput of the combined scanner vs one finditer pass per detector.
+
+Starts from the built-in RuleBasedAnalyzer.DETECTORS and adds keyword-anchored
+custom detectors (the typical "org-specific rule" shape) until the set reaches
+200 detectors.
+
+Run:
+    python benchmarks/bench_scanner.py
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from safe2share.analyzers.rule_based import PatternDetector, RuleBasedAnalyzer
+from safe2share.analyzers.scanner import CompiledScanner
+
+SIZES = (8, 25, 50, 100, 200)
+TEXT_CHARS = 200_000
+REPEAT = 3
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog meeting agenda review project "
+    "deliver quarterly budget roadmap customer release notes team sync"
+).split()
+
+FIELDS = (
+    "account badge client device employee folio grant host invoice job "
+    "ledger member node order patient queue record session tenant user "
+    "vendor warehouse zone"
+).split()
+
+
+def custom_detectors(count: int) -> list[PatternDetector]:
+    return [
+        PatternDetector(
+            f"CUSTOM_{i}",
+            rf"\b{FIELDS[i % len(FIELDS)]}{i}[-_]?id\s*[:=]\s*(\w+)",
+            50,
+            redact_group=1,
+        )
+        for i in range(count)
+    ]
+
+
+def sample_text(detectors: list[PatternDetector]) -> str:
+    rng = random.Random(7)
+    parts: list[str] = []
+    size = 0
+    while size < TEXT_CHARS:
+        if rng.random() < 0.01:
+            part = rng.choice(
+                [
+                    "password: hunter42",
+                    "contact alice@example.com",
+                    "call +1 (613) 555-1212",
+                    f"{FIELDS[rng.randrange(len(FIELDS))]}{rng.randrange(200)}_id: X1",
+                ]
+            )
+        else:
+            part = rng.choice(WORDS)
+        parts.append(part)
+        size += len(part) + 1
+    return " ".join(parts)
+
+
+def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    all_detectors = list(RuleBasedAnalyzer.DETECTORS) + custom_detectors(200)
+    print(f"text: {TEXT_CHARS} chars, best of {REPEAT}")
+    print(
+        f"{'detectors':>9} {'merged':>6} {'per-detector MB/s':>18} "
+        f"{'combined MB/s':>14} {'speedup':>8}"
+    )
+
+    for size in SIZES:
+        detectors = all_detectors[:size]
+        text = sample_text(detectors)
+        scanner = CompiledScanner(detectors)
+
+        def per_detector():
+            return [list(d.regex.finditer(text)) for d in detectors]
+
+        def combined():
+            return scanner.scan(text)
+
+        expected = [[m.span() for m in ms] for ms in per_detector()]
+        assert expected == [[m.span() for m in ms] for ms in combined()]
+
+        mb = len(text) / 1e6
+        t_old = best_of(per_detector)
+        t_new = best_of(combined)
+        print(
+            f"{size:>9} {len(scanner.merged):>6} {mb / t_old:>18.1f} "
+            f"{mb / t_new:>14.1f} {t_old / t_new:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Serialization throughput of analysis results with 10, 1k and 100k detections.
+
+API paths (what /analyze does with the result):
+  "fastapi"     the result returned as is: FastAPI validates it against the
+                response_model, then dumps it to JSON (current releases)
+  "encoder"     the same on older FastAPI releases: jsonable_encoder, then
+                json.dumps in JSONResponse
+  "model json"  ModelJSONResponse: model_dump_json, no re-validation
+
+CLI paths (safe2share --json):
+  "dumps"       model_dump + json.dumps(indent=2), as before
+  "indent"      model_dump_json(indent=2), --json
+  "compact"     model_dump_json(), --json-compact
+
+Run:
+    python benchmarks/bench_serialization.py
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import time
+from typing import Union
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from safe2share.api import ModelJSONResponse
+from safe2share.models import AnalysisResult, CompactAnalysisResult, Detection
+
+REPEAT = 5
+SIZES = (10, 1_000, 100_000)
+
+# Response field of /analyze
+response_field = TypeAdapter(Union[AnalysisResult, CompactAnalysisResult])
+
+
+def make_result(count: int) -> AnalysisResult:
+    return AnalysisResult(
+        risk="CONFIDENTIAL",
+        score=60,
+        reasons=[f"Detected EMAIL: 'user{i}@example.com...'" for i in range(count)],
+        detections=[
+            Detection(
+                label="EMAIL",
+                span=f"user{i}@example.com",
+                score=60,
+                start=i * 40,
+                end=i * 40 + 20,
+            )
+            for i in range(count)
+        ],
+        suggested_rewrites=["[REDACTED] " * count],
+        metadata={"analyzer": "rule_engine_v3"},
+    )
+
+
+PATHS = {
+    "fastapi": lambda r: response_field.dump_json(response_field.validate_python(r)),
+    "encoder": lambda r: JSONResponse(jsonable_encoder(r)).body,
+    "model json": lambda r: ModelJSONResponse(r).body,
+    "dumps": lambda r: json.dumps(r.model_dump(), indent=2),
+    "indent": lambda r: r.model_dump_json(indent=2),
+    "compact": lambda r: r.model_dump_json(),
+}
+
+
+def measure(fn, result) -> float:
+    # Enough calls per repeat for ~0.1s of work on small results
+    calls = max(1, 20_000 // len(result.detections))
+    best = float("inf")
+    for _ in range(REPEAT):
+        gc.collect()
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn(result)
+        best = min(best, (time.perf_counter() - t0) / calls)
+    return best
+
+
+def main() -> None:
+    print(f"{'path':>11} " + " ".join(f"{n:>16}" for n in SIZES))
+    print(f"{'':>11} " + " ".join(f"{'results/s':>16}" for _ in SIZES))
+    results = [make_result(n) for n in SIZES]
+    for name, fn in PATHS.items():
+        rates = [1 / measure(fn, r) for r in results]
+        print(f"{name:>11} " + " ".join(f"{rate:>16,.1f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Admission control for LLM/AUTO analyses in the API.
+
+At most `max_active` analyses run at once; up to `max_queued` more wait in a
+priority queue, and anything beyond that is refused with QueueFullError (HTTP
+429 with Retry-After) instead of piling up latency. Waiters are ordered as if
+a text of N chars arrived N / chars_per_second seconds later than it did, so
+small texts go first but large ones cannot starve. LOCAL requests never enter
+the queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# Smoothing factor of the moving average of slot hold times
+_EWMA_ALPHA = 0.2
+# Bounds of the Retry-After hint (seconds)
+_MIN_RETRY_AFTER = 1
+_MAX_RETRY_AFTER = 60
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the admission queue is full; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionQueue:
+    """
+    Bounded, size-prioritized queue of analysis slots. Used from the event loop
+    only (not thread-safe).
+    """
+
+    def __init__(
+        self,
+        max_active: int,
+        max_queued: int,
+        chars_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.chars_per_second = chars_per_second
+        self._clock = clock
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._hold_ewma: Optional[float] = None
+        self._waiting: List[Tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, size: int) -> AsyncIterator[None]:
+        """Hold one analysis slot for a text of `size` chars."""
+        await self._acquire(size)
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self._release(self._clock() - started)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free (what Retry-After reports)."""
+        hold = self._hold_ewma if self._hold_ewma is not None else 1.0
+        estimate = hold * (self.queued + 1) / max(1, self.max_active)
+        return min(_MAX_RETRY_AFTER, max(_MIN_RETRY_AFTER, math.ceil(estimate)))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after(),
+        }
+
+    async def _acquire(self, size: int) -> None:
+        if self.active < self.max_active and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError(
+                f"LLM analysis queue is full ({self.queued} waiting). "
+                "Retry later or use --provider local.",
+                self.retry_after(),
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        priority = self._clock() + size / self.chars_per_second
+        heapq.heappush(self._waiting, (priority, next(self._seq), future))
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # Left while waiting: its heap entry is skipped by _release
+                self.queued -= 1
+            else:
+                # Cancelled right after being handed a slot: pass it on
+                self._release(None)
+            raise
+        self.admitted += 1
+
+    def _release(self, held: Optional[float]) -> None:
+        if held is not None:
+            self._hold_ewma = (
+                held
+                if self._hold_ewma is None
+                else (1 - _EWMA_ALPHA) * self._hold_ewma + _EWMA_ALPHA * held
+            )
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if future.cancelled():
+                continue
+            # The slot passes straight to the waiter; `active` is unchanged
+            self.queued -= 1
+            future.set_result(None)
+            return
+        self.active -= 1
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from ..config import settings
 from ..models import AnalysisResult
-from .base import BaseAnalyzer
+from .base import BaseAnalyzer, analyze_async, llm_executor, run_auto_local
+from .breaker import CircuitOpenError, OutcomeSlot
+from .context import Excerpt
+from .keywords import KeywordHits, compile_keywords
 from .llm_openai_compat import OpenAICompatibleAnalyzer
 from .rule_based import RuleBasedAnalyzer
 
@@ -24,6 +30,14 @@ class AutoPolicy:
         "vault code",
         "door code",
     )
+    # Send the LLM only this many chars around each local detection and hint
+    # (0 sends the full text)
+    context_radius: int = field(default_factory=lambda: settings.auto_context_radius)
+    # Start the LLM request alongside the local pass when a hint matches
+    # (async path only: a blocking request could not be cancelled)
+    speculative: bool = field(default_factory=lambda: settings.auto_speculative)
+    # Seconds to wait for the LLM before returning the local result (0: no limit)
+    llm_deadline: float = field(default_factory=lambda: settings.auto_llm_deadline)
 
 
 class AutoCombinedAnalyzer(BaseAnalyzer):
@@ -48,10 +62,205 @@ class AutoCombinedAnalyzer(BaseAnalyzer):
         return True
 
     def analyze(self, text: str) -> AnalysisResult:
-        local_res = self.local.analyze(text)
+        local_res, local_meta, excerpt = self._local_pass(text)
+        if local_meta is None:
+            return local_res
+        try:
+            llm_res = self._call_llm(excerpt.text if excerpt else text)
+        except CircuitOpenError:
+            return self._fallback(local_res, local_meta, "local_only_llm_circuit_open")
+        except TimeoutError:
+            return self._fallback(local_res, local_meta, "local_only_llm_timeout")
+        return self._escalated(text, llm_res, local_meta, excerpt)
+
+    async def analyze_async(self, text: str) -> AnalysisResult:
+        """
+        Like analyze, but the local pass runs on the AUTO local executor (apart
+        from LOCAL requests) and the LLM call is awaited, so escalated requests
+        don't hold a thread while waiting.
+
+        With `policy.speculative`, a cheap scan for escalation hints runs first:
+        hints always escalate, so when one matches the LLM request starts right
+        away, concurrently with the local pass, on windows around the hints.
+        If the local pass then finds something outside those windows, the
+        speculative request is cancelled and a new one sent with the full
+        excerpt.
+        """
+        loop = asyncio.get_running_loop()
+        speculation = self._speculate(text)
+        spec_started = loop.time()
+        try:
+            local_res, local_meta, excerpt = await run_auto_local(
+                self._local_pass, text
+            )
+        except BaseException:
+            if speculation is not None:
+                _discard(speculation[0])
+            raise
+
+        llm_call, llm_started = None, loop.time()
+        if speculation is not None:
+            task, spec_excerpt = speculation
+            if local_meta is not None and self._covers(spec_excerpt, local_res):
+                local_meta = {
+                    **local_meta,
+                    "auto_llm_bytes_sent": _utf8_len(
+                        spec_excerpt.text if spec_excerpt else text
+                    ),
+                    "auto_speculative": "used",
+                }
+                llm_call, llm_started, excerpt = task, spec_started, spec_excerpt
+            else:
+                _discard(task)
+                if local_meta is not None:
+                    local_meta = {**local_meta, "auto_speculative": "restarted"}
+
+        if local_meta is None:
+            return local_res
+        if llm_call is None:
+            llm_call = analyze_async(self.llm, excerpt.text if excerpt else text)
+        try:
+            llm_res = await self._await_llm(llm_call, llm_started)
+        except CircuitOpenError:
+            return self._fallback(local_res, local_meta, "local_only_llm_circuit_open")
+        except TimeoutError:
+            return self._fallback(local_res, local_meta, "local_only_llm_timeout")
+        return self._escalated(text, llm_res, local_meta, excerpt)
+
+    async def analyze_many_async(self, texts: Sequence[str]) -> List[AnalysisResult]:
+        """
+        analyze_async for several texts (batches): the local passes run in one
+        go on the AUTO local executor, and the texts to escalate are sent together
+        through the LLM's analyze_many_async, which packs short ones into
+        shared completions. The deadline applies to that call as a whole.
+        """
+        passes = await run_auto_local(lambda: [self._local_pass(t) for t in texts])
+        results = [local_res for local_res, _, _ in passes]
+        escalate = [i for i, p in enumerate(passes) if p[1] is not None]
+        if not escalate:
+            return results
+
+        sent = [passes[i][2].text if passes[i][2] else texts[i] for i in escalate]
+        if hasattr(self.llm, "analyze_many_async"):
+            call = self.llm.analyze_many_async(sent)
+        else:
+            call = asyncio.gather(*(analyze_async(self.llm, t) for t in sent))
+        path = None
+        try:
+            found = await self._await_llm(call, asyncio.get_running_loop().time())
+        except CircuitOpenError:
+            path = "local_only_llm_circuit_open"
+        except TimeoutError:
+            path = "local_only_llm_timeout"
+
+        for n, i in enumerate(escalate):
+            local_res, local_meta, excerpt = passes[i]
+            if path is None:
+                results[i] = self._escalated(texts[i], found[n], local_meta, excerpt)
+            else:
+                results[i] = self._fallback(local_res, local_meta, path)
+        return results
+
+    def _call_llm(self, text: str) -> AnalysisResult:
+        """
+        llm.analyze bounded by `policy.llm_deadline`. The blocking call runs on
+        the shared daemon LLM pool; past the deadline it is left to finish (or
+        hit the client timeout) on its own, without holding up process exit,
+        and TimeoutError is raised. The timeout and the call's own outcome share
+        one breaker slot, so a call that fails late is not counted twice.
+        """
+        if self.policy.llm_deadline <= 0:
+            return self.llm.analyze(text)
+
+        slot = OutcomeSlot()
+        future = llm_executor().submit(slot.run, self.llm.analyze, text)
+        try:
+            return future.result(timeout=self.policy.llm_deadline)
+        except TimeoutError:
+            # Still queued behind other calls: don't send it at all
+            future.cancel()
+            self._llm_timed_out(slot)
+            raise
+
+    async def _await_llm(self, call: Awaitable[AnalysisResult], started: float):
+        """Await the LLM within what is left of `policy.llm_deadline`."""
+        if self.policy.llm_deadline <= 0:
+            return await call
+        remaining = self.policy.llm_deadline - (
+            asyncio.get_running_loop().time() - started
+        )
+        try:
+            # Cancels the request on timeout
+            return await asyncio.wait_for(call, max(remaining, 0))
+        except TimeoutError:
+            self._llm_timed_out()
+            raise
+
+    def _llm_timed_out(self, slot: Optional[OutcomeSlot] = None) -> None:
+        # A missed deadline counts against the endpoint like a failed request
+        breaker = getattr(self.llm, "breaker", None)
+        if breaker is None:
+            return
+        if slot is None:
+            breaker.record_failure()
+        else:
+            slot.run(breaker.record_failure)
+
+    @staticmethod
+    def _fallback(
+        local_res: AnalysisResult, local_meta: Dict[str, str], path: str
+    ) -> AnalysisResult:
+        local_res.metadata = {
+            **(local_res.metadata or {}),
+            **local_meta,
+            "provider": "auto",
+            "auto_path": path,
+        }
+        return local_res
+
+    def _speculate(self, text: str) -> Optional[Tuple[asyncio.Task, Optional[Excerpt]]]:
+        """Start the LLM request early if an escalation hint already matches."""
+        if not self.policy.speculative:
+            return None
+        if hasattr(self.llm, "is_available") and not self.llm.is_available:
+            return None
+        hits = compile_keywords(tuple(self.policy.escalate_hints)).scan(text)
+        spans = self._hint_spans(hits)
+        if not spans:
+            return None
+        excerpt = self._excerpt_for(text, spans)
+        llm_text = excerpt.text if excerpt else text
+        return asyncio.create_task(analyze_async(self.llm, llm_text)), excerpt
+
+    @staticmethod
+    def _covers(excerpt: Optional[Excerpt], local_res: AnalysisResult) -> bool:
+        """True if the LLM saw every local detection through `excerpt`."""
+        if excerpt is None:
+            return True
+        return all(
+            d.start is not None and d.end is not None and excerpt.covers(d.start, d.end)
+            for d in local_res.detections
+        )
 
-        text_l = text.lower()
-        hint_trigger = any(h in text_l for h in self.policy.escalate_hints)
+    def _local_pass(
+        self, text: str
+    ) -> Tuple[AnalysisResult, Optional[Dict[str, str]], Optional[Excerpt]]:
+        """
+        Run the local analyzer and decide on escalation. Returns the final
+        result, or the local result, its metadata and (with a context radius)
+        the excerpt to send when the LLM should be called.
+        """
+        # One keyword pass shared by the escalation hints and the local analyzer
+        local_keywords = getattr(self.local, "keywords", ())
+        index = compile_keywords(tuple(self.policy.escalate_hints) + local_keywords)
+        hits = index.scan(text)
+
+        if isinstance(self.local, RuleBasedAnalyzer):
+            local_res = self.local.analyze(text, hits=hits)
+        else:
+            local_res = self.local.analyze(text)
+
+        hint_trigger = hits.any(self.policy.escalate_hints)
 
         should_escalate = (local_res.risk in self.policy.escalate_risks) or hint_trigger
 
@@ -71,7 +280,7 @@ class AutoCombinedAnalyzer(BaseAnalyzer):
                 "provider": "auto",
                 "auto_path": "local_only",
             }
-            return local_res
+            return local_res, None, None
 
         # Escalate only if LLM is available
         if hasattr(self.llm, "is_available") and not self.llm.is_available:
@@ -81,9 +290,50 @@ class AutoCombinedAnalyzer(BaseAnalyzer):
                 "provider": "auto",
                 "auto_path": "local_only_llm_unavailable",
             }
-            return local_res
+            return local_res, None, None
+
+        excerpt = self._excerpt(text, local_res, hits)
+        local_meta["auto_input_bytes"] = _utf8_len(text)
+        local_meta["auto_llm_bytes_sent"] = _utf8_len(excerpt.text if excerpt else text)
+        return local_res, local_meta, excerpt
 
-        llm_res = self.llm.analyze(text)
+    def _excerpt(
+        self, text: str, local_res: AnalysisResult, hits: KeywordHits
+    ) -> Optional[Excerpt]:
+        """Windows around local findings, or None to send the full text."""
+        spans: List[Tuple[int, int]] = []
+        for d in local_res.detections:
+            if d.start is None or d.end is None:
+                # Can't tell where this finding is: the LLM needs everything
+                return None
+            spans.append((d.start, d.end))
+        return self._excerpt_for(text, spans + self._hint_spans(hits))
+
+    def _hint_spans(self, hits: KeywordHits) -> List[Tuple[int, int]]:
+        return [
+            (pos, pos + len(hint))
+            for hint in self.policy.escalate_hints
+            for pos in hits.positions(hint)
+        ]
+
+    def _excerpt_for(
+        self, text: str, spans: List[Tuple[int, int]]
+    ) -> Optional[Excerpt]:
+        if self.policy.context_radius <= 0 or not spans:
+            return None
+        excerpt = Excerpt(text, spans, self.policy.context_radius)
+        return None if excerpt.covers_input else excerpt
+
+    @staticmethod
+    def _escalated(
+        text: str,
+        llm_res: AnalysisResult,
+        local_meta: Dict[str, str],
+        excerpt: Optional[Excerpt],
+    ) -> AnalysisResult:
+        if excerpt is not None:
+            llm_res = excerpt.map_result(text, llm_res)
+            local_meta = {**local_meta, "auto_llm_windows": str(excerpt.windows)}
 
         # Attach auto metadata + preserve LLM metadata (model/base_url)
         llm_res.metadata = {
@@ -93,3 +343,42 @@ class AutoCombinedAnalyzer(BaseAnalyzer):
             "auto_path": "escalated_to_llm",
         }
         return llm_res
+
+    def analyze_stream(self, chunks: Iterable[str]) -> AnalysisResult:
+        """
+        Streamed input is too large to send to the LLM, so only the local
+        analyzer runs; the result records that escalation was skipped.
+        """
+        if not hasattr(self.local, "analyze_stream"):
+            raise RuntimeError("Local analyzer does not support streaming input.")
+        return self._local_only(
+            self.local.analyze_stream(chunks), "local_only_streamed"
+        )
+
+    def analyze_file(self, path: str | Path) -> AnalysisResult:
+        """Bytes-mode file scan: local only, like analyze_stream."""
+        if not hasattr(self.local, "analyze_file"):
+            raise RuntimeError("Local analyzer does not support file scanning.")
+        return self._local_only(self.local.analyze_file(path), "local_only_file")
+
+    @staticmethod
+    def _local_only(local_res: AnalysisResult, path: str) -> AnalysisResult:
+        local_res.metadata = {
+            **(local_res.metadata or {}),
+            "auto_local_risk": local_res.risk,
+            "auto_local_score": str(local_res.score),
+            "auto_escalated": "false",
+            "provider": "auto",
+            "auto_path": path,
+        }
+        return local_res
+
+
+def _utf8_len(text: str) -> str:
+    return str(len(text.encode("utf-8", "replace")))
+
+
+def _discard(task: asyncio.Task) -> None:
+    """Cancel a speculative request, retrieving its outcome if it already ended."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
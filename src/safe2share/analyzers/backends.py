@@ -0,0 +1,214 @@
+"""
+Pool of OpenAI-compatible LLM backends (e.g. several Ollama instances).
+
+Each request leases the healthy backend with the fewest in-flight requests
+relative to its weight. A connection error marks the backend unhealthy and the
+request fails over to the next one. With more than one backend, a background
+thread probes every backend's `/models` endpoint and brings recovered ones
+back. Per-backend request, error and latency counters are kept for `/llm/backends`.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from ..config import LLMBackend, settings
+
+logger = logging.getLogger(__name__)
+
+# Health probes must not wait as long as a completion may
+_PROBE_TIMEOUT = 2.0
+# Smoothing factor of the latency moving average
+_EWMA_ALPHA = 0.2
+
+
+class Backend:
+    """One endpoint: its clients, load and stats."""
+
+    def __init__(self, config: LLMBackend, failover: bool = False) -> None:
+        self.base_url = config.base_url
+        self.model = config.model
+        self.weight = config.weight
+        self.healthy = True
+        self.inflight = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency_ewma: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        # Some local servers don't require a key; OpenAI client needs a string.
+        api_key = config.api_key or settings.llm_api_key or "local"
+        # With other backends to fail over to, don't retry a dead one first
+        max_retries = 0 if failover else openai.DEFAULT_MAX_RETRIES
+
+        # Explicitly sized keep-alive pool: reuse one analyzer to reuse connections
+        self.client = OpenAI(
+            base_url=config.base_url,
+            api_key=api_key,
+            max_retries=max_retries,
+            http_client=DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_keepalive_connections,
+                    keepalive_expiry=settings.llm_keepalive_expiry,
+                ),
+                timeout=settings.llm_timeout,
+            ),
+        )
+
+        # Async client for the API: requests wait on the network without holding
+        # a thread, so the pool is sized for the concurrency cap rather than for
+        # the threadpool.
+        self.aclient = AsyncOpenAI(
+            base_url=config.base_url,
+            api_key=api_key,
+            max_retries=max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_concurrency,
+                    max_keepalive_connections=settings.llm_max_keepalive_connections,
+                    keepalive_expiry=settings.llm_keepalive_expiry,
+                ),
+                timeout=settings.llm_timeout,
+            ),
+        )
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "base_url": self.base_url,
+            "model": self.model,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": (
+                round(self.latency_ewma * 1000, 1)
+                if self.latency_ewma is not None
+                else None
+            ),
+            "last_error": self.last_error,
+        }
+
+
+class BackendPool:
+    def __init__(self, backends: List[Backend]) -> None:
+        self.backends = backends
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._prober: Optional[threading.Thread] = None
+
+    @contextmanager
+    def lease(self, tried: List[Backend]) -> Iterator[Backend]:
+        """
+        Reserve the least-loaded backend not in `tried` (appending it there) for
+        one request, and record the request's latency and outcome.
+        """
+        self._ensure_prober()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in tried]
+            # Unhealthy backends are only used when nothing else is left
+            healthy = [b for b in candidates if b.healthy]
+            backend = min(
+                healthy or candidates,
+                key=lambda b: ((b.inflight + 1) / b.weight, random.random()),
+            )
+            backend.inflight += 1
+        tried.append(backend)
+
+        t0 = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            yield backend
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                backend.inflight -= 1
+                if isinstance(error, Exception):
+                    backend.errors += 1
+                    backend.last_error = type(error).__name__
+                elif error is None:
+                    backend.requests += 1
+                    backend.latency_ewma = (
+                        elapsed
+                        if backend.latency_ewma is None
+                        else (1 - _EWMA_ALPHA) * backend.latency_ewma
+                        + _EWMA_ALPHA * elapsed
+                    )
+
+    def fail_over(self, error: Exception, tried: List[Backend]) -> bool:
+        """
+        After a failed request on tried[-1]: mark it unhealthy on a connection
+        error and tell whether another backend is left to retry on. Timeouts do
+        not fail over (the request may well have been processed).
+        """
+        if not isinstance(error, openai.APIConnectionError) or isinstance(
+            error, openai.APITimeoutError
+        ):
+            return False
+        tried[-1].healthy = False
+        return len(tried) < len(self.backends)
+
+    def check_health(self) -> None:
+        """Probe every backend once (GET /models)."""
+        for backend in self.backends:
+            try:
+                backend.client.with_options(
+                    timeout=_PROBE_TIMEOUT, max_retries=0
+                ).models.list()
+                backend.healthy = True
+            except openai.APIStatusError as e:
+                # Answering at all (e.g. 404 without a models route) means it's up
+                backend.healthy = e.status_code < 500
+            except openai.APIError:
+                backend.healthy = False
+            except Exception:
+                # Transport errors, malformed answers...: down, and keep probing
+                logger.warning(
+                    "Health probe of %s failed", backend.base_url, exc_info=True
+                )
+                backend.healthy = False
+
+    def _ensure_prober(self) -> None:
+        if (
+            self._prober is not None
+            or len(self.backends) < 2
+            or settings.llm_health_interval <= 0
+        ):
+            return
+        with self._lock:
+            if self._prober is None:
+                self._prober = threading.Thread(
+                    target=self._probe_loop, name="s2s-llm-health", daemon=True
+                )
+                self._prober.start()
+
+    def _probe_loop(self) -> None:
+        while not self._stop.wait(settings.llm_health_interval):
+            self.check_health()
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [b.snapshot() for b in self.backends]
+
+    def close(self) -> None:
+        self._stop.set()
+        for backend in self.backends:
+            backend.client.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        for backend in self.backends:
+            await backend.aclient.close()
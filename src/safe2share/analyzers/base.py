@@ -1,7 +1,13 @@
 # Analyzer Strategy interface
 
+import asyncio
+import queue
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 
+from ..config import settings
 from ..models import AnalysisResult
 
 
@@ -32,3 +38,102 @@ class BaseAnalyzer(ABC):
             An AnalysisResult model containing risk, score, and reasons.
         """
         raise NotImplementedError
+
+    async def analyze_async(self, text: str) -> AnalysisResult:
+        """
+        Async variant of analyze. The default runs analyze in a worker thread;
+        analyzers that wait on the network override it with native async I/O.
+        """
+        return await asyncio.to_thread(self.analyze, text)
+
+
+async def analyze_async(analyzer, text: str) -> AnalysisResult:
+    """Await `analyzer`'s async path, or run its sync analyze in a thread."""
+    if hasattr(analyzer, "analyze_async"):
+        return await analyzer.analyze_async(text)
+    return await asyncio.to_thread(analyzer.analyze, text)
+
+
+@lru_cache(maxsize=1)
+def local_executor() -> ThreadPoolExecutor:
+    """
+    Threads for the local-rule work of async callers (S2S_LOCAL_WORKERS). Sync
+    LLM calls made from async code go through the default executor, so local
+    work kept apart from it never waits behind LLM traffic.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.local_workers, thread_name_prefix="s2s-local"
+    )
+
+
+@lru_cache(maxsize=1)
+def auto_local_executor() -> ThreadPoolExecutor:
+    """
+    Threads for the local passes of AUTO analyses (S2S_AUTO_LOCAL_WORKERS),
+    so a burst of AUTO requests never queues ahead of LOCAL ones.
+    """
+    return ThreadPoolExecutor(
+        max_workers=settings.auto_local_workers, thread_name_prefix="s2s-auto-local"
+    )
+
+
+async def run_local(fn, *args):
+    """Run the CPU-bound `fn(*args)` on the local executor."""
+    return await asyncio.get_running_loop().run_in_executor(local_executor(), fn, *args)
+
+
+async def run_auto_local(fn, *args):
+    """run_local for AUTO's local passes, on their own executor."""
+    return await asyncio.get_running_loop().run_in_executor(
+        auto_local_executor(), fn, *args
+    )
+
+
+class DaemonPool:
+    """
+    Bounded thread pool whose workers are daemon threads. The stdlib executor
+    joins its workers at exit, so a call abandoned past a deadline would keep
+    the process alive until it returns; here it is simply dropped at exit.
+    """
+
+    def __init__(self, max_workers: int, name: str) -> None:
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._idle = 0
+
+    def submit(self, fn, *args) -> Future:
+        """Queue `fn(*args)`; cancelling the future before it starts skips it."""
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        with self._lock:
+            if self._idle == 0 and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(
+                    target=self._work,
+                    name=f"{self.name}-{self._workers}",
+                    daemon=True,
+                ).start()
+        return future
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._idle += 1
+            future, fn, args = self._queue.get()
+            with self._lock:
+                self._idle -= 1
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+@lru_cache(maxsize=1)
+def llm_executor() -> DaemonPool:
+    """Threads for blocking LLM calls bounded by a deadline (S2S_AUTO_LLM_WORKERS)."""
+    return DaemonPool(settings.auto_llm_workers, "s2s-auto-llm")
@@ -0,0 +1,156 @@
+"""
+Circuit breaker for the LLM endpoint.
+
+  closed     requests flow; consecutive failures are counted
+  open       after `failure_threshold` failures, requests are refused for
+             `cooldown` seconds without touching the endpoint
+  half_open  after the cooldown one probe request is let through; success
+             closes the breaker, failure opens it again
+
+A success only resets the count if no failure was recorded after the request
+started, so a request that answers after its caller gave up on it (deadline)
+does not hide the timeout.
+
+A caller that bounds a blocking request by its own deadline runs it in an
+`OutcomeSlot`: the caller's timeout and the request's own success or failure
+then share one slot, and only the first of them is recorded.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+
+class OutcomeSlot:
+    """Room for a single breaker outcome of one call."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._taken = False
+
+    def take(self) -> bool:
+        """Claim the slot; False if an outcome was already recorded."""
+        with self._lock:
+            taken, self._taken = self._taken, True
+            return not taken
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Call fn; the outcomes it records go through this slot."""
+        token = _slot.set(self)
+        try:
+            return fn(*args)
+        finally:
+            _slot.reset(token)
+
+
+_slot: ContextVar[Optional[OutcomeSlot]] = ContextVar("s2s_outcome_slot", default=None)
+
+
+def bind_outcome(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn, recording into the current call's slot from any thread it runs on."""
+    slot = _slot.get()
+    return fn if slot is None else partial(slot.run, fn)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int,
+        cooldown: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._last_failure = float("-inf")
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may go out now (claims the probe when half-open)."""
+        with self._lock:
+            self._advance()
+            if self._state == OPEN:
+                return False
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def started(self) -> float:
+        """Token for a request starting now, passed back to record_success."""
+        return self._clock()
+
+    def record_success(self, started: float) -> None:
+        if not _claim():
+            return
+        with self._lock:
+            if started <= self._last_failure:
+                return
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        if not _claim():
+            return
+        with self._lock:
+            now = self._clock()
+            self._last_failure = now
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = now
+            self._probing = False
+
+    def abandon(self) -> None:
+        """The caller gave up on its request without an outcome (cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed (0 unless open)."""
+        with self._lock:
+            self._advance()
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.cooldown - self._clock())
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "retry_in": round(self.retry_in(), 3),
+        }
+
+    def _advance(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probing = False
+
+
+def _claim() -> bool:
+    slot = _slot.get()
+    return slot is None or slot.take()
@@ -0,0 +1,133 @@
+"""
+Chunking for LLM analysis of long inputs.
+
+Long texts are split into overlapping chunks that fit the model's context; each
+chunk is classified on its own (concurrently) and the per-chunk answers are
+merged back into one AnalysisResult:
+
+  - detections get global start/end offsets by locating their span inside the
+    chunk they came from; the same span seen in two overlapping chunks is
+    reported once
+  - the overall score is the highest chunk score
+  - the rewrite is rebuilt from the original text, redacting every occurrence
+    of every detected span, rather than concatenating per-chunk rewrites
+
+A secret is fully contained in at least one chunk as long as it is shorter
+than the overlap.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from ..models import AnalysisResult, Detection, map_score_to_risk
+
+# Rough size of a token for budgeting chunks without a model-specific tokenizer
+CHARS_PER_TOKEN = 4
+
+_WHITESPACE = re.compile(r"\s")
+
+
+def split_chunks(text: str, size: int, overlap: int) -> List[Tuple[int, str]]:
+    """
+    Split `text` into (offset, chunk) pairs of at most `size` chars, each
+    starting `overlap` chars (at most size/2) before the previous one ends.
+    Cuts prefer a line break, then whitespace, in the last quarter of a chunk.
+    """
+    if len(text) <= size:
+        return [(0, text)]
+    overlap = min(overlap, size // 2)
+
+    chunks: List[Tuple[int, str]] = []
+    start = 0
+    while True:
+        end = min(start + size, len(text))
+        if end < len(text):
+            floor = start + size * 3 // 4
+            cut = text.rfind("\n", floor, end)
+            if cut == -1:
+                cut = text.rfind(" ", floor, end)
+            if cut != -1:
+                end = cut + 1
+        chunks.append((start, text[start:end]))
+        if end >= len(text):
+            return chunks
+
+        # Next chunk re-reads the tail of this one, starting on a word boundary
+        start = end - overlap
+        ws = _WHITESPACE.search(text, start, end)
+        if ws is not None:
+            start = ws.end()
+
+
+def merge_chunk_results(
+    text: str,
+    chunks: Sequence[Tuple[int, str]],
+    results: Sequence[AnalysisResult],
+    metadata: Dict[str, str],
+) -> AnalysisResult:
+    """Combine per-chunk LLM results into one result for the whole `text`."""
+    located: Dict[Tuple[int, int], Detection] = {}
+    unlocated: Dict[Tuple[str, str], Detection] = {}
+    reasons: Dict[str, None] = {}
+    score = 0
+
+    for (offset, chunk), res in zip(chunks, results):
+        score = max(score, res.score)
+        reasons.update(dict.fromkeys(res.reasons))
+        for d in res.detections:
+            pos = chunk.find(d.span) if d.span else -1
+            if pos == -1:
+                # Paraphrased span: keep it, without offsets
+                key = (d.label, d.span)
+                if key not in unlocated or unlocated[key].score < d.score:
+                    unlocated[key] = d
+                continue
+            start = offset + pos
+            end = start + len(d.span)
+            seen = located.get((start, end))
+            if seen is None or seen.score < d.score:
+                located[(start, end)] = Detection(
+                    label=d.label, span=d.span, score=d.score, start=start, end=end
+                )
+
+    detections = sorted(located.values(), key=lambda d: (d.start, d.end))
+    detections += unlocated.values()
+
+    return AnalysisResult(
+        risk=map_score_to_risk(score),
+        score=score,
+        reasons=list(reasons),
+        detections=detections,
+        suggested_rewrites=[redact_spans(text, [d.span for d in detections])],
+        metadata={**metadata, "chunks": str(len(chunks))},
+    )
+
+
+def redact_spans(text: str, spans: Sequence[str]) -> str:
+    """Replace every occurrence of each span with [REDACTED] (merging overlaps)."""
+    intervals: List[Tuple[int, int]] = []
+    for span in set(s for s in spans if s):
+        pos = text.find(span)
+        while pos != -1:
+            intervals.append((pos, pos + len(span)))
+            pos = text.find(span, pos + 1)
+    if not intervals:
+        return text
+
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    parts: List[str] = []
+    cursor = 0
+    for start, end in merged:
+        parts.append(text[cursor:start])
+        parts.append("[REDACTED]")
+        cursor = end
+    parts.append(text[cursor:])
+    return "".join(parts)
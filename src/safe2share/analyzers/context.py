@@ -0,0 +1,93 @@
+"""
+Context windows for AUTO escalation.
+
+Instead of the whole input, AUTO can send the LLM only the regions around what
+the local pass found (detections and escalation hints), each widened by a
+radius and merged where they overlap. The windows are joined into one excerpt;
+the LLM's findings on the excerpt are mapped back onto the original text.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+from ..models import AnalysisResult, Detection
+from .chunking import redact_spans
+
+# Marks the text left out between two windows
+SEPARATOR = "\n[...]\n"
+
+
+class Excerpt:
+    """Windows of a text joined into one string, with a map back to the original."""
+
+    def __init__(
+        self, text: str, spans: Sequence[Tuple[int, int]], radius: int
+    ) -> None:
+        windows: List[List[int]] = []
+        for start, end in sorted(spans):
+            start, end = max(0, start - radius), min(len(text), end + radius)
+            if windows and start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+
+        parts: List[str] = []
+        # (excerpt offset, original offset, length) per window
+        self._segments: List[Tuple[int, int, int]] = []
+        pos = 0
+        for start, end in windows:
+            if parts:
+                parts.append(SEPARATOR)
+                pos += len(SEPARATOR)
+            self._segments.append((pos, start, end - start))
+            parts.append(text[start:end])
+            pos += end - start
+
+        self.windows = len(windows)
+        self.text = "".join(parts)
+        self.covers_input = len(self.text) >= len(text)
+
+    def to_original(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """Original offsets of excerpt[start:end], or None if it spans a gap."""
+        i = bisect_right(self._segments, (start, float("inf"))) - 1
+        if i < 0:
+            return None
+        seg_start, orig_start, length = self._segments[i]
+        if end > seg_start + length:
+            return None
+        return orig_start + start - seg_start, orig_start + end - seg_start
+
+    def covers(self, start: int, end: int) -> bool:
+        """True if original text[start:end] lies inside one window."""
+        return any(
+            orig <= start and end <= orig + length for _, orig, length in self._segments
+        )
+
+    def map_result(self, text: str, res: AnalysisResult) -> AnalysisResult:
+        """Rebase a result computed on the excerpt onto the original `text`."""
+        detections: List[Detection] = []
+        for d in res.detections:
+            start, end = d.start, d.end
+            if start is None or end is None:
+                pos = self.text.find(d.span) if d.span else -1
+                start, end = (pos, pos + len(d.span)) if pos != -1 else (None, None)
+            mapped = self.to_original(start, end) if start is not None else None
+            detections.append(
+                d.model_copy(
+                    update={
+                        "start": mapped[0] if mapped else None,
+                        "end": mapped[1] if mapped else None,
+                    }
+                )
+            )
+
+        return res.model_copy(
+            update={
+                "detections": detections,
+                "suggested_rewrites": [
+                    redact_spans(text, [d.span for d in detections])
+                ],
+            }
+        )
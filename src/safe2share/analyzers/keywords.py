@@ -0,0 +1,105 @@
+"""
+Multi-keyword index shared by the keyword consumers (boosters, HIGH_ENTROPY hint
+words, AUTO escalation hints).
+
+Instead of one ``kw in text.lower()`` scan per keyword (and, for boosters, per
+detection), every keyword is found in a single pass. A compiled alternation of
+keyword prefixes locates candidate start positions at regex-engine speed, and a
+trie walk from each candidate reports *every* keyword starting there, so
+overlapping keywords ("api" and "api key") are all found, as with Aho-Corasick.
+Bytes-like buffers (e.g. ``mmap``) are scanned without decoding; positions are
+then byte offsets.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+_END = ""
+
+
+class KeywordHits:
+    """Keyword occurrences found in one text (keyword -> sorted start offsets)."""
+
+    def __init__(self, positions: Dict[str, List[int]]) -> None:
+        self._positions = positions
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword.lower() in self._positions
+
+    def __bool__(self) -> bool:
+        return bool(self._positions)
+
+    @property
+    def found(self) -> frozenset:
+        return frozenset(self._positions)
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        return any(kw in self for kw in keywords)
+
+    def positions(self, keyword: str) -> List[int]:
+        """Start offsets of `keyword` in the scanned text (empty if absent)."""
+        return list(self._positions.get(keyword.lower(), ()))
+
+
+class KeywordIndex:
+    """Case-insensitive index over a fixed keyword set."""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: Tuple[str, ...] = tuple(
+            dict.fromkeys(kw.lower() for kw in keywords if kw)
+        )
+
+        self._trie: dict = {}
+        for kw in self.keywords:
+            node = self._trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[_END] = kw
+
+        self._locator = self._bytes_locator = None
+        if self.keywords:
+            # Longest first so the locator never stops on a bare prefix only
+            ordered = sorted(self.keywords, key=len, reverse=True)
+            alternation = "|".join(re.escape(kw) for kw in ordered)
+            self._locator = re.compile(f"(?=(?:{alternation}))", re.IGNORECASE)
+            # Bytes buffers are matched on raw bytes: only ASCII keywords apply
+            ascii_alternation = "|".join(
+                re.escape(kw) for kw in ordered if kw.isascii()
+            )
+            if ascii_alternation:
+                self._bytes_locator = re.compile(
+                    f"(?=(?:{ascii_alternation}))".encode(), re.IGNORECASE
+                )
+
+    def scan(self, text: str | bytes) -> KeywordHits:
+        """Find every keyword occurrence in `text` in one pass."""
+        positions: Dict[str, List[int]] = {}
+        is_str = isinstance(text, str)
+        locator = self._locator if is_str else self._bytes_locator
+        if locator is None:
+            return KeywordHits(positions)
+
+        n = len(text)
+        for m in locator.finditer(text):
+            start = m.start()
+            node = self._trie
+            i = start
+            while i < n:
+                ch = text[i] if is_str else chr(text[i])
+                node = node.get(ch.lower())
+                if node is None:
+                    break
+                i += 1
+                kw = node.get(_END)
+                if kw is not None:
+                    positions.setdefault(kw, []).append(start)
+        return KeywordHits(positions)
+
+
+@lru_cache(maxsize=32)
+def compile_keywords(keywords: tuple) -> KeywordIndex:
+    """Build (once per keyword set) the index for `keywords`."""
+    return KeywordIndex(keywords)
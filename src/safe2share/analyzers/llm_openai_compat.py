@@ -1,22 +1,40 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
-import re
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from openai import OpenAI
+import openai
 
 from ..config import settings
 from ..models import AnalysisResult, Detection, map_score_to_risk
+from .backends import Backend, BackendPool
 from .base import BaseAnalyzer
-from .prompts import PROMPT_V2_REDACT_FULL
+from .breaker import CircuitBreaker, CircuitOpenError, bind_outcome
+from .chunking import CHARS_PER_TOKEN, merge_chunk_results, split_chunks
+from .microbatch import MicroBatcher
+from .prompts import PROMPT_V2_PACKED, PROMPT_V2_REDACT_FULL
+from .streamjson import JSONObjectStream
 
 SYSTEM_PROMPT = PROMPT_V2_REDACT_FULL
+# Several short inputs per completion (see analyze_many)
+PACKED_SYSTEM_PROMPT = PROMPT_V2_PACKED
+# Identifies the prompts in cache keys: editing them invalidates cached results
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + PACKED_SYSTEM_PROMPT).encode()
+).hexdigest()[:16]
+
+# Called with the reply parsed so far while streaming; True stops generation
+StopCheck = Callable[[JSONObjectStream], bool]
 
 
 class OpenAICompatibleAnalyzer(BaseAnalyzer):
     """
-    LLM analyzer that talks to any OpenAI-compatible endpoint.
+    LLM analyzer that talks to any OpenAI-compatible endpoint, or to a pool of
+    them (S2S_LLM_BACKENDS) with least-loaded routing and failover.
 
     Works with:
       - OpenAI cloud (base_url=https://api.openai.com/v1)
@@ -25,42 +43,422 @@ class OpenAICompatibleAnalyzer(BaseAnalyzer):
     """
 
     def __init__(self) -> None:
-        self._is_ready = bool(settings.llm_base_url and settings.llm_model)
-
-        # Some local servers don't require a key; OpenAI client needs a string.
-        api_key = settings.llm_api_key or "local"
+        configs = settings.llm_backend_list()
+        self.pool = BackendPool([Backend(b, len(configs) > 1) for b in configs])
+        self._is_ready = bool(self.pool.backends)
+        self._inflight = asyncio.Semaphore(settings.llm_max_concurrency)
 
-        self._client = OpenAI(base_url=settings.llm_base_url, api_key=api_key)
+        # Shared by every caller of this analyzer (LLM and AUTO providers)
+        self.breaker = CircuitBreaker(
+            settings.llm_breaker_failures, settings.llm_breaker_cooldown
+        )
+        self._batcher = MicroBatcher(
+            self._complete_many_async,
+            settings.llm_pack_max_items,
+            settings.llm_pack_wait_ms / 1000,
+        )
 
     @property
     def is_available(self) -> bool:
         return self._is_ready
 
+    def close(self) -> None:
+        """Close the pooled HTTP connections of the sync clients."""
+        self.pool.close()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections of all clients."""
+        await self.pool.aclose()
+
     def analyze(self, text: str) -> AnalysisResult:
+        """
+        Classify `text`. Inputs longer than S2S_LLM_CHUNK_TOKENS are split into
+        overlapping chunks, classified concurrently, and merged (chunking.py).
+        """
+        self._require_available()
+        self._check_breaker()
+        return self._analyze_checked(text)
+
+    async def analyze_async(self, text: str) -> AnalysisResult:
+        """
+        Non-blocking analyze. At most `S2S_LLM_MAX_CONCURRENCY` requests are in
+        flight per analyzer; the rest wait here without holding a thread.
+        Short texts are micro-batched: those arriving within
+        S2S_LLM_PACK_WAIT_MS of each other share one packed completion.
+        """
+        self._require_available()
+        self._check_breaker()
+        if self._packable(text) and settings.llm_pack_wait_ms > 0:
+            return await self._batcher.submit(text)
+        return await self._analyze_checked_async(text)
+
+    def analyze_many(self, texts: Sequence[str]) -> List[AnalysisResult]:
+        """
+        Classify several texts, packing short ones (up to S2S_LLM_PACK_MAX_ITEMS
+        and S2S_LLM_PACK_MAX_CHARS per call) into shared completions.
+        """
+        self._require_available()
+        self._check_breaker()
+        results: List[AnalysisResult] = [None] * len(texts)  # type: ignore[list-item]
+
+        def run(group: List[int]) -> None:
+            for i, res in zip(group, self._complete_group([texts[i] for i in group])):
+                results[i] = res
+
+        groups = self._pack(texts)
+        workers = max(1, min(settings.llm_chunk_concurrency, len(groups)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, groups))
+        return results
+
+    async def analyze_many_async(self, texts: Sequence[str]) -> List[AnalysisResult]:
+        """Async analyze_many."""
+        self._require_available()
+        self._check_breaker()
+        return await self._complete_many_async(texts)
+
+    def analyze_verdict(self, text: str, block_score: int) -> AnalysisResult:
+        """
+        Like analyze, for callers that only need a block/allow decision: the
+        reply is streamed and generation stops as soon as a score of at least
+        `block_score` arrives. Such a result can miss later detections and the
+        rewrite (metadata llm_partial).
+        """
+        self._require_available()
+        self._check_breaker()
+        chunks = self._chunks(text)
+        blocked = threading.Event()
+        stop = _stop_at(block_score, blocked)
+
+        def run(chunk: str) -> Optional[AnalysisResult]:
+            if blocked.is_set():
+                return None
+            reply, backend = self._chat(self._messages(chunk), stop)
+            return _verdict_result(self, reply, backend, blocked)
+
+        if len(chunks) == 1:
+            return self._to_result(*self._chat(self._messages(text), stop))
+        workers = min(settings.llm_chunk_concurrency, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, [c for _, c in chunks]))
+        return _merge_verdicts(text, chunks, results)
+
+    async def analyze_verdict_async(
+        self, text: str, block_score: int
+    ) -> AnalysisResult:
+        """Async analyze_verdict."""
+        self._require_available()
+        self._check_breaker()
+        chunks = self._chunks(text)
+        blocked = threading.Event()
+        stop = _stop_at(block_score, blocked)
+        if len(chunks) == 1:
+            return self._to_result(*await self._chat_async(self._messages(text), stop))
+
+        per_input = asyncio.Semaphore(settings.llm_chunk_concurrency)
+
+        async def run(chunk: str) -> Optional[AnalysisResult]:
+            async with per_input:
+                if blocked.is_set():
+                    return None
+                reply, backend = await self._chat_async(self._messages(chunk), stop)
+            return _verdict_result(self, reply, backend, blocked)
+
+        results = await asyncio.gather(*(run(c) for _, c in chunks))
+        return _merge_verdicts(text, chunks, results)
+
+    def _analyze_checked(self, text: str) -> AnalysisResult:
+        chunks = self._chunks(text)
+        if len(chunks) == 1:
+            return self._complete(text)
+
+        workers = min(settings.llm_chunk_concurrency, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            complete = bind_outcome(self._complete)
+            results = list(pool.map(complete, [c for _, c in chunks]))
+        return merge_chunk_results(text, chunks, results, results[0].metadata)
+
+    async def _analyze_checked_async(self, text: str) -> AnalysisResult:
+        chunks = self._chunks(text)
+        if len(chunks) == 1:
+            return await self._complete_async(text)
+
+        per_input = asyncio.Semaphore(settings.llm_chunk_concurrency)
+
+        async def complete(chunk: str) -> AnalysisResult:
+            async with per_input:
+                return await self._complete_async(chunk)
+
+        results = await asyncio.gather(*(complete(c) for _, c in chunks))
+        return merge_chunk_results(text, chunks, results, results[0].metadata)
+
+    async def _complete_many_async(self, texts: Sequence[str]) -> List[AnalysisResult]:
+        groups = self._pack(texts)
+        packed = await asyncio.gather(
+            *(self._complete_group_async([texts[i] for i in g]) for g in groups)
+        )
+        results: List[AnalysisResult] = [None] * len(texts)  # type: ignore[list-item]
+        for group, group_results in zip(groups, packed):
+            for i, res in zip(group, group_results):
+                results[i] = res
+        return results
+
+    # --- Packing: several short texts, one completion -----------------------
+
+    @staticmethod
+    def _packable(text: str) -> bool:
+        return (
+            settings.llm_pack_max_items > 1
+            and len(text) <= settings.llm_pack_item_max_chars
+        )
+
+    def _pack(self, texts: Sequence[str]) -> List[List[int]]:
+        """Group indexes of `texts`; long texts get a group of their own."""
+        groups: List[List[int]] = []
+        current: List[int] = []
+        size = 0
+        for i, text in enumerate(texts):
+            if not self._packable(text):
+                groups.append([i])
+                continue
+            if current and (
+                len(current) >= settings.llm_pack_max_items
+                or size + len(text) > settings.llm_pack_max_chars
+            ):
+                groups.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += len(text)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _complete_group(self, texts: List[str]) -> List[AnalysisResult]:
+        if len(texts) == 1:
+            return [self._analyze_checked(texts[0])]
+        reply, backend = self._chat(self._packed_messages(texts))
+        # Items the model got wrong are retried on their own
+        return [
+            res if res is not None else self._complete(text)
+            for text, res in zip(texts, self._split_packed(reply, texts, backend))
+        ]
+
+    async def _complete_group_async(self, texts: List[str]) -> List[AnalysisResult]:
+        if len(texts) == 1:
+            return [await self._analyze_checked_async(texts[0])]
+        reply, backend = await self._chat_async(self._packed_messages(texts))
+        split = self._split_packed(reply, texts, backend)
+        return list(
+            await asyncio.gather(
+                *(
+                    _ready(res) if res is not None else self._complete_async(text)
+                    for text, res in zip(texts, split)
+                )
+            )
+        )
+
+    @staticmethod
+    def _packed_messages(texts: List[str]) -> List[Dict[str, str]]:
+        items = [{"id": str(i), "text": text} for i, text in enumerate(texts)]
+        return [
+            {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps({"items": items})},
+        ]
+
+    def _split_packed(
+        self, reply: JSONObjectStream, texts: List[str], backend: Backend
+    ) -> List[Optional[AnalysisResult]]:
+        """Per-item results of a packed completion (None where unusable)."""
+        entries = (reply.value or {}).get("results")
+        by_id: Dict[str, Dict[str, Any]] = {}
+        if isinstance(entries, list):
+            for entry in entries:
+                if isinstance(entry, dict) and "score" in entry:
+                    by_id.setdefault(str(entry.get("id")), entry)
+
+        results: List[Optional[AnalysisResult]] = []
+        for i in range(len(texts)):
+            entry = by_id.get(str(i))
+            try:
+                res = self._result_from_data(entry, backend) if entry else None
+            except (TypeError, ValueError):
+                res = None
+            if res is not None:
+                res.metadata["llm_packed"] = str(len(texts))
+            results.append(res)
+        return results
+
+    # --- One completion, with failover and the circuit breaker ----------------
+
+    def _complete(self, text: str) -> AnalysisResult:
+        return self._to_result(*self._chat(self._messages(text)))
+
+    async def _complete_async(self, text: str) -> AnalysisResult:
+        return self._to_result(*await self._chat_async(self._messages(text)))
+
+    def _chat(
+        self, messages: List[Dict[str, str]], stop: Optional[StopCheck] = None
+    ) -> Tuple[JSONObjectStream, Backend]:
+        """
+        One completion, parsed as it arrives when streaming (S2S_LLM_STREAM or
+        a `stop` check, which can end generation early).
+        """
+        started = self.breaker.started()
+        tried: List[Backend] = []
+        stream = settings.llm_stream or stop is not None
+        while True:
+            reply = JSONObjectStream()
+            try:
+                with self.pool.lease(tried) as backend:
+                    resp = backend.client.chat.completions.create(
+                        **self._request(messages, backend.model, stream)
+                    )
+                    if stream:
+                        self._read_stream(resp, reply, stop)
+                    else:
+                        reply.feed(resp.choices[0].message.content or "")
+                break
+            except Exception as e:
+                if self.pool.fail_over(e, tried):
+                    continue
+                self._record_error(e, started)
+                raise
+        self.breaker.record_success(started)
+        return reply, backend
+
+    async def _chat_async(
+        self, messages: List[Dict[str, str]], stop: Optional[StopCheck] = None
+    ) -> Tuple[JSONObjectStream, Backend]:
+        started = self.breaker.started()
+        tried: List[Backend] = []
+        stream = settings.llm_stream or stop is not None
+        try:
+            async with self._inflight:
+                while True:
+                    reply = JSONObjectStream()
+                    try:
+                        with self.pool.lease(tried) as backend:
+                            resp = await backend.aclient.chat.completions.create(
+                                **self._request(messages, backend.model, stream)
+                            )
+                            if stream:
+                                await self._read_stream_async(resp, reply, stop)
+                            else:
+                                reply.feed(resp.choices[0].message.content or "")
+                        break
+                    except Exception as e:
+                        if not self.pool.fail_over(e, tried):
+                            raise
+        except Exception as e:
+            self._record_error(e, started)
+            raise
+        except BaseException:
+            # Cancelled (deadline or discarded speculation): no verdict
+            self.breaker.abandon()
+            raise
+        self.breaker.record_success(started)
+        return reply, backend
+
+    @staticmethod
+    def _read_stream(
+        stream: Any, reply: JSONObjectStream, stop: Optional[StopCheck]
+    ) -> None:
+        try:
+            for event in stream:
+                if event.choices:
+                    reply.feed(event.choices[0].delta.content or "")
+                if reply.done or (stop is not None and stop(reply)):
+                    break
+        finally:
+            # Closing the connection makes the server stop generating
+            stream.close()
+
+    @staticmethod
+    async def _read_stream_async(
+        stream: Any, reply: JSONObjectStream, stop: Optional[StopCheck]
+    ) -> None:
+        try:
+            async for event in stream:
+                if event.choices:
+                    reply.feed(event.choices[0].delta.content or "")
+                if reply.done or (stop is not None and stop(reply)):
+                    break
+        finally:
+            await stream.close()
+
+    def _record_error(self, error: Exception, started: float) -> None:
+        # A 4xx answer means the endpoint is up; the request itself was bad
+        if isinstance(error, openai.APIStatusError) and error.status_code < 500:
+            self.breaker.record_success(started)
+        else:
+            self.breaker.record_failure()
+
+    def _check_breaker(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                "LLM endpoint is failing; not calling it for another "
+                f"{self.breaker.retry_in():.0f}s.\n"
+                "Use --provider local or --provider auto meanwhile."
+            )
+
+    @staticmethod
+    def _chunks(text: str) -> List[Tuple[int, str]]:
+        return split_chunks(
+            text,
+            settings.llm_chunk_tokens * CHARS_PER_TOKEN,
+            settings.llm_chunk_overlap_tokens * CHARS_PER_TOKEN,
+        )
+
+    def _require_available(self) -> None:
         if not self.is_available:
             raise RuntimeError(
-                "LLM analyzer not configured. Set S2S_LLM_BASE_URL and S2S_LLM_MODEL."
+                "LLM analyzer not configured. Set S2S_LLM_BASE_URL and S2S_LLM_MODEL "
+                "(or S2S_LLM_BACKENDS)."
             )
 
-        resp = self._client.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": text},
-            ],
-            temperature=0,
-            response_format={"type": "json_object"},
-        )
+    @staticmethod
+    def _messages(text: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ]
+
+    @staticmethod
+    def _request(
+        messages: List[Dict[str, str]], model: str, stream: bool = False
+    ) -> Dict[str, Any]:
+        request: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+        if stream:
+            request["stream"] = True
+        return request
 
-        content = resp.choices[0].message.content or ""
-        data = self._safe_parse_json(content)
+    def _to_result(self, reply: JSONObjectStream, backend: Backend) -> AnalysisResult:
+        if reply.done:
+            data = reply.value or {}
+        elif reply.score is not None:
+            # Stopped (or cut off) after the score: what has arrived so far
+            data = {**reply.fields, "detections": reply.detections}
+        else:
+            data = {}
 
         if not data or "score" not in data:
             raise RuntimeError(
                 "LLM returned an unparseable response (expected strict JSON). "
                 "Try again, switch model, or use --provider local."
             )
+        res = self._result_from_data(data, backend)
+        if not reply.done:
+            res.metadata["llm_partial"] = "true"
+        return res
 
+    def _result_from_data(
+        self, data: Dict[str, Any], backend: Backend
+    ) -> AnalysisResult:
         score = int(data.get("score", 0))
         reasons = self._to_list_of_str(data.get("reasons", []))
         suggested_rewrites = self._to_list_of_str(data.get("suggested_rewrites", []))
@@ -87,42 +485,11 @@ class OpenAICompatibleAnalyzer(BaseAnalyzer):
             suggested_rewrites=suggested_rewrites,
             metadata={
                 "provider": "llm",
-                "model": settings.llm_model or "",
-                "base_url": settings.llm_base_url or "",
+                "model": backend.model,
+                "base_url": backend.base_url,
             },
         )
 
-    @staticmethod
-    def _safe_parse_json(text: str) -> Dict[str, Any]:
-        """
-        Robust JSON extraction:
-        - Models sometimes wrap JSON in ```json fences or include extra text.
-        - We extract the first JSON object and parse it.
-        """
-        text = text.strip()
-
-        # If model returned a fenced block, prefer it
-        fenced = re.search(
-            r"```(?:json)?\s*(\{.*?\})\s*```", text, flags=re.DOTALL | re.IGNORECASE
-        )
-        if fenced:
-            candidate = fenced.group(1)
-            try:
-                return json.loads(candidate)
-            except Exception:
-                pass
-
-        # Otherwise, grab first {...} block
-        match = re.search(r"\{.*\}", text, flags=re.DOTALL)
-        if not match:
-            return {}
-
-        candidate = match.group(0)
-        try:
-            return json.loads(candidate)
-        except Exception:
-            return {}
-
     @staticmethod
     def _to_list_of_str(value: Any) -> List[str]:
         if isinstance(value, list):
@@ -130,3 +497,44 @@ class OpenAICompatibleAnalyzer(BaseAnalyzer):
         if value is None:
             return []
         return [str(value)]
+
+
+async def _ready(result: AnalysisResult) -> AnalysisResult:
+    return result
+
+
+def _stop_at(block_score: int, blocked: threading.Event) -> StopCheck:
+    """Stop check shared by the chunks of one input: stop all once one blocks."""
+
+    def stop(reply: JSONObjectStream) -> bool:
+        if reply.score is not None and reply.score >= block_score:
+            blocked.set()
+        return blocked.is_set()
+
+    return stop
+
+
+def _verdict_result(
+    analyzer: OpenAICompatibleAnalyzer,
+    reply: JSONObjectStream,
+    backend: Backend,
+    blocked: threading.Event,
+) -> Optional[AnalysisResult]:
+    # A chunk cut off by another chunk's block before its own score is dropped
+    if reply.score is None and blocked.is_set():
+        return None
+    return analyzer._to_result(reply, backend)
+
+
+def _merge_verdicts(
+    text: str,
+    chunks: List[Tuple[int, str]],
+    results: Sequence[Optional[AnalysisResult]],
+) -> AnalysisResult:
+    kept = [(c, r) for c, r in zip(chunks, results) if r is not None]
+    merged = merge_chunk_results(
+        text, [c for c, _ in kept], [r for _, r in kept], dict(kept[0][1].metadata)
+    )
+    if len(kept) < len(chunks):
+        merged.metadata["llm_partial"] = "true"
+    return merged
@@ -0,0 +1,60 @@
+"""
+Compact detector matches for the rule engine's hot loop.
+
+A log can produce tens of thousands of matches; building and validating a
+pydantic Detection for each one (and then bumping its score through pydantic
+attribute handling) dominated scan time. The engine works on slotted Match
+objects instead and converts them to Detection models only for the result
+(benchmarks/bench_matches.py).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List
+
+from ..models import Detection
+
+# Every field is set (each detection gets its own copy)
+_FIELDS_SET = frozenset(Detection.model_fields)
+
+
+class Match:
+    """One detector match: label, matched span, score and offsets."""
+
+    __slots__ = ("label", "span", "score", "start", "end")
+
+    def __init__(self, label: str, span: str, score: int, start: int, end: int):
+        self.label = label
+        self.span = span
+        self.score = score
+        self.start = start
+        self.end = end
+
+    def to_detection(self) -> Detection:
+        return to_detections((self,))[0]
+
+    def __repr__(self) -> str:
+        return (
+            f"Match({self.label!r}, {self.span!r}, {self.score}, "
+            f"{self.start}, {self.end})"
+        )
+
+
+def to_detections(matches: Iterable[Match]) -> List[Detection]:
+    """
+    Detection models for `matches`, built with model_construct (no validation):
+    the engine's values are valid, since PatternDetector checks its score and
+    group when it is built and boosts are capped at 100.
+    """
+    construct = Detection.model_construct
+    return [
+        construct(
+            set(_FIELDS_SET),
+            label=m.label,
+            span=m.span,
+            score=m.score,
+            start=m.start,
+            end=m.end,
+        )
+        for m in matches
+    ]
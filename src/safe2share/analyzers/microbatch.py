@@ -0,0 +1,68 @@
+"""
+Micro-batching for async callers: requests arriving within a few milliseconds
+of each other are collected and handed to one `flush` call, which can then pack
+them into a single LLM completion.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects submitted items for up to `max_wait` seconds (or until `max_items`
+    are pending) and resolves each submitter with its entry of `flush(items)`.
+    Items submitted from different event loops must not be pending together.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], Awaitable[List[R]]],
+        max_items: int,
+        max_wait: float,
+    ) -> None:
+        self._flush = flush
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references to running flushes (the loop keeps only weak ones)
+        self._running: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_items:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush_pending)
+        return await future
+
+    def _flush_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self._flush([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            # A submitter may have given up meanwhile (deadline)
+            if not future.done():
+                future.set_result(result)
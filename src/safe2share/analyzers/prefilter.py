@@ -0,0 +1,199 @@
+"""
+Literal prefilter for detector sets.
+
+Most detectors cannot match without a fixed piece of text: "@" for an email,
+"eyJ" for a JWT, "-----BEGIN" for a private key, one of a few keywords for a
+password field. Checking for those literals is a substring search, far cheaper
+than a regex pass, so a detector whose literals are all absent from a text is
+skipped instead of run. On typical clean prose this leaves only the detectors
+without a usable literal (PHONE, HIGH_ENTROPY).
+
+Literals are declared on the detector (``literals``) or extracted from its
+pattern: the best set of literals one of which every match must contain.
+The check may only err towards running a detector: case-insensitive detectors
+are checked against a case-folded copy of the text, which contains every
+literal the regex engine would match case-insensitively (and possibly more).
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+try:  # Python 3.11+ keeps the sre parser in a private module
+    from re import _constants as _sre
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - defensive, requires-python >= 3.11
+    _sre = None
+    _sre_parse = None
+
+# Characters the regex engine matches case-insensitively with an ASCII letter
+# but that str.casefold() does not map to it (it maps ſ and K on its own)
+_FOLD_EXTRA = str.maketrans({"İ": "i", "ı": "i"})
+
+
+def fold(text: str) -> str:
+    """Case-folded `text` for case-insensitive literal checks."""
+    if text.isascii():
+        return text.lower()
+    return text.translate(_FOLD_EXTRA).casefold()
+
+
+def _better(a: Optional[FrozenSet[str]], b: Optional[FrozenSet[str]]):
+    """The more selective of two literal sets (longest shortest literal, fewest)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    rank_a = (min(map(len, a)), -len(a))
+    rank_b = (min(map(len, b)), -len(b))
+    return b if rank_b > rank_a else a
+
+
+def _prefix(seq) -> str:
+    """Literal text every match of parsed `seq` starts with."""
+    chars: List[str] = []
+    for op, av in seq:
+        if op is not _sre.LITERAL:
+            break
+        chars.append(chr(av))
+    return "".join(chars)
+
+
+def _required(seq) -> Optional[FrozenSet[str]]:
+    """Best set of literals one of which every match of parsed `seq` contains."""
+    best: Optional[FrozenSet[str]] = None
+    run: List[str] = []
+    for op, av in seq:
+        if op is _sre.LITERAL:
+            run.append(chr(av))
+            continue
+        if op is _sre.BRANCH:
+            alternatives = [_required(alt) for alt in av[1]]
+            if all(alternatives):
+                best = _better(best, frozenset().union(*alternatives))
+            if run:
+                # The parser factors a common prefix out ("p" of password|pwd)
+                prefix = "".join(run)
+                best = _better(best, frozenset(prefix + _prefix(alt) for alt in av[1]))
+        if run:
+            best = _better(best, frozenset(["".join(run)]))
+            run = []
+        if op is _sre.SUBPATTERN:
+            _group, add_flags, del_flags, item = av
+            if not (add_flags or del_flags):
+                best = _better(best, _required(item))
+        elif op is _sre.ATOMIC_GROUP:
+            best = _better(best, _required(av))
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT, _sre.POSSESSIVE_REPEAT):
+            lo, _hi, item = av
+            if lo > 0:
+                best = _better(best, _required(item))
+        # Anything else (classes, anchors, lookarounds) just ends the literal run
+    if run:
+        best = _better(best, frozenset(["".join(run)]))
+    return best
+
+
+def required_literals(regex: re.Pattern) -> Tuple[str, ...]:
+    """
+    Literals one of which every match of `regex` contains, or () if there is
+    no such set (the detector then always runs).
+    """
+    if _sre_parse is None:
+        return ()
+    try:
+        found = _required(_sre_parse.parse(regex.pattern, regex.flags))
+    except Exception:
+        return ()
+    if not found:
+        return ()
+    return tuple(sorted(found))
+
+
+def _minimal(literals: Iterable[str]) -> Tuple[str, ...]:
+    """`literals` without those containing another one ("password" given "pass")."""
+    unique = sorted(set(literals), key=len)
+    kept: List[str] = []
+    for lit in unique:
+        if not any(k in lit for k in kept):
+            kept.append(lit)
+    return tuple(sorted(kept))
+
+
+class LiteralPrefilter:
+    """
+    Per-detector literal checks for a fixed detector set.
+
+    Detectors only need a compiled ``regex``; declared ``literals`` take
+    precedence over the extracted ones (``()`` declares that there are none).
+    """
+
+    def __init__(self, detectors: Sequence) -> None:
+        self.literals: List[Tuple[str, ...]] = []
+        self._ignore_case: List[bool] = []
+        self._bytes_patterns: List[Optional[re.Pattern]] = []
+        for det in detectors:
+            declared = getattr(det, "literals", None)
+            literals = (
+                required_literals(det.regex) if declared is None else tuple(declared)
+            )
+            ignore_case = bool(det.regex.flags & re.IGNORECASE)
+            pattern = None
+            if isinstance(det.regex.pattern, bytes):
+                # Bytes patterns only fold ASCII case: other literals do not gate
+                if not all(lit.isascii() for lit in literals):
+                    literals = ()
+                elif literals:
+                    pattern = re.compile(
+                        "|".join(map(re.escape, literals)).encode(), det.regex.flags
+                    )
+            elif ignore_case:
+                literals = tuple(fold(lit) for lit in literals)
+            self.literals.append(_minimal(literals))
+            self._ignore_case.append(ignore_case)
+            self._bytes_patterns.append(pattern)
+        self._gated = tuple(i for i, lits in enumerate(self.literals) if lits)
+
+    def absent(self, text: str | bytes, pos: int = 0) -> FrozenSet[int]:
+        """Indexes of the detectors whose literals do not occur in `text`."""
+        if not self._gated:
+            return frozenset()
+        skip: List[int] = []
+        if isinstance(text, str):
+            folded = None
+            for i in self._gated:
+                if self._ignore_case[i]:
+                    if folded is None:
+                        folded = fold(text)
+                    haystack = folded
+                else:
+                    haystack = text
+                if not any(lit in haystack for lit in self.literals[i]):
+                    skip.append(i)
+        else:
+            # Bytes buffers (mmap) are not copied: one literal search each
+            for i in self._gated:
+                pattern = self._bytes_patterns[i]
+                if pattern is not None and pattern.search(text, pos) is None:
+                    skip.append(i)
+        return frozenset(skip)
+
+
+@lru_cache(maxsize=32)
+def _bytes_any(literals: tuple) -> re.Pattern:
+    return re.compile(
+        "|".join(re.escape(lit) for lit in literals if lit.isascii()).encode(),
+        re.IGNORECASE,
+    )
+
+
+def contains_any(text: str | bytes, literals: Sequence[str]) -> bool:
+    """Whether `text` may contain one of `literals`, ignoring case."""
+    if isinstance(text, str):
+        folded = fold(text)
+        return any(fold(lit) in folded for lit in literals)
+    if not any(lit.isascii() for lit in literals):
+        return False
+    return _bytes_any(tuple(literals)).search(text) is not None
@@ -0,0 +1,70 @@
+"""
+Regex engines the local rules can scan with (S2S_REGEX_BACKEND).
+
+"re" is the standard library engine. It backtracks, but the scanner drives the
+detector shapes that would make it quadratic (a long run of a repeated class,
+as in EMAIL or JWT) so that each run is tried once; the worst cases of the
+built-in detectors are checked by benchmarks/bench_adversarial.py.
+
+"re2" uses RE2 (``pip install google-re2``), which matches any pattern in
+linear time. Detectors RE2 cannot compile (lookarounds, backreferences) keep
+the standard engine. Note that \\d, \\s and \\w only match ASCII under RE2.
+
+"auto" is "re2" when it is installed, else "re".
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+try:  # Optional linear-time engine (google-re2 or pyre2, both import as re2)
+    import re2 as _re2
+except ImportError:  # pragma: no cover - depends on the environment
+    _re2 = None
+
+BACKENDS = ("re", "re2", "auto")
+
+# Inline equivalents of the flags detectors are compiled with
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+
+def re2_available() -> bool:
+    return _re2 is not None
+
+
+def resolve_backend(name: str) -> str:
+    """The engine `name` stands for ("auto" resolved), checking it is usable."""
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown regex backend {name!r} (expected one of {', '.join(BACKENDS)})."
+        )
+    if name == "auto":
+        return "re2" if _re2 is not None else "re"
+    if name == "re2" and _re2 is None:
+        raise RuntimeError(
+            "S2S_REGEX_BACKEND=re2 requires RE2: pip install google-re2 "
+            "(or use S2S_REGEX_BACKEND=auto to fall back to re)."
+        )
+    return name
+
+
+def compile_with(regex: re.Pattern, backend: str) -> Optional[object]:
+    """
+    `regex` compiled by `backend` (a resolved name), or None if that engine
+    cannot compile it. The result has ``finditer(text, pos)`` and match objects
+    with ``span``/``group``, like a compiled ``re`` pattern.
+    """
+    if backend == "re":
+        return regex
+    inline = "".join(letter for flag, letter in _INLINE_FLAGS if regex.flags & flag)
+    prefix = f"(?{inline})" if inline else ""
+    pattern = regex.pattern
+    if isinstance(pattern, bytes):
+        pattern = prefix.encode() + pattern
+    else:
+        pattern = prefix + pattern
+    try:
+        return _re2.compile(pattern)
+    except Exception:
+        return None
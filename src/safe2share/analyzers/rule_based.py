@@ -1,38 +1,80 @@
+import copy
+import hashlib
+import json
+import mmap
 import re
-from typing import List
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 from ..models import AnalysisResult, Detection, map_score_to_risk
-from .base import BaseAnalyzer
+from .base import BaseAnalyzer, run_local
+from .entropy import randomness
+from .keywords import KeywordHits, compile_keywords
+from .matches import Match, to_detections
+from .prefilter import contains_any
+from .scanner import compile_scanner
+from .stream import DEFAULT_WINDOW, StreamScan
 
 
 class PatternDetector:
-    def __init__(self, label: str, regex: str, base_score: int, redact_group: int = 0):
+    def __init__(
+        self,
+        label: str,
+        regex: str,
+        base_score: int,
+        redact_group: int = 0,
+        literals: Optional[Sequence[str]] = None,
+    ):
         self.label = label
         self.regex = re.compile(regex, re.IGNORECASE | re.MULTILINE)
+        if not 0 <= redact_group <= self.regex.groups:
+            raise ValueError(
+                f"{label}: redact_group {redact_group} out of range "
+                f"(pattern has {self.regex.groups} groups)."
+            )
+        if not 0 <= base_score <= 100:
+            raise ValueError(f"{label}: base_score {base_score} is not within 0-100.")
         self.base_score = base_score
+        # Group holding the sensitive span (0: the whole match)
         self.redact_group = redact_group
+        # Text one of which every match contains; the detector is skipped when
+        # none occurs (None: extracted from the regex, (): always run)
+        self.literals = None if literals is None else tuple(literals)
+        self._decode = False
+
+    def as_bytes(self) -> "PatternDetector":
+        """Same detector compiled for bytes buffers (ASCII classes, raw bytes)."""
+        det = copy.copy(self)
+        det.regex = re.compile(
+            self.regex.pattern.encode(), re.IGNORECASE | re.MULTILINE
+        )
+        det._decode = True
+        return det
 
     def find(self, text: str) -> List[Detection]:
-        results: List[Detection] = []
-        for m in self.regex.finditer(text):
-            # Choose which part of the match is the sensitive span
-            try:
-                span = m.group(self.redact_group)
-                start, end = m.span(self.redact_group)
-            except IndexError:
-                span = m.group(0)
-                start, end = m.span(0)
-
-            results.append(
-                Detection(
-                    label=self.label,
-                    span=span,
-                    score=self.base_score,
-                    start=start,
-                    end=end,
-                )
-            )
-        return results
+        return to_detections(self.to_match(m) for m in self.regex.finditer(text))
+
+    def to_detection(self, m: re.Match) -> Detection:
+        return self.to_match(m).to_detection()
+
+    def to_match(self, m: re.Match) -> Match:
+        group = self.redact_group
+        if m.start(group) < 0:
+            # An optional redact group that took no part in this match
+            group = 0
+        start, end = m.span(group)
+        span = m.group(group)
+        if self._decode:
+            # Bytes mode: only the matched span is decoded
+            span = span.decode("utf-8", errors="replace")
+        return Match(self.label, span, self.base_score, start, end)
+
+
+@lru_cache(maxsize=32)
+def bytes_detectors(detectors: tuple) -> tuple:
+    """Bytes-pattern versions of `detectors` (built once per detector set)."""
+    return tuple(d.as_bytes() for d in detectors)
 
 
 class RuleBasedAnalyzer(BaseAnalyzer):
@@ -94,57 +136,201 @@ class RuleBasedAnalyzer(BaseAnalyzer):
         "jwt",
     )
 
+    # HIGH_ENTROPY candidates less random than this (entropy over the most
+    # their length and alphabet allow, see entropy.randomness) are dropped;
+    # the others score base_score up to base_score + HIGH_ENTROPY_MAX_BONUS
+    HIGH_ENTROPY_MIN_RANDOMNESS = 0.8
+    HIGH_ENTROPY_MAX_BONUS = 20
+
     @property
     def is_available(self) -> bool:
         # Local deterministic analyzer is always available
         return True
 
-    def analyze(self, text: str) -> AnalysisResult:
-        detections: List[Detection] = []
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        """Every keyword the analyzer looks up (boosters + entropy hint words)."""
+        return tuple(self.KEYWORD_BOOSTERS) + tuple(self.HIGH_ENTROPY_HINT_WORDS)
+
+    def scan_keywords(self, text: str) -> KeywordHits:
+        return compile_keywords(self.keywords).scan(text)
+
+    def detector_stats(self) -> List[Dict[str, object]]:
+        """How often each detector ran or was skipped by the literal prefilter."""
+        return compile_scanner(tuple(self.DETECTORS)).stats()
 
-        # 1) Run all detectors
-        for detector in self.DETECTORS:
-            detections.extend(detector.find(text))
+    def fingerprint(self) -> str:
+        """Stable hash of the rule set; changes whenever a detector or keyword does."""
+        rules = {
+            "analyzer": "rule_engine_v3",
+            "detectors": [
+                [d.label, d.regex.pattern, d.regex.flags, d.base_score, d.redact_group]
+                for d in self.DETECTORS
+            ],
+            "boosters": sorted(self.KEYWORD_BOOSTERS.items()),
+            "entropy_hints": list(self.HIGH_ENTROPY_HINT_WORDS),
+            "entropy_scoring": [
+                self.HIGH_ENTROPY_MIN_RANDOMNESS,
+                self.HIGH_ENTROPY_MAX_BONUS,
+            ],
+        }
+        return hashlib.sha256(json.dumps(rules).encode()).hexdigest()
+
+    def analyze(self, text: str, hits: Optional[KeywordHits] = None) -> AnalysisResult:
+        """
+        `hits` may be passed by a caller that already scanned `text` with an index
+        covering `self.keywords` (e.g. AUTO), so the text is not scanned twice.
+        """
+        # 1) Run all detectors (one combined pass over the text)
+        scanner = compile_scanner(tuple(self.DETECTORS))
+        skip = self._entropy_skip(text, hits)
+        detections = [det.to_match(m) for det, m in scanner.iter_matches(text, 0, skip)]
 
         # Early return if nothing matched
         if not detections:
-            return AnalysisResult(
-                risk="PUBLIC",
-                score=0,
-                reasons=["No sensitive patterns found"],
-                detections=[],
-                suggested_rewrites=[],
-                metadata={"analyzer": "rule_engine_v3"},
-            )
+            return self._public_result({"analyzer": "rule_engine_v3"})
+
+        if hits is None:
+            hits = self.scan_keywords(text)
+
+        return self._build_result(
+            detections, hits, text, metadata={"analyzer": "rule_engine_v3"}
+        )
+
+    async def analyze_async(self, text: str) -> AnalysisResult:
+        """analyze on the local executor (see base.local_executor)."""
+        return await run_local(self.analyze, text)
+
+    def analyze_stream(
+        self,
+        chunks: Iterable[str],
+        window: int = DEFAULT_WINDOW,
+        overlap: Optional[int] = None,
+    ) -> AnalysisResult:
+        """
+        Analyze text arriving as chunks (e.g. a file read piece by piece) in
+        bounded memory. Detection offsets are global; no rewrite is suggested,
+        since that would need the whole text in memory.
+        """
+        stream = StreamScan(self.DETECTORS, self.keywords, window, overlap)
+        detections = list(stream.run(chunks))
+        metadata = {
+            "analyzer": "rule_engine_v3",
+            "streamed": "true",
+            "chars": str(stream.chars),
+        }
+
+        if not detections:
+            return self._public_result(metadata)
 
-        lower = text.lower()
+        return self._build_result(detections, stream.hits, None, metadata)
 
+    def analyze_bytes(self, data) -> AnalysisResult:
+        """
+        Analyze a bytes-like buffer (bytes, mmap, ...) without decoding it.
+        Detectors run as byte patterns, so any encoding can be scanned; offsets
+        are byte offsets and only matched spans are decoded (UTF-8, replacing
+        invalid sequences). No rewrite is suggested.
+        """
+        scanner = compile_scanner(bytes_detectors(tuple(self.DETECTORS)))
+        skip = self._entropy_skip(data)
+        detections = [det.to_match(m) for det, m in scanner.iter_matches(data, 0, skip)]
+        metadata = {
+            "analyzer": "rule_engine_v3",
+            "offsets": "bytes",
+            "bytes": str(len(data)),
+        }
+
+        if not detections:
+            return self._public_result(metadata)
+
+        hits = self.scan_keywords(data)
+        return self._build_result(detections, hits, None, metadata)
+
+    def analyze_file(self, path: str | Path) -> AnalysisResult:
+        """Memory-map `path` and analyze it in bytes mode (see analyze_bytes)."""
+        with open(path, "rb") as fh:
+            if fh.seek(0, 2) == 0:
+                # mmap cannot map empty files
+                return self.analyze_bytes(b"")
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return self.analyze_bytes(buf)
+
+    def _entropy_skip(
+        self, text: str | bytes, hits: Optional[KeywordHits] = None
+    ) -> Tuple[int, ...]:
+        """
+        Indexes of the HIGH_ENTROPY detectors if no hint word occurs in `text`:
+        their matches would be dropped by _build_result, so a whole text without
+        one is not searched for them.
+        """
+        if hits is not None:
+            hinted = hits.any(self.HIGH_ENTROPY_HINT_WORDS)
+        else:
+            hinted = contains_any(text, self.HIGH_ENTROPY_HINT_WORDS)
+        if hinted:
+            return ()
+        return tuple(
+            i for i, d in enumerate(self.DETECTORS) if d.label == "HIGH_ENTROPY"
+        )
+
+    def _score_entropy(self, detections: List[Match]) -> List[Match]:
+        """
+        Score every HIGH_ENTROPY candidate by its randomness, in one batch:
+        repetitive runs, paths and the like are dropped, random-looking ones
+        score more the closer they are to uniform.
+        """
+        spans = [d.span for d in detections if d.label == "HIGH_ENTROPY"]
+        if not spans:
+            return detections
+        floor = self.HIGH_ENTROPY_MIN_RANDOMNESS
+        scale = self.HIGH_ENTROPY_MAX_BONUS / (1 - floor)
+        ratios = iter(randomness(spans))
+        kept = []
+        for det in detections:
+            if det.label == "HIGH_ENTROPY":
+                ratio = next(ratios)
+                if ratio < floor:
+                    continue
+                det.score = min(100, det.score + round((ratio - floor) * scale))
+            kept.append(det)
+        return kept
+
+    @staticmethod
+    def _public_result(metadata: Dict[str, str]) -> AnalysisResult:
+        return AnalysisResult(
+            risk="PUBLIC",
+            score=0,
+            reasons=["No sensitive patterns found"],
+            detections=[],
+            suggested_rewrites=[],
+            metadata=metadata,
+        )
+
+    def _build_result(
+        self,
+        detections: List[Match],
+        hits: KeywordHits,
+        text: Optional[str],
+        metadata: Dict[str, str],
+    ) -> AnalysisResult:
         # 2) False-positive guard for HIGH_ENTROPY:
         # Keep HIGH_ENTROPY only if hint words exist somewhere in the text.
-        has_entropy_hints = any(w in lower for w in self.HIGH_ENTROPY_HINT_WORDS)
-        filtered: List[Detection] = []
-        for d in detections:
-            if d.label == "HIGH_ENTROPY" and not has_entropy_hints:
-                continue
-            filtered.append(d)
-        detections = filtered
+        has_entropy_hints = hits.any(self.HIGH_ENTROPY_HINT_WORDS)
+        if not has_entropy_hints:
+            detections = [d for d in detections if d.label != "HIGH_ENTROPY"]
+        else:
+            detections = self._score_entropy(detections)
 
         # If filtering removed everything, treat as safe
         if not detections:
-            return AnalysisResult(
-                risk="PUBLIC",
-                score=0,
-                reasons=["No sensitive patterns found"],
-                detections=[],
-                suggested_rewrites=[],
-                metadata={"analyzer": "rule_engine_v3"},
-            )
+            return self._public_result(metadata)
 
-        # 3) Keyword boosters (contextual bump)
-        for det in detections:
-            for kw, boost in self.KEYWORD_BOOSTERS.items():
-                if kw in lower:
-                    det.score = min(100, det.score + boost)
+        # 3) Keyword boosters (contextual bump), summed once for the whole text
+        boost = sum(b for kw, b in self.KEYWORD_BOOSTERS.items() if kw in hits)
+        if boost:
+            for det in detections:
+                det.score = min(100, det.score + boost)
 
         # 4) Aggregate score (max + mild stacking)
         max_score = max(d.score for d in detections)
@@ -155,6 +341,17 @@ class RuleBasedAnalyzer(BaseAnalyzer):
 
         reasons = [f"Detected {d.label}: '{d.span[:40]}...'" for d in detections]
 
+        if text is None:
+            # Streamed input: the full text is not available to rewrite
+            return AnalysisResult(
+                risk=risk,
+                score=final_score,
+                reasons=reasons,
+                detections=to_detections(detections),
+                suggested_rewrites=[],
+                metadata=metadata,
+            )
+
         # 5) Rewrite using offsets (safer than global replace)
         spans = sorted(
             [d for d in detections if d.start is not None and d.end is not None],
@@ -183,7 +380,7 @@ class RuleBasedAnalyzer(BaseAnalyzer):
             risk=risk,
             score=final_score,
             reasons=reasons,
-            detections=detections,
+            detections=to_detections(detections),
             suggested_rewrites=[redacted],
-            metadata={"analyzer": "rule_engine_v3"},
+            metadata=metadata,
         )
@@ -0,0 +1,525 @@
+"""
+Single-pass scanning engine for PatternDetector sets.
+
+Instead of running one ``finditer`` pass per detector, detectors are merged into
+a single alternation ("locator") that walks the text once and stops only at
+positions where at least one detector can match. Detectors are grouped by the
+set of characters they can start with, behind one union check, so the regex
+engine rejects most positions with a single character-class test instead of
+trying every detector.
+
+Detectors that can start on almost any letter (EMAIL, HIGH_ENTROPY, word runs)
+cannot be rejected that way: merging them would only add dispatch overhead, so
+they keep their own pass.
+
+Before any regex runs, a literal prefilter (prefilter.py) skips the detectors
+whose required literals are absent from the text; per-detector run and skip
+counts are kept (``stats``).
+
+Detectors shaped like EMAIL or JWT (a literal prefix, then an unbounded run of
+one character class) make a backtracking engine quadratic on long runs, since
+a failed attempt is retried at every position of the run. They get their own
+pass that tries each run once (``run_shape``), or run on RE2 when that backend
+is selected (regex_backend.py).
+
+Results are identical to running every detector's own ``finditer``: detectors
+may overlap each other, and each detector keeps its own non-overlapping cursor.
+Detectors compiled from bytes patterns scan bytes-like buffers (e.g. ``mmap``).
+"""
+
+from __future__ import annotations
+
+import re
+import string
+import threading
+from functools import lru_cache
+from typing import Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from .prefilter import LiteralPrefilter
+from .regex_backend import compile_with, resolve_backend
+
+try:  # Python 3.11+ keeps the sre parser in a private module
+    from re import _constants as _sre
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - defensive, requires-python >= 3.11
+    _sre = None
+    _sre_parse = None
+
+_CATEGORY_ESCAPES = (
+    {
+        _sre.CATEGORY_DIGIT: r"\d",
+        _sre.CATEGORY_NOT_DIGIT: r"\D",
+        _sre.CATEGORY_SPACE: r"\s",
+        _sre.CATEGORY_NOT_SPACE: r"\S",
+        _sre.CATEGORY_WORD: r"\w",
+        _sre.CATEGORY_NOT_WORD: r"\W",
+    }
+    if _sre
+    else {}
+)
+
+# Start classes matching more than this many ASCII letters are "broad"
+_BROAD_LETTERS = 12
+_DISPATCH_FANOUT = 4
+# Detectors blocked for longer than this are dropped from the locator
+_LONG_BLOCK = 64
+
+
+def _char_fragment(op, av) -> Optional[str]:
+    """Rebuild a single-character regex fragment from a parsed sre item."""
+    if op is _sre.LITERAL:
+        return re.escape(chr(av))
+    if op is _sre.NOT_LITERAL:
+        return f"[^{re.escape(chr(av))}]"
+    if op is _sre.IN:
+        parts: List[str] = []
+        for item_op, item_av in av:
+            if item_op is _sre.NEGATE:
+                parts.insert(0, "^")
+            elif item_op is _sre.LITERAL:
+                parts.append(re.escape(chr(item_av)))
+            elif item_op is _sre.RANGE:
+                lo, hi = item_av
+                parts.append(f"{re.escape(chr(lo))}-{re.escape(chr(hi))}")
+            elif item_op is _sre.CATEGORY and item_av in _CATEGORY_ESCAPES:
+                parts.append(_CATEGORY_ESCAPES[item_av])
+            else:
+                return None
+        return f"[{''.join(parts)}]"
+    return None
+
+
+def _first(seq) -> Optional[Tuple[set, bool]]:
+    """
+    Compute the characters a parsed pattern can start with.
+
+    Returns (fragments, nullable) where fragments is a set of single-character
+    regex fragments and nullable tells whether the sequence can match empty.
+    Returns None when the start set cannot be determined safely.
+    """
+    frags: set = set()
+    for op, av in seq:
+        if op is _sre.AT:
+            # Anchors (\b, ^, $) are zero-width
+            continue
+        if op in (_sre.LITERAL, _sre.NOT_LITERAL, _sre.IN):
+            frag = _char_fragment(op, av)
+            if frag is None:
+                return None
+            frags.add(frag)
+            return frags, False
+        if op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT, _sre.POSSESSIVE_REPEAT):
+            lo, _hi, item = av
+            sub = _first(item)
+            if sub is None:
+                return None
+            frags |= sub[0]
+            if lo > 0 and not sub[1]:
+                return frags, False
+            continue
+        if op in (_sre.SUBPATTERN, _sre.ATOMIC_GROUP):
+            if op is _sre.SUBPATTERN:
+                _group, add_flags, del_flags, item = av
+                if add_flags or del_flags:
+                    return None
+            else:
+                item = av
+            sub = _first(item)
+            if sub is None:
+                return None
+            frags |= sub[0]
+            if not sub[1]:
+                return frags, False
+            continue
+        if op is _sre.BRANCH:
+            nullable = False
+            for alt in av[1]:
+                sub = _first(alt)
+                if sub is None:
+                    return None
+                frags |= sub[0]
+                nullable = nullable or sub[1]
+            if not nullable:
+                return frags, False
+            continue
+        # Lookarounds, backreferences, '.', conditionals: give up
+        return None
+    return frags, True
+
+
+def first_char_class(regex: re.Pattern) -> Optional[str]:
+    """
+    Return a regex fragment matching every character `regex` can start with,
+    or None if it cannot be determined (the detector is then always tried).
+    """
+    if _sre_parse is None:
+        return None
+    try:
+        parsed = _sre_parse.parse(regex.pattern, regex.flags)
+        res = _first(parsed)
+    except Exception:
+        return None
+    if res is None or res[1] or not res[0]:
+        return None
+    return "|".join(sorted(res[0]))
+
+
+def max_match_width(regex: re.Pattern) -> Optional[int]:
+    """Longest match `regex` can produce, or None if unbounded or unknown."""
+    if _sre_parse is None:
+        return None
+    try:
+        _lo, hi = _sre_parse.parse(regex.pattern, regex.flags).getwidth()
+    except Exception:
+        return None
+    return None if hi >= _sre.MAXREPEAT else hi
+
+
+def _source(regex: re.Pattern) -> str:
+    """Pattern text of `regex`; bytes patterns are mapped 1:1 through latin-1."""
+    pattern = regex.pattern
+    return pattern.decode("latin-1") if isinstance(pattern, bytes) else pattern
+
+
+def _compile_like(regex: re.Pattern, pattern: str) -> re.Pattern:
+    """Compile `pattern` (as returned by _source) like `regex`: type and flags."""
+    if isinstance(regex.pattern, bytes):
+        return re.compile(pattern.encode("latin-1"), regex.flags)
+    return re.compile(pattern, regex.flags)
+
+
+def run_shape(regex: re.Pattern) -> Optional[Tuple[str, str]]:
+    """
+    (prefix, class) if `regex` is a literal prefix, then an unbounded repeat of
+    one character class that holds every prefix character, then anything
+    (EMAIL: "" and [A-Za-z0-9._%+-]; JWT: "eyJ" and [A-Za-z0-9_-]); else None.
+
+    If an attempt at such a pattern fails where the prefix occurs, every later
+    attempt inside the same run of class characters fails too: it could only
+    match a shorter run followed by the same rest. So one attempt per run
+    finds the same matches as trying every position.
+    """
+    if _sre_parse is None:
+        return None
+    try:
+        items = list(_sre_parse.parse(regex.pattern, regex.flags))
+    except Exception:
+        return None
+    prefix: List[str] = []
+    while items and items[0][0] is _sre.LITERAL:
+        prefix.append(chr(items.pop(0)[1]))
+    if not items or items[0][0] not in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+        return None
+    lo, hi, item = items[0][1]
+    if lo < 1 or hi != _sre.MAXREPEAT or len(item) != 1:
+        return None
+    cls = _char_fragment(*item[0])
+    if cls is None:
+        return None
+    members = _compile_like(regex, cls)
+    for ch in prefix:
+        probe = ch.encode("latin-1") if isinstance(regex.pattern, bytes) else ch
+        if not members.fullmatch(probe):
+            return None
+    return "".join(prefix), cls
+
+
+class _RunFinder:
+    """``finditer`` of a run-shaped detector trying each run once (run_shape)."""
+
+    def __init__(self, regex: re.Pattern, prefix: str, cls: str) -> None:
+        source = _source(regex)
+        # Up to the first prefix of the run, without retrying later ones
+        lead = f"(?>{cls}*?(?={re.escape(prefix)}))" if prefix else ""
+        self.regex = regex
+        # First candidate in the rest of the run `pos` is in
+        self._head = _compile_like(regex, f"{lead}(?=(?:{source}))")
+        # First candidate of each later run
+        self._runs = _compile_like(regex, f"(?<!{cls}){lead}(?=(?:{source}))")
+
+    def finditer(self, text: str | bytes, pos: int = 0) -> Iterator[re.Match]:
+        while True:
+            m = self._head.match(text, pos) or self._runs.search(text, pos)
+            if m is None:
+                return
+            # The lookahead matched here, so the detector does too
+            found = self.regex.match(text, m.end())
+            yield found
+            pos = found.end()
+
+
+def _dispatch_tree(leaves: List[Tuple[str, str]]) -> str:
+    """
+    Nest (start_class, pattern) leaves under lookaheads of their combined start
+    classes, so a position is rejected after a handful of checks rather than
+    one check per leaf.
+    """
+    if len(leaves) <= _DISPATCH_FANOUT:
+        return "|".join(pattern for _, pattern in leaves)
+    size = -(-len(leaves) // _DISPATCH_FANOUT)
+    branches = []
+    for i in range(0, len(leaves), size):
+        chunk = leaves[i : i + size]
+        union = "|".join(key for key, _ in chunk)
+        branches.append(f"(?={union})(?:{_dispatch_tree(chunk)})")
+    return "|".join(branches)
+
+
+class CompiledScanner:
+    """
+    Runs a fixed set of detectors over a text with as few regex passes as possible.
+
+    Detectors only need a compiled ``regex`` attribute. Detectors with a narrow,
+    known start class share one merged pass; the others (broad start class,
+    different flags, run-shaped, or patterns that cannot be merged, e.g.
+    duplicate named groups) each keep their own pass. With the "re2" backend,
+    every detector RE2 can compile runs on it in its own pass.
+    """
+
+    def __init__(self, detectors: Sequence, backend: str = "re") -> None:
+        self.detectors = tuple(detectors)
+        self.backend = backend
+        # What finds each detector's matches outside the merged pass
+        self._finders = [self._finder(d.regex) for d in self.detectors]
+        self._keys = [first_char_class(d.regex) for d in self.detectors]
+        flags = {d.regex.flags for d in self.detectors}
+        self._flags = flags.pop() if len(flags) == 1 else 0
+        self._bytes = bool(self.detectors) and all(
+            isinstance(d.regex.pattern, bytes) for d in self.detectors
+        )
+
+        self._key_patterns = {
+            key: self._compile(f"(?:{key})")
+            for key in set(self._keys)
+            if key is not None
+        }
+        self._locators: Dict[frozenset, Optional[re.Pattern]] = {}
+        self._by_char: Dict[str, Tuple[int, ...]] = {}
+
+        merged: Tuple[int, ...] = ()
+        if len(flags) <= 1:
+            merged = tuple(
+                i
+                for i, key in enumerate(self._keys)
+                if key is not None
+                and not self._is_broad(key)
+                and self._finders[i] is self.detectors[i].regex
+            )
+        self.merged = merged
+        if len(self.merged) < 2 or self._locator(frozenset()) is None:
+            self.merged = ()
+        self.separate = tuple(
+            i for i in range(len(self.detectors)) if i not in self.merged
+        )
+
+        self.prefilter = LiteralPrefilter(self.detectors)
+        self._runs = [0] * len(self.detectors)
+        self._skips = [0] * len(self.detectors)
+        self._stats_lock = threading.Lock()
+
+    def _finder(self, regex: re.Pattern):
+        if self.backend != "re":
+            engine = compile_with(regex, self.backend)
+            if engine is not None:
+                return engine
+        shape = run_shape(regex)
+        if shape is not None:
+            try:
+                return _RunFinder(regex, *shape)
+            except re.error:
+                pass
+        return regex
+
+    def _compile(self, pattern: str) -> re.Pattern:
+        if self._bytes:
+            return re.compile(pattern.encode("latin-1"), self._flags)
+        return re.compile(pattern, self._flags)
+
+    def _is_broad(self, key: str) -> bool:
+        pattern = self._key_patterns[key]
+        letters = string.ascii_letters.encode() if self._bytes else string.ascii_letters
+        hits = sum(1 for i in range(len(letters)) if pattern.match(letters, i, i + 1))
+        return hits > _BROAD_LETTERS
+
+    def _locator(self, blocked: frozenset) -> Optional[re.Pattern]:
+        """Merged pattern of every merged detector not in `blocked` (cached)."""
+        if blocked in self._locators:
+            return self._locators[blocked]
+
+        groups: Dict[str, List[str]] = {}
+        for i in self.merged:
+            if i not in blocked:
+                pattern = _source(self.detectors[i].regex)
+                groups.setdefault(self._keys[i], []).append(f"(?:{pattern})")
+
+        locator = None
+        if groups:
+            leaves = [
+                (key, f"(?={key})(?:{'|'.join(patterns)})")
+                for key, patterns in sorted(groups.items())
+            ]
+            union = "|".join(key for key, _ in leaves)
+            try:
+                locator = self._compile(f"(?={union})(?:{_dispatch_tree(leaves)})")
+            except re.error:
+                locator = None
+        self._locators[blocked] = locator
+        return locator
+
+    def _candidates(self, char: str | bytes) -> Tuple[int, ...]:
+        """Indexes of merged detectors that can start a match with `char`."""
+        cached = self._by_char.get(char)
+        if cached is None:
+            cached = tuple(
+                i
+                for i in self.merged
+                if char and self._key_patterns[self._keys[i]].match(char)
+            )
+            self._by_char[char] = cached
+        return cached
+
+    def scan(
+        self, text: str | bytes, pos: int = 0, skip: Collection[int] = ()
+    ) -> List[List[re.Match]]:
+        """
+        Return the matches of every detector, indexed like `detectors`.
+
+        Like ``finditer(text, pos)``, scanning starts at `pos` but anchors such as
+        ``\\b`` still see the characters before it. Detectors whose literals are
+        absent, and those in `skip` (indexes), are not run and report no matches.
+        """
+        skipped = self.prefilter.absent(text, pos).union(skip)
+        self._count(skipped)
+
+        found: List[List[re.Match]] = [[] for _ in self.detectors]
+        for i in self.separate:
+            if i not in skipped:
+                found[i].extend(self._finders[i].finditer(text, pos))
+        if self.merged and not skipped.issuperset(self.merged):
+            self._scan_merged(text, found, pos, skipped)
+        return found
+
+    def stats(self) -> List[Dict[str, object]]:
+        """
+        Per detector: label, regex engine, prefilter literals, and scans run and
+        skipped.
+        """
+        with self._stats_lock:
+            return [
+                {
+                    "label": getattr(det, "label", str(i)),
+                    "engine": self._engine(i),
+                    "literals": list(self.prefilter.literals[i]),
+                    "runs": self._runs[i],
+                    "skips": self._skips[i],
+                }
+                for i, det in enumerate(self.detectors)
+            ]
+
+    def _engine(self, i: int) -> str:
+        finder = self._finders[i]
+        if finder is self.detectors[i].regex:
+            return "re"
+        return "re_runs" if isinstance(finder, _RunFinder) else self.backend
+
+    def _count(self, skipped: Collection[int]) -> None:
+        with self._stats_lock:
+            for i in range(len(self.detectors)):
+                if i in skipped:
+                    self._skips[i] += 1
+                else:
+                    self._runs[i] += 1
+
+    def _scan_merged(
+        self,
+        text: str | bytes,
+        found: List[List[re.Match]],
+        pos: int = 0,
+        skipped: Collection[int] = (),
+    ) -> None:
+        """
+        Emulate one finditer per merged detector with a shared locator pass.
+
+        Each detector is blocked until the end of its last match (finditer never
+        returns overlapping matches). While a detector is blocked far ahead (a
+        long digit run matched by PHONE matches again at every suffix), the scan
+        uses a locator without it, so the run is not re-matched at each position.
+        Skipped detectors stay blocked past the end of the text.
+        """
+        n = len(text)
+        # detector index -> position where it may match again
+        blocked: Dict[int, int] = dict.fromkeys(
+            (i for i in self.merged if i in skipped), n + _LONG_BLOCK + 1
+        )
+        # locator key -> (searched_from, next_candidate), so no region is searched
+        # twice by the same locator
+        horizon: Dict[frozenset, Tuple[int, int]] = {}
+        full = self._locator(frozenset())
+        full_from = full_cand = -1
+
+        while pos < n:
+            far = None
+            if blocked:
+                for i in [i for i, until in blocked.items() if until <= pos]:
+                    del blocked[i]
+                far = [i for i, until in blocked.items() if until > pos + _LONG_BLOCK]
+
+            if far:
+                key = frozenset(far)
+                known = horizon.get(key)
+                if known is not None and known[0] <= pos <= known[1]:
+                    cand = known[1]
+                elif len(key) == len(self.merged):
+                    cand = n
+                else:
+                    m = self._locator(key).search(text, pos)
+                    cand = m.start() if m else n
+                    horizon[key] = (pos, cand)
+
+                wake = min(blocked[i] for i in key) - _LONG_BLOCK
+                if cand >= wake:
+                    # A dropped detector must rejoin before the next candidate
+                    pos = wake
+                    continue
+            elif full_from <= pos <= full_cand:
+                cand = full_cand
+            else:
+                m = full.search(text, pos)
+                cand = m.start() if m else n
+                full_from, full_cand = pos, cand
+
+            if cand >= n:
+                break
+
+            for i in self._candidates(text[cand : cand + 1]):
+                if blocked.get(i, 0) > cand:
+                    continue
+                m = self.detectors[i].regex.match(text, cand)
+                if m is not None:
+                    found[i].append(m)
+                    blocked[i] = m.end()
+            pos = cand + 1
+
+    def iter_matches(
+        self, text: str | bytes, pos: int = 0, skip: Collection[int] = ()
+    ) -> Iterator[Tuple[object, re.Match]]:
+        """Yield (detector, match) pairs, grouped by detector order."""
+        for det, matches in zip(self.detectors, self.scan(text, pos, skip)):
+            for m in matches:
+                yield det, m
+
+
+def compile_scanner(detectors: tuple, backend: Optional[str] = None) -> CompiledScanner:
+    """
+    Build (once per detector set and backend) the scanner for `detectors`;
+    `backend` defaults to S2S_REGEX_BACKEND.
+    """
+    return _compile_scanner(
+        detectors, resolve_backend(backend or settings.regex_backend)
+    )
+
+
+@lru_cache(maxsize=32)
+def _compile_scanner(detectors: tuple, backend: str) -> CompiledScanner:
+    return CompiledScanner(detectors, backend)
@@ -0,0 +1,135 @@
+"""
+Windowed scanning of inputs too large to hold in memory.
+
+Text arrives as an iterable of chunks and is scanned in bounded windows. Matches
+starting before a cut point `overlap` characters from the end of the window are
+committed; the next window resumes at the cut, and each detector resumes after
+its own last match, exactly like one ``finditer`` per detector. A match can only
+be missed or altered if it (or a failed attempt at it) is longer than `overlap`,
+and memory stays bounded by ``window + overlap`` characters plus the findings
+themselves.
+
+Detections are reported with global offsets. Keywords are reported by first
+occurrence only, so their bookkeeping stays constant whatever the input size.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .keywords import KeywordHits, compile_keywords
+from .matches import Match
+from .scanner import compile_scanner, max_match_width
+
+DEFAULT_WINDOW = 1 << 20
+# Cap used for detectors with unbounded repeats (``+``, ``{20,}``)
+DEFAULT_OVERLAP = 1 << 16
+# Characters kept before the scan position so anchors like \b see their context
+_CONTEXT = 64
+
+
+def stream_overlap(detectors: Sequence, keywords: Iterable[str] = ()) -> int:
+    """Overlap needed so that no match of `detectors` or `keywords` is lost."""
+    widths = [len(kw) for kw in keywords]
+    for det in detectors:
+        width = max_match_width(det.regex)
+        widths.append(DEFAULT_OVERLAP if width is None else width)
+    return max(widths, default=0) + 1
+
+
+class StreamScan:
+    """
+    One streaming pass of `detectors` and `keywords` over a chunked text.
+
+    ``run`` yields detections as windows are committed; ``hits`` (the keywords
+    found, each with its first global offset) and ``chars`` are complete once
+    it is exhausted.
+    """
+
+    def __init__(
+        self,
+        detectors: Sequence,
+        keywords: Iterable[str] = (),
+        window: int = DEFAULT_WINDOW,
+        overlap: Optional[int] = None,
+    ) -> None:
+        self.detectors = tuple(detectors)
+        self.keywords = tuple(keywords)
+        self.window = window
+        self.overlap = (
+            stream_overlap(self.detectors, self.keywords)
+            if overlap is None
+            else overlap
+        )
+        if self.window <= 0 or self.overlap <= 0:
+            raise ValueError("window and overlap must be positive")
+
+        self.chars = 0
+        self.hits = KeywordHits({})
+        # Keyword -> first global offset (one entry per keyword, not per hit)
+        self._first: Dict[str, int] = {}
+        # Per detector: global offset where its next match may start
+        self._floors = [0] * len(self.detectors)
+
+    def run(self, chunks: Iterable[str]) -> Iterator[Match]:
+        scanner = compile_scanner(self.detectors)
+        index = compile_keywords(self.keywords)
+
+        pending: List[str] = []
+        pending_len = 0
+        buf = ""
+        base = 0  # global offset of buf[0]
+        pos = 0  # scan start in buf; buf[:pos] is left context only
+
+        for piece in self._pieces(chunks):
+            pending.append(piece)
+            pending_len += len(piece)
+            if len(buf) - pos + pending_len >= self.window + self.overlap:
+                buf += "".join(pending)
+                pending, pending_len = [], 0
+
+                cut = yield from self._commit(scanner, index, buf, base, pos)
+                keep = max(0, cut - _CONTEXT)
+                buf = buf[keep:]
+                base += keep
+                pos = cut - keep
+
+        buf += "".join(pending)
+        yield from self._commit(scanner, index, buf, base, pos, final=True)
+        self.hits = KeywordHits({kw: [p] for kw, p in self._first.items()})
+
+    def _pieces(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Split chunks so a single huge chunk never lands in the buffer whole."""
+        for chunk in chunks:
+            self.chars += len(chunk)
+            for i in range(0, len(chunk), self.window):
+                yield chunk[i : i + self.window]
+
+    def _commit(self, scanner, index, buf, base, pos, final=False):
+        """Emit what is final in buf[pos:]; return the local cut to resume from."""
+        found = scanner.scan(buf, pos)
+        cut = len(buf) if final else len(buf) - self.overlap
+
+        for i, (det, matches) in enumerate(zip(self.detectors, found)):
+            floor = self._floors[i] - base
+            if matches and matches[0].start() < floor:
+                # This detector's last match ran past the previous cut: resume it
+                # where its own finditer would
+                matches = list(det.regex.finditer(buf, floor))
+            for m in matches:
+                if m.start() >= cut:
+                    break
+                self._floors[i] = base + m.end()
+                d = det.to_match(m)
+                d.start += base
+                d.end += base
+                yield d
+
+        # Keywords are shorter than the overlap, so any starting before the cut
+        # is complete in this window
+        window_hits = index.scan(buf[pos:])
+        for kw in window_hits.found - self._first.keys():
+            first = window_hits.positions(kw)[0] + pos
+            if first < cut:
+                self._first[kw] = base + first
+        return cut
@@ -0,0 +1,164 @@
+"""
+Incremental parsing of the JSON object in a streamed LLM reply.
+
+The reply is fed piece by piece. Text before the object (prose, a ```json
+fence) is skipped and discarded; the object ends at its matching brace, so
+anything after it is ignored. While it streams, top-level fields are exposed as
+soon as their value is complete, and the elements of the `detections` list as
+soon as each one closes, e.g. to stop generation once the score is known.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = " \t\r\n"
+
+
+class JSONObjectStream:
+    """Feed it reply text with feed(); read fields, detections and value."""
+
+    def __init__(self) -> None:
+        # Text from the opening brace of the current object on (or unscanned text)
+        self._buf = ""
+        self._pos = 0
+        self._open = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start = -1
+        self._key: Optional[str] = None
+        self._value_start = -1
+        self._item_start = -1
+
+        self.fields: Dict[str, Any] = {}
+        self.detections: List[Dict[str, Any]] = []
+        # The whole object, once closed and parsed
+        self.value: Optional[Dict[str, Any]] = None
+
+    @property
+    def done(self) -> bool:
+        return self.value is not None
+
+    @property
+    def score(self) -> Optional[int]:
+        try:
+            return int(self.fields["score"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def feed(self, text: str) -> None:
+        if self.done or not text:
+            return
+        self._buf += text
+        while not self.done and self._scan():
+            pass
+
+    def _scan(self) -> bool:
+        """Scan the buffer; True if it must be rescanned (object was not JSON)."""
+        if not self._open:
+            brace = self._buf.find("{", self._pos)
+            if brace == -1:
+                self._buf, self._pos = "", 0
+                return False
+            self._buf, self._pos = self._buf[brace:], 0
+            self._open = True
+
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+        while i < n:
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start != -1:
+                        self._key = _loads(buf[self._key_start : i + 1])
+                        self._key_start = -1
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._key_start = i
+                    self._expect_key = False
+                elif self._depth == 1 and self._value_start == -1:
+                    self._value_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 2 and self._value_start == -1:
+                    self._value_start = i
+                elif self._depth == 3 and ch == "{" and self._key == "detections":
+                    self._item_start = i
+                elif self._depth == 1:
+                    self._expect_key = True
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._item_start != -1:
+                    item = _loads(buf[self._item_start : i + 1])
+                    if isinstance(item, dict):
+                        self.detections.append(item)
+                    self._item_start = -1
+                elif self._depth == 0:
+                    self._end_field(buf, i)
+                    value = _loads(buf[: i + 1])
+                    if isinstance(value, dict):
+                        self.value = value
+                        return False
+                    # A brace in prose, not the reply object: look further on
+                    self._restart()
+                    return True
+            elif self._depth == 1:
+                if ch == ",":
+                    self._end_field(buf, i)
+                    self._expect_key = True
+                elif ch == ":":
+                    self._value_start = -1
+                elif self._value_start == -1 and ch not in _WHITESPACE:
+                    self._value_start = i
+            i += 1
+
+        self._pos = i
+        return False
+
+    def _end_field(self, buf: str, end: int) -> None:
+        if self._key is not None and self._value_start != -1:
+            value = _loads(buf[self._value_start : end].strip())
+            if value is not _INVALID:
+                self.fields[self._key] = value
+        self._key = None
+        self._value_start = -1
+
+    def _restart(self) -> None:
+        self._buf, self._pos = self._buf[1:], 0
+        self._open = False
+        self._depth = 0
+        self._in_string = self._escape = self._expect_key = False
+        self._key_start = self._value_start = self._item_start = -1
+        self._key = None
+        self.fields = {}
+        self.detections = []
+
+
+_INVALID = object()
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _INVALID
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """The first JSON object in `text` (fenced or wrapped in prose), or {}."""
+    parser = JSONObjectStream()
+    parser.feed(text)
+    return parser.value or {}
@@ -1,15 +1,40 @@
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Union
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import BaseModel
 
-from .models import AnalysisResult, AnalyzeRequest
-from .service import Safe2ShareService
+from .admission import QueueFullError
+from .analyzers.breaker import CircuitOpenError
+from .analyzers.rule_based import RuleBasedAnalyzer
+from .compact import shape_result
+from .config import settings
+from .models import (
+    AnalysisResult,
+    AnalyzeRequest,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    CompactAnalysisResult,
+)
+from .service import ServiceRegistry, analyze_batch_async
 
-app = FastAPI(title="Safe2Share")
+# Analyzers (and the LLM HTTP connection pool) shared by all requests
+services = ServiceRegistry()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    services.warm()
+    yield
+    await services.aclose()
+
+
+app = FastAPI(title="Safe2Share", lifespan=lifespan)
 
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
@@ -19,6 +44,23 @@ MAX_TEXT_CHARS = 200_000
 logger = logging.getLogger(__name__)
 
 
+class ModelJSONResponse(Response):
+    """
+    JSON response rendered straight from a pydantic model by model_dump_json.
+
+    Returning the model itself makes FastAPI re-validate it against the
+    response_model before serializing (older releases also go through
+    jsonable_encoder and json.dumps), which for results with many detections
+    costs as much as the scan (benchmarks/bench_serialization.py).
+    response_model is still declared for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.model_dump_json().encode("utf-8")
+
+
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -29,20 +71,98 @@ def health() -> dict:
     return {"status": "ok"}
 
 
-@app.post("/analyze", response_model=AnalysisResult)
-def analyze(req: AnalyzeRequest) -> AnalysisResult:
+@app.get("/cache/stats")
+def cache_stats() -> dict:
+    """Hit/miss counters of the LLM/AUTO result cache."""
+    cache = services.cache
+    return {"enabled": cache is not None, **(cache.stats() if cache else {})}
+
+
+@app.get("/coalescing/stats")
+def coalescing_stats() -> dict:
+    """Unique vs coalesced (deduplicated) concurrent analyses."""
+    return {"enabled": settings.coalesce_requests, **services.flights.stats()}
+
+
+@app.get("/admission/stats")
+def admission_stats() -> dict:
+    """Active and queued LLM/AUTO analyses, admitted and rejected counts."""
+    admission = services.admission
+    return {
+        "enabled": admission is not None,
+        **(admission.stats() if admission else {}),
+    }
+
+
+@app.get("/prefilter/stats")
+def prefilter_stats() -> dict:
+    """Per local detector: its prefilter literals, and scans run and skipped."""
+    return {"detectors": RuleBasedAnalyzer().detector_stats()}
+
+
+@app.get("/llm/breaker")
+def llm_breaker() -> dict:
+    """Circuit breaker state of the LLM endpoint (closed, open or half_open)."""
+    return {"breaker": services.llm_breaker()}
+
+
+@app.get("/llm/backends")
+def llm_backends() -> dict:
+    """Health, in-flight requests, errors and latency of each LLM backend."""
+    return {"backends": services.llm_backends()}
+
+
+@app.post("/analyze", response_model=Union[AnalysisResult, CompactAnalysisResult])
+async def analyze(req: AnalyzeRequest) -> ModelJSONResponse:
     try:
         if len(req.text) > MAX_TEXT_CHARS:
             raise HTTPException(
                 status_code=413,
                 detail=f"Text too large ({len(req.text)} chars). Limit is {MAX_TEXT_CHARS}.",
             )
-        svc = Safe2ShareService(provider=req.provider)
-        return svc.analyze(req.text)
+        result = await services.get(req.provider).analyze_async(req.text)
+        return ModelJSONResponse(shape_result(result, req.compact, req.include_rewrite))
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise _too_many_requests(e)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
         logger.exception("Unhandled error in /analyze")
         raise HTTPException(status_code=500, detail="Internal error")
+
+
+@app.post("/analyze/batch", response_model=BatchAnalyzeResponse)
+async def analyze_batch_endpoint(req: BatchAnalyzeRequest) -> ModelJSONResponse:
+    if len(req.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Too many items ({len(req.items)}). "
+                f"Limit is {settings.batch_max_items}."
+            ),
+        )
+    # Each LLM/AUTO item is admitted on its own; one not admitted is reported
+    # in its entry like any other failing item
+    try:
+        results = await analyze_batch_async(
+            req.items,
+            max_item_chars=settings.batch_max_item_chars,
+            concurrency=settings.batch_concurrency,
+            services=services,
+        )
+        return ModelJSONResponse(BatchAnalyzeResponse(results=results))
+    except Exception:
+        logger.exception("Unhandled error in /analyze/batch")
+        raise HTTPException(status_code=500, detail="Internal error")
+
+
+def _too_many_requests(e: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
@@ -5,12 +5,21 @@ import argparse
 import json
 import sys
 from pathlib import Path
+from typing import Iterator
 
+from . import dirscan, scancache
+from .compact import shape_result
 from .providers import Provider
 
 # from .logconfig import logger
 from .service import Safe2ShareService
 
+# Exit status of an input whose score reaches --block-at
+EXIT_BLOCKED = 3
+# Longest UTF-8 encoding of one character: a file of at most this many bytes
+# per --max-chars is read and its characters counted
+_UTF8_MAX_BYTES = 4
+
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
@@ -27,41 +36,247 @@ def build_parser() -> argparse.ArgumentParser:
         "--max-chars",
         type=int,
         default=200_000,
-        help="Max characters to analyze (default: 200000).",
+        help=(
+            "Max characters to analyze in memory (default: 200000). "
+            "Larger --file inputs are scanned in streaming mode."
+        ),
     )
     p.add_argument(
         "--provider", choices=[e.value for e in Provider], default=Provider.LOCAL.value
     )
+    p.add_argument(
+        "--mmap",
+        action="store_true",
+        help=(
+            "Memory-map --file and scan its raw bytes (any encoding, no decoding "
+            "copy; offsets are byte offsets, no rewrite)."
+        ),
+    )
+    p.add_argument(
+        "--block-at",
+        type=int,
+        metavar="SCORE",
+        help=(
+            f"Exit with status {EXIT_BLOCKED} if the score reaches SCORE. The LLM "
+            "stops generating as soon as it does, so the output may be partial."
+        ),
+    )
+    p.add_argument(
+        "--compact",
+        action="store_true",
+        help=(
+            "Group repeated detections by label and span (with counts and "
+            "first/last offsets) and cap the reasons."
+        ),
+    )
+    p.add_argument(
+        "--no-rewrite",
+        action="store_true",
+        help="Leave the suggested rewrite out of the output.",
+    )
     p.add_argument("--json", action="store_true", help="Output JSON")
+    p.add_argument(
+        "--json-compact",
+        action="store_true",
+        help="Output JSON on a single line, without indentation (implies --json).",
+    )
     return p
 
 
-def main() -> int:
-    args = build_parser().parse_args()
+def build_scan_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="safe2share scan",
+        description=(
+            "Scan every file under a directory with the local rules. Prints one "
+            "NDJSON record per file, then a summary record."
+        ),
+    )
+    p.add_argument("root", help="Directory to scan.")
+    p.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        help="Glob of files to scan (repeatable; default: all files).",
+    )
+    p.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        help="Glob of files/directories to skip (repeatable).",
+    )
+    p.add_argument(
+        "--no-default-excludes",
+        action="store_true",
+        help=f"Also scan {', '.join(dirscan.DEFAULT_EXCLUDES[:3])}, ... directories.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: number of cores).",
+    )
+    p.add_argument(
+        "--cache",
+        action="store_true",
+        help="Skip files unchanged since a previous cached sweep.",
+    )
+    p.add_argument(
+        "--cache-dir",
+        default=str(scancache.DEFAULT_CACHE_DIR),
+        help=f"Scan cache directory (default: {scancache.DEFAULT_CACHE_DIR}).",
+    )
+    return p
+
+
+STREAM_READ_CHARS = 1 << 16
+
+
+def iter_file_chunks(path: Path) -> Iterator[str]:
+    """Read a UTF-8 text file piece by piece, for inputs above --max-chars."""
+    with path.open(encoding="utf-8") as fh:
+        while chunk := fh.read(STREAM_READ_CHARS):
+            yield chunk
+
+
+def print_result(result, as_json: bool, indent: int | None = 2) -> None:
+    if as_json:
+        # model_dump_json serializes in pydantic's core, several times faster
+        # than model_dump + json.dumps on results with many detections
+        if hasattr(result, "model_dump_json"):
+            print(result.model_dump_json(indent=indent))
+        else:
+            print(json.dumps(result, indent=indent))
+    else:
+        # Minimal, readable output for MVP (we'll improve formatting later)
+        if hasattr(result, "risk") and hasattr(result, "score"):
+            print(f"Risk: {result.risk} | Score: {result.score}")
+            if getattr(result, "reasons", None):
+                print("Reasons:")
+                for r in result.reasons:
+                    print(f" - {r}")
+            if getattr(result, "detections", None):
+                print("Detections:")
+                for d in result.detections:
+                    count = getattr(d, "count", 1)
+                    times = f" x{count}" if count > 1 else ""
+                    print(f" - {d.label}: {d.span} ({d.score}){times}")
+            if getattr(result, "reasons_omitted", 0):
+                print(f"({result.reasons_omitted} more reasons omitted)")
+        else:
+            print(result)
+
+
+def report(result, args: argparse.Namespace, as_json: bool, indent: int | None) -> int:
+    """Print `result` and return the exit status (EXIT_BLOCKED at --block-at)."""
+    print_result(
+        shape_result(result, args.compact, not args.no_rewrite), as_json, indent
+    )
+    if args.block_at is not None and result.score >= args.block_at:
+        return EXIT_BLOCKED
+    return 0
+
+
+def scan_main(argv: list[str]) -> int:
+    args = build_scan_parser().parse_args(argv)
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"Directory not found: {root}", file=sys.stderr)
+        return 2
+
+    exclude = list(args.exclude)
+    if not args.no_default_excludes:
+        exclude += dirscan.DEFAULT_EXCLUDES
+
+    cache_path = Path(args.cache_dir) / scancache.CACHE_FILE if args.cache else None
+
+    def emit():
+        records = dirscan.scan_tree(
+            root, args.include, exclude, args.workers, cache_path=cache_path
+        )
+        for record in records:
+            print(json.dumps(record), flush=True)
+            yield record
+
+    summary = dirscan.summarize(emit())
+    print(json.dumps({"summary": summary}))
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "scan":
+        return scan_main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    as_json = args.json or args.json_compact
+    indent = None if args.json_compact else 2
 
     # Determine input source priority:
     # 1) --file
     # 2) positional text
     # 3) stdin
     text: str | None = None
+    stream_path: Path | None = None
+    mmap_path: Path | None = None
+
+    if args.mmap and not args.file:
+        print("--mmap requires --file.", file=sys.stderr)
+        return 2
 
     if args.file:
         path = Path(args.file)
         if not path.exists() or not path.is_file():
             print(f"File not found: {path}", file=sys.stderr)
             return 2
+        if args.mmap:
+            mmap_path = path
+        elif path.stat().st_size > _UTF8_MAX_BYTES * args.max_chars:
+            # More than --max-chars in any case: scan it in bounded windows
+            stream_path = path
+        else:
+            try:
+                text = path.read_text(encoding="utf-8")
+            except UnicodeDecodeError:
+                print(
+                    "File must be UTF-8 encoded text for MVP. Convert the file and retry, "
+                    "or scan its raw bytes with --mmap.",
+                    file=sys.stderr,
+                )
+                return 2
+            if len(text) > args.max_chars:
+                # Too large to analyze whole: stream it instead
+                text, stream_path = None, path
+    elif args.text:
+        text = args.text
+    else:
+        text = sys.stdin.read()
+
+    provider = Provider(args.provider)
+
+    if mmap_path is not None:
+        try:
+            service = Safe2ShareService(provider=provider)
+            result = service.analyze_file(mmap_path)
+        except RuntimeError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        return report(result, args, as_json, indent)
+
+    if stream_path is not None:
         try:
-            text = path.read_text(encoding="utf-8")
+            service = Safe2ShareService(provider=provider)
+            result = service.analyze_stream(iter_file_chunks(stream_path))
         except UnicodeDecodeError:
             print(
-                "File must be UTF-8 encoded text for MVP. Convert the file and retry.",
+                "File must be UTF-8 encoded text for MVP. Convert the file and retry, "
+                "or scan its raw bytes with --mmap.",
                 file=sys.stderr,
             )
             return 2
-    elif args.text:
-        text = args.text
-    else:
-        text = sys.stdin.read()
+        except RuntimeError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        return report(result, args, as_json, indent)
 
     text = (text or "").strip()
     if not text:
@@ -76,39 +291,18 @@ def main() -> int:
         )
         return 2
 
-    provider = Provider(args.provider)
-
     try:
         service = Safe2ShareService(provider=provider)
-        result = service.analyze(text)
+        if args.block_at is None:
+            result = service.analyze(text)
+        else:
+            result = service.verdict(text, args.block_at)
     except RuntimeError as e:
         # Clean, user-facing error (e.g., LLM not configured / not reachable)
         print(str(e), file=sys.stderr)
         return 1
 
-    if args.json:
-        print(
-            json.dumps(
-                result.model_dump() if hasattr(result, "model_dump") else result,
-                indent=2,
-            )
-        )
-    else:
-        # Minimal, readable output for MVP (we'll improve formatting later)
-        if hasattr(result, "risk") and hasattr(result, "score"):
-            print(f"Risk: {result.risk} | Score: {result.score}")
-            if getattr(result, "reasons", None):
-                print("Reasons:")
-                for r in result.reasons:
-                    print(f" - {r}")
-            if getattr(result, "detections", None):
-                print("Detections:")
-                for d in result.detections:
-                    print(f" - {d.label}: {d.span} ({d.score})")
-        else:
-            print(result)
-
-    return 0
+    return report(result, args, as_json, indent)
 
 
 if __name__ == "__main__":
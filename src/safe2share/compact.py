@@ -0,0 +1,84 @@
+"""
+Compact results for high-cardinality inputs.
+
+A log that repeats one email 50k times yields 50k detections and 50k reasons,
+all of which get serialized. A compact result groups detections by (label,
+span) with an occurrence count and the offsets of the first and last
+occurrence, keeps each distinct reason once (up to a cap), and can leave out
+the rewrite, which for such inputs is as large as the input itself.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .models import AnalysisResult, CompactAnalysisResult, DetectionGroup
+
+
+def compact_result(
+    result: AnalysisResult,
+    max_reasons: Optional[int] = None,
+    include_rewrite: bool = True,
+) -> CompactAnalysisResult:
+    """Group the detections of `result` and cap its reasons (S2S_COMPACT_MAX_REASONS)."""
+    if max_reasons is None:
+        max_reasons = settings.compact_max_reasons
+
+    # (label, span) -> [score, count, first_start, first_end, last_start, last_end]
+    groups: Dict[Tuple[str, str], List] = {}
+    for d in result.detections:
+        group = groups.get((d.label, d.span))
+        if group is None:
+            groups[(d.label, d.span)] = [d.score, 1, d.start, d.end, d.start, d.end]
+            continue
+        group[0] = max(group[0], d.score)
+        group[1] += 1
+        if d.start is None:
+            continue
+        if group[2] is None or d.start < group[2]:
+            group[2], group[3] = d.start, d.end
+        if group[4] is None or d.start > group[4]:
+            group[4], group[5] = d.start, d.end
+
+    reasons = list(dict.fromkeys(result.reasons))
+    return CompactAnalysisResult(
+        risk=result.risk,
+        score=result.score,
+        reasons=reasons[:max_reasons],
+        reasons_omitted=max(0, len(reasons) - max_reasons),
+        detections=[
+            DetectionGroup(
+                label=label,
+                span=span,
+                score=score,
+                count=count,
+                first_start=first_start,
+                first_end=first_end,
+                last_start=last_start,
+                last_end=last_end,
+            )
+            for (label, span), (
+                score,
+                count,
+                first_start,
+                first_end,
+                last_start,
+                last_end,
+            ) in groups.items()
+        ],
+        detection_count=len(result.detections),
+        suggested_rewrites=result.suggested_rewrites if include_rewrite else [],
+        metadata=result.metadata,
+    )
+
+
+def shape_result(
+    result: AnalysisResult, compact: bool = False, include_rewrite: bool = True
+) -> AnalysisResult | CompactAnalysisResult:
+    """The result in the form a caller asked for (AnalyzeRequest options)."""
+    if compact:
+        return compact_result(result, include_rewrite=include_rewrite)
+    if not include_rewrite and result.suggested_rewrites:
+        return result.model_copy(update={"suggested_rewrites": []})
+    return result
@@ -1,8 +1,21 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from .providers import Provider
 
 
+class LLMBackend(BaseModel):
+    """One OpenAI-compatible endpoint of a multi-backend setup."""
+
+    base_url: str
+    model: str
+    api_key: str | None = None
+    # Share of the load relative to the other backends
+    weight: float = Field(1.0, gt=0)
+
+
 class Settings(BaseSettings):
     """
     Central configuration for Safe2Share.
@@ -17,5 +30,99 @@ class Settings(BaseSettings):
     llm_api_key: str | None = None
     llm_model: str | None = None
 
+    # Several backends instead of llm_base_url/llm_model, as JSON, e.g.
+    # S2S_LLM_BACKENDS='[{"base_url": "http://a:11434/v1", "model": "llama3.1"}]'
+    llm_backends: List[LLMBackend] = []
+    # Seconds between health probes of the backends (0 disables probing)
+    llm_health_interval: float = 10.0
+
+    # HTTP connection pool shared by all LLM requests of a process
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 30.0
+    llm_timeout: float = 60.0
+    # In-flight async LLM requests per process (the async pool is sized to match)
+    llm_max_concurrency: int = 256
+    # Stream completions and parse them as they arrive (always on for verdicts)
+    llm_stream: bool = False
+
+    # Circuit breaker: stop calling the endpoint after this many consecutive
+    # failures, and probe it again after the cooldown (seconds)
+    llm_breaker_failures: int = 5
+    llm_breaker_cooldown: float = 30.0
+
+    # Long inputs are split into overlapping chunks (about 4 chars per token)
+    # that are classified concurrently and merged
+    llm_chunk_tokens: int = 2000
+    llm_chunk_overlap_tokens: int = 100
+    llm_chunk_concurrency: int = 4
+
+    # Short texts (up to llm_pack_item_max_chars) share one completion: at most
+    # this many items and chars per request (llm_pack_max_items<=1 disables it)
+    llm_pack_max_items: int = 16
+    llm_pack_max_chars: int = 8000
+    llm_pack_item_max_chars: int = 1000
+    # Async requests arriving within this many ms are packed together
+    # (0, the default, disables micro-batching)
+    llm_pack_wait_ms: float = 0.0
+
+    # AUTO escalation sends the LLM only this many chars around each local
+    # detection and hint (0, the default, sends the full text)
+    auto_context_radius: int = 0
+    # Start the LLM request while the local pass runs when a hint matches
+    # (off by default)
+    auto_speculative: bool = False
+    # Seconds AUTO waits for the LLM before answering with the local result
+    # (0 waits as long as the client timeout)
+    auto_llm_deadline: float = 15.0
+    # Threads for blocking AUTO LLM calls bounded by the deadline, shared by
+    # all AUTO analyzers
+    auto_llm_workers: int = 16
+
+    # Result cache for LLM/AUTO analyses (result_cache_entries=0 disables it)
+    result_cache_entries: int = 10_000
+    result_cache_bytes: int = 64 * 1024 * 1024
+    result_cache_ttl: float = 7 * 24 * 3600
+    # Optional SQLite file that keeps results across restarts
+    result_cache_path: str | None = None
+
+    # Identical concurrent analyses (same text, provider and configuration)
+    # run once and share the result
+    coalesce_requests: bool = True
+
+    # API admission control for LLM/AUTO analyses: at most max_active run at
+    # once and max_queued wait; more get 429 (admission_max_active=0 disables)
+    admission_max_active: int = 64
+    admission_max_queued: int = 256
+    # Queue order: a text of N chars waits as if it arrived
+    # N / admission_chars_per_second seconds later (small texts go first)
+    admission_chars_per_second: float = 10_000
+    # Threads running local-rule analyses of the async API, apart from the
+    # default executor, so LOCAL requests never queue behind LLM traffic
+    local_workers: int = 4
+    # Threads running the local passes of AUTO analyses, apart from LOCAL ones
+    auto_local_workers: int = 4
+
+    # Regex engine of the local rules: re (standard library), re2 (linear time,
+    # needs google-re2) or auto (re2 when installed)
+    regex_backend: Literal["re", "re2", "auto"] = "re"
+
+    # Distinct reasons kept in compact results (AnalyzeRequest.compact, --compact)
+    compact_max_reasons: int = 20
+
+    # POST /analyze/batch limits
+    batch_max_items: int = 100
+    batch_max_item_chars: int = 200_000
+    # Concurrent LLM/AUTO items per batch
+    batch_concurrency: int = 8
+
+    def llm_backend_list(self) -> List[LLMBackend]:
+        """Configured LLM backends (llm_backends, else llm_base_url/llm_model)."""
+        if self.llm_backends:
+            return list(self.llm_backends)
+        if self.llm_base_url and self.llm_model:
+            return [LLMBackend(base_url=self.llm_base_url, model=self.llm_model)]
+        return []
+
 
 settings = Settings()
@@ -0,0 +1,212 @@
+"""
+Directory / repository sweeps: walk a tree and run the local rule engine on every
+file across a process pool.
+
+Files are scanned in bytes mode (mmap, see RuleBasedAnalyzer.analyze_file), so
+any encoding works and nothing is decoded except matched spans. Each worker
+builds its analyzer and compiles the detectors once, in the pool initializer.
+Repeated sweeps can skip unchanged files through the scan cache (scancache.py).
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from .analyzers.rule_based import RuleBasedAnalyzer
+from .models import map_score_to_risk
+from .scancache import (
+    CacheReader,
+    ScanCache,
+    attach,
+    cache_fingerprint,
+    detach,
+    file_digest,
+    stat_key,
+)
+
+DEFAULT_EXCLUDES = (
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+)
+
+# Per-process worker, built once by the pool initializer
+_worker: Optional["_Worker"] = None
+
+
+def _matches(rel: str, patterns: Sequence[str]) -> bool:
+    """Match a posix relative path, or its last component, against globs."""
+    name = rel.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def iter_files(
+    root: Path,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = DEFAULT_EXCLUDES,
+) -> Iterator[Path]:
+    """
+    Yield regular files under `root` (sorted, deterministic order).
+
+    A file is kept if it matches any `include` glob (all files when empty) and no
+    `exclude` glob. Excluded directories are not descended into.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        base = Path(dirpath)
+        rel_dir = base.relative_to(root).as_posix()
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+
+        dirnames[:] = sorted(d for d in dirnames if not _matches(prefix + d, exclude))
+        for name in sorted(filenames):
+            rel = prefix + name
+            if exclude and _matches(rel, exclude):
+                continue
+            if include and not _matches(rel, include):
+                continue
+            path = base / name
+            if path.is_file() and not path.is_symlink():
+                yield path
+
+
+class _Worker:
+    """Analyzer (plus cache reader) of one process; detectors compile once here."""
+
+    def __init__(self, cache_path: Optional[Path] = None) -> None:
+        self.analyzer = RuleBasedAnalyzer()
+        # Compile the detectors and keyword index up front
+        self.analyzer.analyze_bytes(b"password: x")
+        self.cache = CacheReader(cache_path) if cache_path else None
+
+    def scan(self, path: Path, root: Optional[Path]) -> Dict[str, Any]:
+        rel = path.relative_to(root).as_posix() if root else str(path)
+        try:
+            result = self.analyzer.analyze_file(path)
+        except (OSError, ValueError) as e:
+            return {"path": rel, "error": str(e)}
+        return {"path": rel, **result.model_dump()}
+
+    def __call__(self, task) -> Tuple[Dict[str, Any], Optional[tuple]]:
+        """
+        Returns (record, cache entry to store). The entry is None when there is
+        nothing new to record (no cache, error, or unchanged file).
+        """
+        path, root = task
+        if self.cache is None:
+            return self.scan(path, root), None
+
+        rel = path.relative_to(root).as_posix() if root else str(path)
+        try:
+            key, size, mtime_ns = stat_key(path)
+            cached = self.cache.by_stat(key, size, mtime_ns)
+            result = None if cached is None else attach(cached, path)
+            if result is not None:
+                return {"path": rel, **result, "cached": True}, None
+            digest = file_digest(path)
+        except OSError as e:
+            return {"path": rel, "error": str(e)}, None
+
+        cached = self.cache.by_digest(digest)
+        result = None if cached is None else attach(cached, path)
+        if result is not None:
+            record = {"path": rel, **result, "cached": True}
+            return record, (key, size, mtime_ns, digest, None)
+
+        record = self.scan(path, root)
+        if "error" in record:
+            return record, None
+        result = {k: v for k, v in record.items() if k != "path"}
+        return record, (key, size, mtime_ns, digest, detach(result))
+
+
+def _init_worker(cache_path: Optional[Path]) -> None:
+    global _worker
+    _worker = _Worker(cache_path)
+
+
+def _scan_task(task) -> Tuple[Dict[str, Any], Optional[tuple]]:
+    return _worker(task)
+
+
+def scan_tree(
+    root: Path,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = DEFAULT_EXCLUDES,
+    workers: Optional[int] = None,
+    cache_path: Optional[Path] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per file under `root`, in walk order, as results arrive.
+    `workers` defaults to the number of cores; 1 scans in-process.
+
+    With `cache_path`, unchanged files are replayed from the persistent scan
+    cache (records carry ``"cached": true``) and new results are stored.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = ((path, root) for path in iter_files(root, include, exclude))
+
+    cache = None
+    if cache_path is not None:
+        # Opened before any reader so the schema exists and stale rules are purged
+        fingerprint = cache_fingerprint(RuleBasedAnalyzer().fingerprint())
+        cache = ScanCache(cache_path, fingerprint)
+
+    try:
+        if workers == 1:
+            results = map(_Worker(cache_path), tasks)
+            yield from _store(results, cache)
+        else:
+            with Pool(
+                processes=workers, initializer=_init_worker, initargs=(cache_path,)
+            ) as pool:
+                results = pool.imap(_scan_task, tasks, chunksize=16)
+                yield from _store(results, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _store(results, cache: Optional[ScanCache]) -> Iterator[Dict[str, Any]]:
+    for record, entry in results:
+        if cache is not None and entry is not None:
+            cache.store(*entry)
+        yield record
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summary of a sweep: file/error/cache-hit/per-risk counts and highest risk."""
+    files = errors = cached = 0
+    by_risk: Dict[str, int] = {}
+    max_score = 0
+    max_path: Optional[str] = None
+
+    for rec in records:
+        files += 1
+        if "error" in rec:
+            errors += 1
+            continue
+        cached += bool(rec.get("cached"))
+        by_risk[rec["risk"]] = by_risk.get(rec["risk"], 0) + 1
+        if rec["score"] > max_score:
+            max_score, max_path = rec["score"], rec["path"]
+
+    return {
+        "files": files,
+        "errors": errors,
+        "cached": cached,
+        "by_risk": by_risk,
+        "max_risk": map_score_to_risk(max_score),
+        "max_score": max_score,
+        "max_path": max_path,
+    }
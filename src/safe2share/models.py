@@ -1,4 +1,4 @@
-from typing import Dict, List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -63,8 +63,85 @@ class AnalysisResult(BaseModel):
     )
 
 
+class DetectionGroup(BaseModel):
+    """All detections of one span under one label (compact results)."""
+
+    label: str = Field(..., description="Detection category.")
+    span: str = Field(..., description="The detected text span.")
+    score: int = Field(
+        ..., ge=0, le=100, description="Highest score among the occurrences."
+    )
+    count: int = Field(..., ge=1, description="Number of occurrences.")
+    first_start: Optional[int] = Field(
+        None, ge=0, description="Start index of the first occurrence."
+    )
+    first_end: Optional[int] = Field(
+        None, ge=0, description="End index (exclusive) of the first occurrence."
+    )
+    last_start: Optional[int] = Field(
+        None, ge=0, description="Start index of the last occurrence."
+    )
+    last_end: Optional[int] = Field(
+        None, ge=0, description="End index (exclusive) of the last occurrence."
+    )
+
+
+class CompactAnalysisResult(BaseModel):
+    """AnalysisResult with repeated detections grouped and reasons capped."""
+
+    risk: RiskLevel = Field(..., description="Final risk classification.")
+    score: int = Field(..., ge=0, le=100, description="Overall risk score (0-100).")
+
+    reasons: List[str] = Field(
+        default_factory=list, description="Distinct explanations, capped."
+    )
+    reasons_omitted: int = Field(
+        0, ge=0, description="Distinct reasons left out by the cap."
+    )
+    detections: List[DetectionGroup] = Field(
+        default_factory=list, description="Detections grouped by label and span."
+    )
+    detection_count: int = Field(
+        0, ge=0, description="Number of detections before grouping."
+    )
+    suggested_rewrites: List[str] = Field(
+        default_factory=list, description="Safer rewritten variants."
+    )
+    metadata: Dict[str, str] = Field(
+        default_factory=dict,
+        description="Extra info (provider, model, analyzer, etc.).",
+    )
+
+
 class AnalyzeRequest(BaseModel):
     text: str = Field(..., min_length=1, description="Text to analyze.")
     provider: Provider = Field(
         default=Provider.LOCAL, description="Analysis provider (local|llm|auto)."
     )
+    compact: bool = Field(
+        default=False,
+        description="Group repeated detections and cap reasons (CompactAnalysisResult).",
+    )
+    include_rewrite: bool = Field(
+        default=True, description="Include the suggested rewrite in the result."
+    )
+
+
+class BatchAnalyzeRequest(BaseModel):
+    items: List[AnalyzeRequest] = Field(
+        ..., min_length=1, description="Texts to analyze, each with its provider."
+    )
+
+
+class BatchItemResult(BaseModel):
+    index: int = Field(..., ge=0, description="Position of the item in the request.")
+    result: Optional[Union[AnalysisResult, CompactAnalysisResult]] = Field(
+        None, description="Analysis result (absent if the item failed)."
+    )
+    error: Optional[str] = Field(None, description="Why this item failed.")
+
+
+class BatchAnalyzeResponse(BaseModel):
+    results: List[BatchItemResult] = Field(
+        default_factory=list, description="One entry per item, in request order."
+    )
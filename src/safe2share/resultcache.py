@@ -0,0 +1,275 @@
+"""
+Tiered cache of analysis results for the service layer.
+
+  memory  in-process LRU, bounded by entry count and by serialized size
+  disk    optional SQLite store shared across restarts, with a TTL
+
+Keys are a blake2b hash of the input text together with everything that can
+change the answer: provider, LLM model, system prompt and rule-set version.
+Values are the serialized AnalysisResult, so every hit returns a fresh copy the
+caller may modify.
+
+Results quote their input (detection spans, reasons, the rewrite), so the disk
+tier never stores them as they are: every string is kept as slices of the
+input (offsets) plus literals that share no 4-character run with it, and is
+rebuilt from the text on a hit. A row holds no text of the input, only its hash.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .models import AnalysisResult
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    created REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def result_key(text: str, *context: str) -> str:
+    """Cache key for `text` analyzed under `context` (provider, model, ...)."""
+    h = hashlib.blake2b(digest_size=32)
+    for part in context:
+        h.update(part.encode())
+        h.update(b"\0")
+    h.update(text.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+# Literals kept on disk share no run this long with the input
+_RUN = 4
+
+# A string as pieces: literals, or [start, end] slices of the input
+Pieces = List[Union[str, List[int]]]
+
+
+class TextRefs:
+    """Encodes strings as slices of `text` plus literals that do not quote it."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._runs: Optional[Dict[str, int]] = None
+
+    def encode(self, s: str) -> Pieces:
+        if self._runs is None:
+            # First position of every _RUN-char run of the text
+            text = self.text
+            self._runs = {
+                text[i : i + _RUN]: i for i in range(len(text) - _RUN, -1, -1)
+            }
+        pieces: Pieces = []
+        literal = 0  # start of the pending literal
+        j = 0
+        while j <= len(s) - _RUN:
+            i = self._runs.get(s[j : j + _RUN])
+            if i is None:
+                j += 1
+                continue
+            self._literal(pieces, s[literal:j])
+            k = _RUN + _common_prefix(s, j + _RUN, self.text, i + _RUN)
+            pieces.append([i, i + k])
+            j += k
+            literal = j
+        self._literal(pieces, s[literal:])
+        return pieces
+
+    def decode(self, pieces: Pieces) -> str:
+        text = self.text
+        return "".join(p if isinstance(p, str) else text[p[0] : p[1]] for p in pieces)
+
+    def _literal(self, pieces: Pieces, literal: str) -> None:
+        if not literal:
+            return
+        # Short literals (under _RUN chars) may still occur in the text
+        at = self.text.find(literal)
+        pieces.append([at, at + len(literal)] if at >= 0 else literal)
+
+
+def _common_prefix(a: str, i: int, b: str, j: int) -> int:
+    """Length of the common prefix of a[i:] and b[j:] (galloping comparison)."""
+    k, step = 0, 64
+    limit = min(len(a) - i, len(b) - j)
+    while step:
+        if k + step <= limit and a[i + k : i + k + step] == b[j + k : j + k + step]:
+            k += step
+            step *= 2
+        else:
+            step //= 2
+    return k
+
+
+def detach(result: AnalysisResult, text: str) -> str:
+    """`result` serialized without any text of its input (see TextRefs)."""
+    refs = TextRefs(text)
+    data = result.model_dump()
+    data["reasons"] = [refs.encode(r) for r in data["reasons"]]
+    data["suggested_rewrites"] = [refs.encode(r) for r in data["suggested_rewrites"]]
+    data["metadata"] = {k: refs.encode(v) for k, v in data["metadata"].items()}
+    for det in data["detections"]:
+        det["span"] = refs.encode(det["span"])
+    return json.dumps(data, separators=(",", ":"))
+
+
+def attach(value: str, text: str) -> AnalysisResult:
+    """Inverse of detach: the result rebuilt from its input `text`."""
+    refs = TextRefs(text)
+    data = json.loads(value)
+    data["reasons"] = [refs.decode(r) for r in data["reasons"]]
+    data["suggested_rewrites"] = [refs.decode(r) for r in data["suggested_rewrites"]]
+    data["metadata"] = {k: refs.decode(v) for k, v in data["metadata"].items()}
+    for det in data["detections"]:
+        det["span"] = refs.decode(det["span"])
+    return AnalysisResult.model_validate(data)
+
+
+class MemoryLRU:
+    """Thread-safe LRU of serialized results, bounded by entries and bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._entries: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: str, created: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (created or time.time(), value)
+            self.bytes += len(value)
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        self.bytes -= len(self._entries.pop(key)[1])
+
+
+class DiskStore:
+    """SQLite result store with a TTL, safe to share between threads."""
+
+    def __init__(self, path: Path, ttl: float) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            "DELETE FROM results WHERE created < ?", (time.time() - ttl,)
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        """(created, serialized result), or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created, result FROM results WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """Memory LRU in front of an optional DiskStore, with hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.memory = MemoryLRU(max_entries, max_bytes, ttl)
+        self.disk = DiskStore(path, ttl) if path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, text: str) -> Optional[AnalysisResult]:
+        """The result cached for `key`; `text` is the input `key` was made from."""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return AnalysisResult.model_validate_json(value)
+
+        if self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self._count("disk_hits")
+                created, stored = entry
+                result = attach(stored, text)
+                # Keep the original timestamp so the TTL still counts from storage
+                self.memory.put(key, result.model_dump_json(), created=created)
+                return result
+
+        self._count("misses")
+        return None
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def put(self, key: str, result: AnalysisResult, text: str) -> None:
+        if result.metadata.get("llm_partial"):
+            # Cut off or stopped early: a later request should get a full answer
+            return
+        self.memory.put(key, result.model_dump_json())
+        if self.disk is not None:
+            self.disk.put(key, detach(result, text))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.memory),
+            "bytes": self.memory.bytes,
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
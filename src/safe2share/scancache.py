@@ -0,0 +1,234 @@
+"""
+Persistent scan cache for repeated directory sweeps (SQLite).
+
+Two tables:
+  files    path -> (size, mtime_ns, digest): an unchanged stat means the file is
+           skipped without being read
+  results  digest -> serialized AnalysisResult: content-addressed, so a file that
+           was touched but not changed, copied or renamed is not re-analyzed
+
+Results hold no detected text: detections keep only their byte offsets, and
+reasons and metadata are stored as slices of the detected spans (TextRefs, see
+resultcache.py). On a hit the spans are read back from the file and checked
+against a hash of the originals; if they differ, the file is re-analyzed. The
+database is created readable by its owner only.
+
+The fingerprint of the rule set (plus the package version) is stored alongside;
+when it changes, every cached entry is dropped, so editing detectors, keywords
+or scoring invalidates the cache automatically. Lookups are primary-key
+lookups, so the index stays fast with millions of entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .resultcache import TextRefs
+
+DEFAULT_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "safe2share"
+)
+CACHE_FILE = "scan-cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT PRIMARY KEY,
+    result TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Rows written before each commit
+_BATCH = 500
+
+
+def cache_fingerprint(rules_fingerprint: str) -> str:
+    try:
+        version = metadata.version("safe2share-ai")
+    except metadata.PackageNotFoundError:
+        version = "dev"
+    return f"{version}:{rules_fingerprint}"
+
+
+def file_digest(path: Path) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.file_digest(fh, "blake2b").hexdigest()
+
+
+def _spans_digest(spans: List[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for span in spans:
+        h.update(span.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def detach(result: Dict[str, Any]) -> str:
+    """A file's result serialized without the text it detected."""
+    spans = [d["span"] for d in result["detections"]]
+    refs = TextRefs("\0".join(spans))
+    data = dict(result)
+    data["detections"] = [
+        {k: v for k, v in d.items() if k != "span"} for d in result["detections"]
+    ]
+    data["reasons"] = [refs.encode(r) for r in result["reasons"]]
+    data["suggested_rewrites"] = [refs.encode(r) for r in result["suggested_rewrites"]]
+    data["metadata"] = {k: refs.encode(v) for k, v in result["metadata"].items()}
+    data["spans_digest"] = _spans_digest(spans)
+    return json.dumps(data, separators=(",", ":"))
+
+
+def attach(value: str, path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Inverse of detach, reading the spans back from `path` by their byte offsets.
+    None if they are not the spans that were detected (the file changed).
+    """
+    data = json.loads(value)
+    detections = data["detections"]
+    try:
+        spans = _read_spans(path, detections)
+    except (OSError, ValueError):
+        return None
+    if _spans_digest(spans) != data.pop("spans_digest"):
+        return None
+    refs = TextRefs("\0".join(spans))
+    for det, span in zip(detections, spans):
+        det["span"] = span
+    data["reasons"] = [refs.decode(r) for r in data["reasons"]]
+    data["suggested_rewrites"] = [refs.decode(r) for r in data["suggested_rewrites"]]
+    data["metadata"] = {k: refs.decode(v) for k, v in data["metadata"].items()}
+    return data
+
+
+def _read_spans(path: Path, detections: List[Dict[str, Any]]) -> List[str]:
+    if not detections:
+        return []
+    with (
+        open(path, "rb") as fh,
+        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+    ):
+        # Decoded like the bytes-mode scan decodes matched spans
+        return [
+            buf[d["start"] : d["end"]].decode("utf-8", errors="replace")
+            for d in detections
+        ]
+
+
+def _create_private(path: Path) -> None:
+    """Create `path` (or restrict an existing one) readable by its owner only."""
+    os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+    os.chmod(path, 0o600)
+
+
+class ScanCache:
+    """
+    Writer side of the cache, used by the process driving the sweep. Workers
+    open their own read-only `CacheReader`.
+    """
+
+    def __init__(self, path: Path, fingerprint: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # SQLite gives its -wal and -shm files the permissions of the database
+        _create_private(self.path)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending = 0
+
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'fingerprint'"
+        ).fetchone()
+        if row is None or row[0] != fingerprint:
+            # Rules changed: nothing cached so far is valid any more
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+                (fingerprint,),
+            )
+        self._conn.commit()
+
+    def store(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        digest: str,
+        result_json: Optional[str],
+    ) -> None:
+        """
+        Record a file's stat and digest (and its result, if newly analyzed,
+        as serialized by `detach`).
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) "
+            "VALUES (?, ?, ?, ?)",
+            (path, size, mtime_ns, digest),
+        )
+        if result_json is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (digest, result) VALUES (?, ?)",
+                (digest, result_json),
+            )
+        self._pending += 1
+        if self._pending >= _BATCH:
+            self.commit()
+
+    def commit(self) -> None:
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "ScanCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CacheReader:
+    """Read-only view of the cache (safe to use from many worker processes)."""
+
+    def __init__(self, path: Path) -> None:
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True)
+
+    def by_stat(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Cached result for an unchanged file (same path, size and mtime)."""
+        row = self._conn.execute(
+            "SELECT r.result FROM files f JOIN results r ON r.digest = f.digest "
+            "WHERE f.path = ? AND f.size = ? AND f.mtime_ns = ?",
+            (path, size, mtime_ns),
+        ).fetchone()
+        return row[0] if row else None
+
+    def by_digest(self, digest: str) -> Optional[str]:
+        """Cached result for any file with this exact content."""
+        row = self._conn.execute(
+            "SELECT result FROM results WHERE digest = ?", (digest,)
+        ).fetchone()
+        return row[0] if row else None
+
+
+def stat_key(path: Path) -> Tuple[str, int, int]:
+    """(absolute path, size, mtime_ns) used to recognize unchanged files."""
+    st = path.stat()
+    return str(path.resolve()), st.st_size, st.st_mtime_ns
@@ -1,10 +1,21 @@
+import asyncio
 import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
 
+from .admission import AdmissionQueue
 from .analyzers.auto_combined import AutoCombinedAnalyzer
-from .analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from .analyzers.base import analyze_async, run_local
+from .analyzers.llm_openai_compat import PROMPT_VERSION, OpenAICompatibleAnalyzer
 from .analyzers.rule_based import RuleBasedAnalyzer
+from .compact import shape_result
 from .config import settings
+from .models import AnalysisResult, AnalyzeRequest, BatchItemResult
 from .providers import Provider
+from .resultcache import ResultCache, result_key
+from .scancache import cache_fingerprint
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -15,9 +26,28 @@ class Safe2ShareService:
     and exposes a single analyze(text) entrypoint.
     """
 
-    def __init__(self, provider: Provider | None = None):
+    # Providers whose results are worth caching (LOCAL is cheaper to recompute)
+    CACHED_PROVIDERS = (Provider.LLM, Provider.AUTO)
+    # Providers whose async analyses go through admission control
+    QUEUED_PROVIDERS = (Provider.LLM, Provider.AUTO)
+
+    def __init__(
+        self,
+        provider: Provider | None = None,
+        analyzer=None,
+        cache: ResultCache | None = None,
+        flights: SingleFlight | None = None,
+        admission: AdmissionQueue | None = None,
+    ):
         self.provider: Provider = provider or settings.provider
-        self.analyzer = self._build_analyzer(self.provider)
+        self.analyzer = analyzer or self._build_analyzer(self.provider)
+        self.cache = cache if self.provider in self.CACHED_PROVIDERS else None
+        # Identical concurrent analyses run once (S2S_COALESCE_REQUESTS)
+        self.admission = admission if self.provider in self.QUEUED_PROVIDERS else None
+        self.flights = (
+            (flights or SingleFlight()) if settings.coalesce_requests else None
+        )
+        self._cache_context = self._cache_context_for(self.analyzer)
 
         # Enforce readiness for explicit LLM provider.
         # AUTO is always usable because local runs even if LLM is unavailable.
@@ -51,5 +81,380 @@ class Safe2ShareService:
             "Or use: --provider local or --provider auto"
         )
 
+    def _cache_context_for(self, analyzer) -> tuple[str, ...]:
+        """Everything besides the text that the result depends on."""
+        local = getattr(analyzer, "local", analyzer)
+        rules = local.fingerprint() if hasattr(local, "fingerprint") else ""
+        return (
+            self.provider.value,
+            ",".join(b.model for b in settings.llm_backend_list()),
+            PROMPT_VERSION,
+            f"chunks:{settings.llm_chunk_tokens}:{settings.llm_chunk_overlap_tokens}",
+            f"radius:{settings.auto_context_radius}",
+            cache_fingerprint(rules),
+        )
+
     def analyze(self, text: str):
-        return self.analyzer.analyze(text)
+        if self.cache is None and self.flights is None:
+            return self.analyzer.analyze(text)
+        key = result_key(text, *self._cache_context)
+        result = self.cache.get(key, text) if self.cache is not None else None
+        if result is not None:
+            return result
+        if self.flights is None:
+            return self._analyze_miss(key, text)
+        return self.flights.do(key, lambda: self._analyze_miss(key, text))
+
+    async def analyze_async(self, text: str):
+        """
+        Non-blocking analyze for async callers (the API). Cache hits and
+        coalesced requests skip admission control; other LLM/AUTO analyses
+        wait for a slot or fail with QueueFullError.
+        """
+        if self.cache is None and self.flights is None:
+            return await self._analyze_miss_async(None, text)
+        key = result_key(text, *self._cache_context)
+        result = self.cache.get(key, text) if self.cache is not None else None
+        if result is not None:
+            return result
+        if self.flights is None:
+            return await self._analyze_miss_async(key, text)
+        return await self.flights.do_async(
+            key, lambda: self._analyze_miss_async(key, text)
+        )
+
+    @property
+    def packs(self) -> bool:
+        """Whether short texts can share one LLM completion (analyze_many_async)."""
+        return settings.llm_pack_max_items > 1 and hasattr(
+            self.analyzer, "analyze_many_async"
+        )
+
+    async def analyze_many_async(self, texts: Sequence[str]) -> List[AnalysisResult]:
+        """
+        Analyze several short texts together (requires `packs`). Cache hits are
+        served as in analyze_async; the misses pass admission control as one
+        analysis and go to the analyzer's analyze_many_async, which packs them
+        into shared completions. If that fails, the error is raised for all.
+        """
+        keys = [
+            result_key(t, *self._cache_context) if self.cache is not None else None
+            for t in texts
+        ]
+        results: List[Optional[AnalysisResult]] = [
+            self.cache.get(k, t) if k is not None else None for k, t in zip(keys, texts)
+        ]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            batch = [texts[i] for i in misses]
+            if self.admission is None:
+                fresh = await self.analyzer.analyze_many_async(batch)
+            else:
+                async with self.admission.slot(sum(map(len, batch))):
+                    fresh = await self.analyzer.analyze_many_async(batch)
+            for i, result in zip(misses, fresh):
+                if keys[i] is not None:
+                    self.cache.put(keys[i], result, texts[i])
+                results[i] = result
+        return results  # type: ignore[return-value]
+
+    def _analyze_miss(self, key: str, text: str):
+        result = self.analyzer.analyze(text)
+        if self.cache is not None:
+            self.cache.put(key, result, text)
+        return result
+
+    async def _analyze_miss_async(self, key: str | None, text: str):
+        if self.admission is None:
+            result = await analyze_async(self.analyzer, text)
+        else:
+            async with self.admission.slot(len(text)):
+                result = await analyze_async(self.analyzer, text)
+        if self.cache is not None and key is not None:
+            self.cache.put(key, result, text)
+        return result
+
+    def verdict(self, text: str, block_score: int):
+        """
+        Analyze for a block/allow decision (score >= block_score blocks). The
+        LLM provider stops generating once the score blocks, so the result may
+        be partial; partial results are not cached.
+        """
+        if not hasattr(self.analyzer, "analyze_verdict"):
+            return self.analyze(text)
+        key = result_key(text, *self._cache_context)
+        result = self.cache.get(key, text) if self.cache is not None else None
+        if result is None:
+            result = self.analyzer.analyze_verdict(text, block_score)
+            if self.cache is not None:
+                self.cache.put(key, result, text)
+        return result
+
+    def analyze_stream(self, chunks: Iterable[str]):
+        """Analyze text delivered as chunks, in bounded memory (local rules only)."""
+        if not hasattr(self.analyzer, "analyze_stream"):
+            raise RuntimeError(
+                f"Provider '{self.provider.value}' cannot analyze streamed input.\n"
+                "Use --provider local or --provider auto for large files."
+            )
+        return self.analyzer.analyze_stream(chunks)
+
+    def analyze_file(self, path: str | Path):
+        """Memory-map a file and scan its raw bytes (local rules only)."""
+        if not hasattr(self.analyzer, "analyze_file"):
+            raise RuntimeError(
+                f"Provider '{self.provider.value}' cannot scan files in bytes mode.\n"
+                "Use --provider local or --provider auto with --mmap."
+            )
+        return self.analyzer.analyze_file(path)
+
+
+class ServiceRegistry:
+    """
+    One Safe2ShareService per provider, built on first use and shared by every
+    request of the process. LLM and AUTO share a single OpenAICompatibleAnalyzer,
+    so all LLM traffic goes through one pooled HTTP client, and one ResultCache
+    (configured by the S2S_RESULT_CACHE_* settings).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._services: Dict[Provider, Safe2ShareService | RuntimeError] = {}
+        self._llm: Optional[OpenAICompatibleAnalyzer] = None
+        self.cache: Optional[ResultCache] = None
+        # Shared by all providers' services; keys include the provider
+        self.flights = SingleFlight()
+        # Bounds LLM/AUTO work of the async API (S2S_ADMISSION_*)
+        self.admission = (
+            AdmissionQueue(
+                settings.admission_max_active,
+                settings.admission_max_queued,
+                settings.admission_chars_per_second,
+            )
+            if settings.admission_max_active > 0
+            else None
+        )
+
+    def get(self, provider: Provider) -> Safe2ShareService:
+        """Shared service for `provider`; raises RuntimeError if unavailable."""
+        svc = self._services.get(provider)
+        if svc is None:
+            with self._lock:
+                svc = self._services.get(provider)
+                if svc is None:
+                    try:
+                        svc = Safe2ShareService(
+                            provider,
+                            analyzer=self._build_analyzer(provider),
+                            cache=self._build_cache(),
+                            flights=self.flights,
+                            admission=self.admission,
+                        )
+                    except RuntimeError as e:
+                        svc = e
+                    self._services[provider] = svc
+        if isinstance(svc, RuntimeError):
+            raise svc
+        return svc
+
+    def llm_breaker(self) -> Optional[Dict[str, object]]:
+        """Circuit breaker state of the shared LLM endpoint (None if not built)."""
+        llm = self._llm
+        return llm.breaker.snapshot() if llm is not None else None
+
+    def llm_backends(self) -> Optional[List[Dict[str, object]]]:
+        """Per-backend health, load and latency of the LLM pool (None if not built)."""
+        llm = self._llm
+        return llm.pool.snapshot() if llm is not None else None
+
+    def warm(self, providers: Iterable[Provider] = tuple(Provider)) -> None:
+        """Build services ahead of the first request (errors are kept for later)."""
+        for provider in providers:
+            try:
+                self.get(provider)
+            except RuntimeError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._llm is not None:
+                self._llm.close()
+            self._llm = None
+            self._services.clear()
+            if self.cache is not None:
+                self.cache.close()
+            self.cache = None
+
+    async def aclose(self) -> None:
+        """Like close, but also closes the async LLM client (API shutdown)."""
+        with self._lock:
+            llm, self._llm = self._llm, None
+            self._services.clear()
+            if self.cache is not None:
+                self.cache.close()
+            self.cache = None
+        if llm is not None:
+            await llm.aclose()
+
+    def __enter__(self) -> "ServiceRegistry":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _build_cache(self) -> Optional[ResultCache]:
+        if self.cache is None and settings.result_cache_entries > 0:
+            self.cache = ResultCache(
+                settings.result_cache_entries,
+                settings.result_cache_bytes,
+                settings.result_cache_ttl,
+                path=settings.result_cache_path,
+            )
+        return self.cache
+
+    def _build_analyzer(self, provider: Provider):
+        if provider == Provider.LOCAL:
+            return RuleBasedAnalyzer()
+
+        if self._llm is None:
+            self._llm = OpenAICompatibleAnalyzer()
+
+        if provider == Provider.LLM:
+            return self._llm
+
+        if provider == Provider.AUTO:
+            return AutoCombinedAnalyzer(llm=self._llm)
+
+        raise ValueError(f"Unsupported provider: {provider}")
+
+
+async def analyze_batch_async(
+    items: Sequence[AnalyzeRequest],
+    max_item_chars: int | None = None,
+    concurrency: int | None = None,
+    services: ServiceRegistry | None = None,
+) -> List[BatchItemResult]:
+    """
+    Analyze many texts in one call (the API's /analyze/batch), returning one
+    entry per item in order. Services come from `services` (a throwaway
+    registry if not given), so one service per provider serves the whole
+    batch.
+
+    Every item goes through its service, like a single /analyze request:
+    LLM/AUTO items are admitted one by one (admission control, result cache,
+    coalescing and the LLM client's in-flight cap all apply) and awaited
+    without holding a thread, at most `concurrency` of them at a time. LOCAL
+    items are scanned one after another in a single local-executor call.
+
+    Short LLM/AUTO items (up to S2S_LLM_PACK_ITEM_MAX_CHARS) are sent in
+    groups of S2S_LLM_PACK_MAX_ITEMS through analyze_many_async instead, so
+    their LLM requests share packed completions; each group is admitted as
+    one analysis. An item that fails or is not admitted (QueueFullError) is
+    reported in its own entry, or in every entry of its group.
+    """
+    max_item_chars = max_item_chars or settings.batch_max_item_chars
+    concurrency = concurrency or settings.batch_concurrency
+    if services is None:
+        own = ServiceRegistry()
+        try:
+            return await analyze_batch_async(items, max_item_chars, concurrency, own)
+        finally:
+            await own.aclose()
+
+    results: List[BatchItemResult] = [
+        BatchItemResult(index=i) for i in range(len(items))
+    ]
+    remote_slots = asyncio.Semaphore(concurrency)
+
+    def report(group: List[int], outcome) -> None:
+        """Record the results of `group`, or the exception that failed it."""
+        if not isinstance(outcome, Exception):
+            for i, result in zip(group, outcome):
+                item = items[i]
+                results[i].result = shape_result(
+                    result, item.compact, item.include_rewrite
+                )
+            return
+        for i in group:
+            if isinstance(outcome, RuntimeError):
+                results[i].error = str(outcome)
+            else:
+                logger.error("Unhandled error in batch item %d", i, exc_info=outcome)
+                results[i].error = "Internal error"
+
+    async def run(i: int) -> None:
+        try:
+            async with remote_slots:
+                result = await services.get(items[i].provider).analyze_async(
+                    items[i].text
+                )
+            report([i], [result])
+        except Exception as e:
+            report([i], e)
+
+    async def run_local_items(group: List[int]) -> None:
+        def scan(service: Safe2ShareService) -> list:
+            outcomes = []
+            for i in group:
+                try:
+                    outcomes.append([service.analyze(items[i].text)])
+                except Exception as e:
+                    outcomes.append(e)
+            return outcomes
+
+        try:
+            outcomes = await run_local(scan, services.get(Provider.LOCAL))
+        except Exception as e:
+            report(group, e)
+            return
+        for i, outcome in zip(group, outcomes):
+            report([i], outcome)
+
+    async def run_packed(provider: Provider, group: List[int]) -> None:
+        try:
+            async with remote_slots:
+                found = await services.get(provider).analyze_many_async(
+                    [items[i].text for i in group]
+                )
+            report(group, found)
+        except Exception as e:
+            report(group, e)
+
+    pending = []
+    local: List[int] = []
+    packed: Dict[Provider, List[int]] = {}
+    for i, item in enumerate(items):
+        error = _too_large(item.text, max_item_chars)
+        if error is not None:
+            results[i].error = error
+        elif item.provider == Provider.LOCAL:
+            local.append(i)
+        elif _packable(item, services):
+            packed.setdefault(item.provider, []).append(i)
+        else:
+            pending.append(run(i))
+    size = settings.llm_pack_max_items
+    for provider, indexes in packed.items():
+        for start in range(0, len(indexes), size):
+            pending.append(run_packed(provider, indexes[start : start + size]))
+    if local:
+        pending.append(run_local_items(local))
+    await asyncio.gather(*pending)
+    return results
+
+
+def _packable(item: AnalyzeRequest, services: ServiceRegistry) -> bool:
+    """Whether the LLM/AUTO `item` can share a packed completion with others."""
+    if len(item.text) > settings.llm_pack_item_max_chars:
+        return False
+    try:
+        return services.get(item.provider).packs
+    except RuntimeError:
+        # Reported by the item's own run
+        return False
+
+
+def _too_large(text: str, max_item_chars: int) -> Optional[str]:
+    if len(text) <= max_item_chars:
+        return None
+    return f"Text too large ({len(text)} chars). Limit is {max_item_chars}."
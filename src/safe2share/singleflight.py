@@ -0,0 +1,113 @@
+"""
+Coalescing of identical concurrent analyses ("single flight").
+
+The first caller for a key runs the analysis; callers arriving with the same
+key while it is in flight wait for that result instead of starting their own.
+Keys are the result cache's hash of the text and configuration, so a waiting
+caller holds no copy of the text. Sync and async callers share flights: a
+thread can wait on an analysis started from the event loop and vice versa.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .models import AnalysisResult
+
+
+class _Flight:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe table of in-flight analyses with coalesced/unique counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.unique = 0
+        self.coalesced = 0
+        # Strong references to running async leads (the loop keeps weak ones)
+        self._tasks: set[asyncio.Task] = set()
+
+    def do(self, key: str, fn: Callable[[], AnalysisResult]) -> AnalysisResult:
+        """fn() for the first caller of `key`; the same result for concurrent ones."""
+        flight, leader = self._join(key)
+        if not leader:
+            return flight.future.result().model_copy(deep=True)
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, flight, error=e)
+            raise
+        self._finish(key, flight, result=result)
+        return result
+
+    async def do_async(
+        self, key: str, fn: Callable[[], Awaitable[AnalysisResult]]
+    ) -> AnalysisResult:
+        """Async do(). A cancelled leader does not cancel the shared analysis."""
+        flight, leader = self._join(key)
+        if not leader:
+            # Shielded: a cancelled waiter must not cancel the shared future
+            result = await asyncio.shield(asyncio.wrap_future(flight.future))
+            return result.model_copy(deep=True)
+
+        async def lead() -> Optional[AnalysisResult]:
+            try:
+                result = await fn()
+            except BaseException as e:
+                self._finish(key, flight, error=e)
+                return None
+            self._finish(key, flight, result=result)
+            return result
+
+        # Shielded too: if the leader is cancelled, the others still get a result
+        task = asyncio.ensure_future(lead())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        result = await asyncio.shield(task)
+        return result if result is not None else flight.future.result()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "unique": self.unique,
+                "coalesced": self.coalesced,
+            }
+
+    def _join(self, key: str) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.unique += 1
+            return flight, True
+
+    def _finish(
+        self,
+        key: str,
+        flight: _Flight,
+        result: AnalysisResult | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            del self._flights[key]
+        if error is not None:
+            flight.future.set_exception(error)
+        elif flight.waiters:
+            # Waiters copy from a private copy: the leader may modify its result
+            flight.future.set_result(result.model_copy(deep=True))
+        else:
+            flight.future.set_result(result)
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from safe2share import api
+from safe2share.admission import AdmissionQueue, QueueFullError
+from safe2share.models import AnalysisResult
+from safe2share.providers import Provider
+from safe2share.service import Safe2ShareService
+
+
+def test_small_texts_go_first_and_overflow_is_refused():
+    queue = AdmissionQueue(max_active=1, max_queued=2, chars_per_second=1000)
+    order = []
+
+    async def job(name, size):
+        async with queue.slot(size):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        first = asyncio.ensure_future(job("first", 10))
+        await asyncio.sleep(0)
+        huge = asyncio.ensure_future(job("huge", 200_000))
+        small = asyncio.ensure_future(job("small", 10))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError) as exc:
+            await job("overflow", 10)
+        await asyncio.gather(first, huge, small)
+        return exc.value
+
+    error = asyncio.run(run())
+    assert order == ["first", "small", "huge"]
+    assert error.retry_after >= 1
+    assert queue.stats()["rejected"] == 1
+    assert (queue.active, queue.queued) == (0, 0)
+
+
+def test_large_texts_do_not_starve():
+    now = [0.0]
+    queue = AdmissionQueue(1, 10, chars_per_second=1000, clock=lambda: now[0])
+    order = []
+
+    async def job(name, size):
+        async with queue.slot(size):
+            order.append(name)
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def holder():
+            async with queue.slot(1):
+                await gate.wait()
+
+        held = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        # 5000 chars count as arriving 5s late; a small text 6s later is behind it
+        big = asyncio.ensure_future(job("big", 5000))
+        await asyncio.sleep(0)
+        now[0] = 6.0
+        small = asyncio.ensure_future(job("small", 10))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(held, big, small)
+
+    asyncio.run(run())
+    assert order == ["big", "small"]
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    queue = AdmissionQueue(1, 1, chars_per_second=1000)
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def holder():
+            async with queue.slot(1):
+                await gate.wait()
+
+        held = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert queue.queued == 0
+        # Its place in the queue is free again
+        again = asyncio.ensure_future(holder())
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(held, again)
+
+    asyncio.run(run())
+    assert (queue.active, queue.queued, queue.admitted) == (0, 0, 2)
+
+
+class SlowLLM:
+    is_available = True
+
+    def analyze(self, text):
+        raise AssertionError("the API uses the async path")
+
+    async def analyze_async(self, text):
+        await asyncio.sleep(0.3)
+        return AnalysisResult(risk="PUBLIC", score=0, metadata={"provider": "llm"})
+
+
+def test_api_answers_429_with_retry_after_but_local_never_waits(monkeypatch):
+    queue = AdmissionQueue(max_active=1, max_queued=1, chars_per_second=1000)
+    llm = Safe2ShareService(Provider.LLM, analyzer=SlowLLM(), admission=queue)
+    get = api.services.get
+    monkeypatch.setattr(
+        api.services, "get", lambda p: llm if p == Provider.LLM else get(p)
+    )
+    monkeypatch.setattr(api.services, "admission", queue)
+
+    with TestClient(api.app) as client:
+
+        def post(i):
+            return client.post("/analyze", json={"text": f"t{i}", "provider": "llm"})
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(post, i) for i in range(3)]
+            time.sleep(0.1)
+            t0 = time.perf_counter()
+            local = client.post("/analyze", json={"text": "hello", "provider": "local"})
+            local_elapsed = time.perf_counter() - t0
+            responses = [f.result() for f in futures]
+
+        stats = client.get("/admission/stats").json()
+
+    assert local.status_code == 200 and local_elapsed < 0.2
+    assert sorted(r.status_code for r in responses) == [200, 200, 429]
+    rejected = next(r for r in responses if r.status_code == 429)
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert stats["enabled"] and stats["rejected"] == 1 and stats["admitted"] == 2
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from safe2share import api
+from safe2share.analyzers import base
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.config import settings
+from safe2share.models import AnalysisResult, AnalyzeRequest
+from safe2share.providers import Provider
+from safe2share.service import ServiceRegistry, analyze_batch_async
+
+client = TestClient(api.app)
+
+
+def test_batch_returns_results_in_order_with_per_item_errors(monkeypatch):
+    monkeypatch.delenv("S2S_LLM_BASE_URL", raising=False)
+    monkeypatch.delenv("S2S_LLM_MODEL", raising=False)
+    monkeypatch.setattr(settings, "batch_max_item_chars", 50)
+
+    resp = client.post(
+        "/analyze/batch",
+        json={
+            "items": [
+                {"text": "hello team"},
+                {"text": "my password is hunter42"},
+                {"text": "x" * 51},
+                {"text": "classify me", "provider": "llm"},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["result"]["risk"] == "PUBLIC"
+    assert results[1]["result"]["risk"] in ("CONFIDENTIAL", "HIGHLY_CONFIDENTIAL")
+    assert "Limit is 50" in results[2]["error"]
+    assert results[3]["result"] is None
+    assert "S2S_LLM_BASE_URL" in results[3]["error"]
+
+
+def test_batch_rejects_too_many_items(monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_items", 2)
+    resp = client.post("/analyze/batch", json={"items": [{"text": "a"}] * 3})
+    assert resp.status_code == 413
+
+
+def test_remote_items_run_concurrently(monkeypatch):
+    barrier = threading.Barrier(3, timeout=5)
+
+    class WaitingAnalyzer:
+        is_available = True
+
+        def analyze(self, text):
+            # Only returns once three items are in flight at the same time
+            barrier.wait()
+            return AnalysisResult(risk="PUBLIC", score=0, metadata={"text": text})
+
+    monkeypatch.setattr(
+        ServiceRegistry, "_build_analyzer", lambda self, p: WaitingAnalyzer()
+    )
+    items = [AnalyzeRequest(text=f"t{i}", provider=Provider.AUTO) for i in range(3)]
+    results = asyncio.run(analyze_batch_async(items, concurrency=3))
+    assert [r.result.metadata["text"] for r in results] == ["t0", "t1", "t2"]
+
+
+def test_local_requests_do_not_wait_behind_a_saturated_batch(monkeypatch):
+    release = threading.Event()
+
+    class HungLLM:
+        # Sync only: its async calls take default-executor threads
+        is_available = True
+
+        def analyze(self, text):
+            release.wait(5)
+            return AnalysisResult(risk="PUBLIC", score=0)
+
+    monkeypatch.setattr(
+        ServiceRegistry,
+        "_build_analyzer",
+        lambda self, p: RuleBasedAnalyzer() if p == Provider.LOCAL else HungLLM(),
+    )
+
+    async def scenario():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(2))
+        registry = ServiceRegistry()
+        items = [AnalyzeRequest(text=f"t{i}", provider=Provider.LLM) for i in range(20)]
+        batch = asyncio.create_task(
+            analyze_batch_async(items, concurrency=8, services=registry)
+        )
+        await asyncio.sleep(0.1)  # every default-executor thread is now held
+
+        local = registry.get(Provider.LOCAL)
+        latencies = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            await asyncio.wait_for(local.analyze_async("password: hunter42"), 2)
+            latencies.append(time.perf_counter() - t0)
+        release.set()
+        return latencies, await batch
+
+    latencies, results = asyncio.run(scenario())
+    assert max(latencies) < 0.5
+    assert all(r.result is not None for r in results)
+
+
+def test_batch_items_are_admitted_one_by_one(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_active", 1)
+    monkeypatch.setattr(settings, "admission_max_queued", 1)
+    monkeypatch.setattr(settings, "coalesce_requests", False)
+    monkeypatch.setattr(settings, "result_cache_entries", 0)
+
+    class SlowLLM:
+        is_available = True
+
+        def analyze(self, text):
+            raise AssertionError("sync path not expected")
+
+        async def analyze_async(self, text):
+            await asyncio.sleep(0.05)
+            return AnalysisResult(risk="PUBLIC", score=0)
+
+    monkeypatch.setattr(ServiceRegistry, "_build_analyzer", lambda self, p: SlowLLM())
+    items = [AnalyzeRequest(text=f"t{i}", provider=Provider.LLM) for i in range(4)]
+    results = asyncio.run(
+        analyze_batch_async(items, concurrency=4, services=ServiceRegistry())
+    )
+    # One running, one queued: the other two items are turned away on their own
+    assert sum(r.result is not None for r in results) == 2
+    assert sum("retry" in (r.error or "").lower() for r in results) == 2
+
+
+def test_local_requests_do_not_wait_behind_auto_local_passes(monkeypatch):
+    class SlowLocal:
+        def analyze(self, text):
+            time.sleep(0.3)
+            return AnalysisResult(risk="PUBLIC", score=0)
+
+    class NoLLM:
+        is_available = False
+
+    auto = AutoCombinedAnalyzer(local=SlowLocal(), llm=NoLLM())
+    local = RuleBasedAnalyzer()
+
+    async def scenario():
+        burst = [asyncio.create_task(auto.analyze_async(f"t{i}")) for i in range(16)]
+        await asyncio.sleep(0.05)  # every AUTO local thread is now busy
+        latencies = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            await local.analyze_async("password: hunter42")
+            latencies.append(time.perf_counter() - t0)
+        await asyncio.gather(*burst)
+        return latencies
+
+    assert max(asyncio.run(scenario())) < 0.25
+
+
+def test_local_batch_items_share_one_executor_submission(monkeypatch):
+    class CountingExecutor(ThreadPoolExecutor):
+        submitted = 0
+
+        def submit(self, *args, **kwargs):
+            CountingExecutor.submitted += 1
+            return super().submit(*args, **kwargs)
+
+    executor = CountingExecutor(2)
+    monkeypatch.setattr(base, "local_executor", lambda: executor)
+    items = [AnalyzeRequest(text=f"password: hunter{i}") for i in range(10)]
+
+    results = asyncio.run(analyze_batch_async(items, services=ServiceRegistry()))
+
+    assert CountingExecutor.submitted == 1
+    assert all(r.result.risk != "PUBLIC" for r in results)
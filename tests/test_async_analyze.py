@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from safe2share import api
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer
+from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from safe2share.config import settings
+from safe2share.models import AnalysisResult
+from safe2share.providers import Provider
+from safe2share.service import Safe2ShareService
+
+
+def test_async_llm_caps_in_flight_requests(monkeypatch):
+    monkeypatch.setattr(settings, "llm_base_url", "http://127.0.0.1:1/v1")
+    monkeypatch.setattr(settings, "llm_model", "stub")
+    monkeypatch.setattr(settings, "llm_max_concurrency", 3)
+    analyzer = OpenAICompatibleAnalyzer()
+
+    in_flight = peak = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        message = SimpleNamespace(content='{"score": 10, "reasons": ["ok"]}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    analyzer.pool.backends[0].aclient = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    async def run():
+        return await asyncio.gather(
+            *(analyzer.analyze_async(f"text {i}") for i in range(20))
+        )
+
+    results = asyncio.run(run())
+    assert peak == 3
+    assert [r.score for r in results] == [10] * 20
+
+
+class AsyncOnlyLLM:
+    is_available = True
+
+    def analyze(self, text):
+        raise AssertionError("async path must not call the sync analyzer")
+
+    async def analyze_async(self, text):
+        return AnalysisResult(risk="HIGHLY_CONFIDENTIAL", score=95, metadata={})
+
+
+def test_auto_async_escalates_through_async_llm():
+    svc = Safe2ShareService(
+        provider=Provider.AUTO, analyzer=AutoCombinedAnalyzer(llm=AsyncOnlyLLM())
+    )
+    escalated = asyncio.run(svc.analyze_async("my password is hunter42"))
+    assert escalated.metadata["auto_path"] == "escalated_to_llm"
+    assert escalated.score == 95
+
+    local = asyncio.run(svc.analyze_async("hello team"))
+    assert local.metadata["auto_path"] == "local_only"
+
+
+def test_analyze_endpoint_is_async_and_still_validates():
+    client = TestClient(api.app)
+    resp = client.post("/analyze", json={"text": "my password is hunter42"})
+    assert resp.status_code == 200
+    assert resp.json()["risk"] != "PUBLIC"
+
+    resp = client.post("/analyze", json={"text": "x" * (api.MAX_TEXT_CHARS + 1)})
+    assert resp.status_code == 413
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from safe2share.analyzers.backends import Backend, BackendPool
+from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from safe2share.config import LLMBackend, settings
+
+REPLY = json.dumps(
+    {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": '{"score": 40}'},
+            }
+        ],
+    }
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _send(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send(b'{"object": "list", "data": []}')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send(REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def live_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+
+
+def test_lease_prefers_least_outstanding_by_weight():
+    heavy = Backend(LLMBackend(base_url="http://a/v1", model="m", weight=2.5))
+    light = Backend(LLMBackend(base_url="http://b/v1", model="m"))
+    pool = BackendPool([heavy, light])
+
+    picked = []
+    with pool.lease([]) as a, pool.lease([]) as b, pool.lease([]) as c:
+        picked = [a, b, c]
+        assert heavy.inflight == 2 and light.inflight == 1
+    assert picked == [heavy, heavy, light]
+    assert heavy.inflight == light.inflight == 0
+    assert heavy.requests == 2 and heavy.latency_ewma is not None
+
+
+def test_requests_fail_over_from_dead_backend(live_url, monkeypatch):
+    dead_url = f"http://127.0.0.1:{free_port()}/v1"
+    monkeypatch.setattr(settings, "llm_health_interval", 0)
+    monkeypatch.setattr(
+        settings,
+        "llm_backends",
+        [
+            LLMBackend(base_url=dead_url, model="dead-model", weight=100),
+            LLMBackend(base_url=live_url, model="live-model"),
+        ],
+    )
+    analyzer = OpenAICompatibleAnalyzer()
+    dead, live = analyzer.pool.backends
+
+    res = analyzer.analyze("hello")
+    assert res.score == 40
+    assert res.metadata["base_url"] == live_url
+    assert res.metadata["model"] == "live-model"
+    assert not dead.healthy and dead.errors == 1
+
+    # Unhealthy backends are skipped while a healthy one is left
+    asyncio.run(analyzer.analyze_async("hello"))
+    assert dead.errors == 1 and live.requests == 2
+    assert analyzer.breaker.state == "closed"
+
+    analyzer.pool.check_health()
+    assert live.healthy and not dead.healthy
+    dead.healthy, live.healthy = True, False
+    analyzer.pool.check_health()
+    assert live.healthy and not dead.healthy
+
+    stats = {b["model"]: b for b in analyzer.pool.snapshot()}
+    assert stats["live-model"]["requests"] == 2
+    assert stats["dead-model"]["last_error"] == "APIConnectionError"
+
+
+def test_probe_errors_outside_openai_mark_backend_down():
+    probed = []
+
+    def client(error=None):
+        def models_list():
+            probed.append(error)
+            if error is not None:
+                raise error
+
+        models = SimpleNamespace(list=models_list)
+        return SimpleNamespace(with_options=lambda **kw: SimpleNamespace(models=models))
+
+    configs = [
+        LLMBackend(base_url=f"http://127.0.0.1:1/v{i}", model="m") for i in range(3)
+    ]
+    pool = BackendPool([Backend(c, failover=True) for c in configs])
+    errors = [ValueError("malformed"), RuntimeError("transport"), None]
+    for backend, error in zip(pool.backends, errors):
+        backend.client = client(error)
+
+    pool.check_health()
+
+    assert probed == errors
+    assert [b.healthy for b in pool.backends] == [False, False, True]
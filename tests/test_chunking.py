@@ -0,0 +1,104 @@
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+from safe2share.analyzers.chunking import merge_chunk_results, split_chunks
+from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from safe2share.config import settings
+from safe2share.models import AnalysisResult, Detection
+
+
+def test_chunks_cover_text_with_overlap():
+    rng = random.Random(7)
+    words = ["alpha", "beta", "gamma\n", "delta", "x" * 30]
+    text = " ".join(rng.choice(words) for _ in range(2000))
+
+    chunks = split_chunks(text, size=500, overlap=80)
+    assert chunks[0][0] == 0
+    assert chunks[-1][0] + len(chunks[-1][1]) == len(text)
+    for (prev_off, prev), (off, chunk) in zip(chunks, chunks[1:]):
+        assert text[off : off + len(chunk)] == chunk
+        assert len(chunk) <= 500
+        # Anything shorter than the overlap lies wholly inside some chunk
+        assert prev_off < off <= prev_off + len(prev) - 40
+
+
+def test_merge_dedups_overlap_and_uses_global_offsets():
+    text = "intro. password hunter42 here. tail hunter42"
+    chunks = [(0, text[:31]), (7, text[7:])]
+    secret = Detection(label="PASSWORD", span="hunter42", score=90)
+    results = [
+        AnalysisResult(risk="HIGHLY_CONFIDENTIAL", score=90, detections=[secret]),
+        AnalysisResult(
+            risk="INTERNAL",
+            score=30,
+            reasons=["r"],
+            detections=[secret.model_copy(update={"score": 40})],
+        ),
+    ]
+    merged = merge_chunk_results(text, chunks, results, {"provider": "llm"})
+
+    assert merged.score == 90
+    assert [(d.start, d.end, d.score) for d in merged.detections] == [(16, 24, 90)]
+    assert merged.suggested_rewrites == [
+        "intro. password [REDACTED] here. tail [REDACTED]"
+    ]
+    assert merged.metadata == {"provider": "llm", "chunks": "2"}
+
+
+def fake_completion(**kwargs):
+    chunk = kwargs["messages"][-1]["content"]
+    detections = [{"label": "PASSWORD", "span": "hunter42", "score": 90}]
+    found = "hunter42" in chunk
+    content = json.dumps(
+        {
+            "score": 90 if found else 0,
+            "reasons": ["password"] if found else [],
+            "detections": detections if found else [],
+            "suggested_rewrites": [chunk.replace("hunter42", "[REDACTED]")],
+        }
+    )
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+
+
+def test_analyzer_splits_long_input_sync_and_async(monkeypatch):
+    monkeypatch.setattr(settings, "llm_base_url", "http://127.0.0.1:1/v1")
+    monkeypatch.setattr(settings, "llm_model", "stub")
+    monkeypatch.setattr(settings, "llm_chunk_tokens", 50)  # 200 chars
+    monkeypatch.setattr(settings, "llm_chunk_overlap_tokens", 5)
+    analyzer = OpenAICompatibleAnalyzer()
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return fake_completion(**kwargs)
+
+    async def acreate(**kwargs):
+        return create(**kwargs)
+
+    for attr, fn in (("client", create), ("aclient", acreate)):
+        setattr(
+            analyzer.pool.backends[0],
+            attr,
+            SimpleNamespace(
+                chat=SimpleNamespace(completions=SimpleNamespace(create=fn))
+            ),
+        )
+
+    text = "filler words " * 40 + "the password is hunter42 " + "more text " * 40
+    start = text.index("hunter42")
+
+    for result in (analyzer.analyze(text), asyncio.run(analyzer.analyze_async(text))):
+        assert int(result.metadata["chunks"]) > 1
+        assert [(d.start, d.end) for d in result.detections] == [(start, start + 8)]
+        assert result.suggested_rewrites == [text.replace("hunter42", "[REDACTED]")]
+        assert result.risk == "HIGHLY_CONFIDENTIAL"
+    assert len(calls) == 2 * int(result.metadata["chunks"])
+
+    calls.clear()
+    assert analyzer.analyze("short").metadata.get("chunks") is None
+    assert len(calls) == 1
@@ -0,0 +1,87 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from safe2share import api
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.cli import main
+from safe2share.compact import compact_result, shape_result
+from safe2share.models import AnalysisResult, CompactAnalysisResult
+
+client = TestClient(api.app)
+
+TEXT = "mail a@b.com, then a@b.com again, c@d.org and password=hunter42"
+
+
+def test_detections_are_grouped_with_counts_and_first_last_offsets():
+    result = RuleBasedAnalyzer().analyze(TEXT)
+    compact = compact_result(result, include_rewrite=False)
+
+    assert compact.detection_count == len(result.detections) == 4
+    groups = {(g.label, g.span): g for g in compact.detections}
+    email = groups[("EMAIL", "a@b.com")]
+    assert email.count == 2
+    assert (email.first_start, email.first_end) == (5, 12)
+    assert (email.last_start, email.last_end) == (19, 26)
+    assert TEXT[email.last_start : email.last_end] == "a@b.com"
+    assert groups[("EMAIL", "c@d.org")].count == 1
+    assert groups[("CREDENTIAL", "hunter42")].score == 100
+    assert compact.risk == result.risk and compact.score == result.score
+    assert compact.suggested_rewrites == []
+    # Each distinct reason once
+    assert len(compact.reasons) == len(set(result.reasons)) == 3
+
+
+def test_reasons_are_capped_and_score_is_the_highest():
+    result = AnalysisResult(
+        risk="CONFIDENTIAL",
+        score=70,
+        reasons=[f"reason {i}" for i in range(30)] + ["reason 0"],
+        detections=[
+            {"label": "EMAIL", "span": "x@y.io", "score": 40, "start": 9, "end": 15},
+            {"label": "EMAIL", "span": "x@y.io", "score": 70, "start": 1, "end": 7},
+        ],
+    )
+    compact = compact_result(result, max_reasons=5)
+
+    assert compact.reasons == [f"reason {i}" for i in range(5)]
+    assert compact.reasons_omitted == 25
+    (group,) = compact.detections
+    assert (group.score, group.count) == (70, 2)
+    assert (group.first_start, group.last_start) == (1, 9)
+
+
+def test_shape_result_can_drop_only_the_rewrite():
+    result = RuleBasedAnalyzer().analyze(TEXT)
+    shaped = shape_result(result, include_rewrite=False)
+
+    assert isinstance(shaped, AnalysisResult)
+    assert shaped.suggested_rewrites == [] and result.suggested_rewrites
+    assert shaped.detections == result.detections
+    assert shape_result(result) is result
+    assert isinstance(shape_result(result, compact=True), CompactAnalysisResult)
+
+
+def test_api_and_batch_return_compact_results():
+    body = client.post(
+        "/analyze", json={"text": TEXT, "compact": True, "include_rewrite": False}
+    ).json()
+    assert body["detection_count"] == 4
+    assert body["suggested_rewrites"] == []
+    assert {"count", "first_start", "last_end"} <= set(body["detections"][0])
+
+    full = client.post("/analyze", json={"text": TEXT}).json()
+    assert "detection_count" not in full and full["suggested_rewrites"]
+
+    batch = client.post(
+        "/analyze/batch",
+        json={"items": [{"text": TEXT, "compact": True}, {"text": TEXT}]},
+    ).json()["results"]
+    assert batch[0]["result"]["detection_count"] == 4
+    assert len(batch[1]["result"]["detections"]) == 4
+
+
+def test_cli_compact_json(capsys):
+    assert main([TEXT, "--compact", "--no-rewrite", "--json"]) == 0
+    out = json.loads(capsys.readouterr().out)
+    assert out["detection_count"] == 4 and out["suggested_rewrites"] == []
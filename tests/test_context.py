@@ -0,0 +1,59 @@
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer, AutoPolicy
+from safe2share.analyzers.context import SEPARATOR, Excerpt
+from safe2share.models import AnalysisResult, Detection
+
+
+def test_excerpt_merges_windows_and_maps_offsets_back():
+    text = "a" * 100 + "SECRET" + "b" * 100 + "PIN" + "c" * 20
+    excerpt = Excerpt(text, [(100, 106), (206, 209), (210, 211)], radius=5)
+
+    assert excerpt.windows == 2
+    assert excerpt.text == "aaaaaSECRETbbbbb" + SEPARATOR + "bbbbbPINccccccc"
+    assert excerpt.to_original(5, 11) == (100, 106)
+    pin = excerpt.text.index("PIN")
+    assert excerpt.to_original(pin, pin + 3) == (206, 209)
+    # A span crossing the gap has no place in the original
+    assert excerpt.to_original(10, pin) is None
+
+
+class RecordingLLM:
+    is_available = True
+
+    def __init__(self):
+        self.sent = []
+
+    def analyze(self, text):
+        self.sent.append(text)
+        return AnalysisResult(
+            risk="HIGHLY_CONFIDENTIAL",
+            score=95,
+            detections=[Detection(label="PASSWORD", span="hunter42", score=95)],
+        )
+
+
+def test_auto_sends_only_windows_of_a_large_document():
+    filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit.\n" * 2000
+    text = filler + "Note: my password is hunter42 for the shared drive.\n" + filler
+    llm = RecordingLLM()
+    auto = AutoCombinedAnalyzer(llm=llm, policy=AutoPolicy(context_radius=200))
+
+    res = auto.analyze(text)
+
+    assert len(llm.sent) == 1 and len(llm.sent[0]) < 1000
+    start = text.index("hunter42")
+    assert [(d.start, d.end) for d in res.detections] == [(start, start + 8)]
+    assert res.suggested_rewrites == [text.replace("hunter42", "[REDACTED]")]
+    assert res.metadata["auto_path"] == "escalated_to_llm"
+    assert res.metadata["auto_input_bytes"] == str(len(text))
+    assert int(res.metadata["auto_llm_bytes_sent"]) == len(llm.sent[0])
+    assert res.metadata["auto_llm_windows"] == "1"
+
+
+def test_auto_sends_full_text_when_radius_disabled():
+    llm = RecordingLLM()
+    text = "x " * 5000 + "my password is hunter42"
+    res = AutoCombinedAnalyzer(llm=llm, policy=AutoPolicy(context_radius=0)).analyze(
+        text
+    )
+    assert llm.sent == [text]
+    assert res.metadata["auto_llm_bytes_sent"] == res.metadata["auto_input_bytes"]
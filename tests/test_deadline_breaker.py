@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import safe2share
+from safe2share import api
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer, AutoPolicy
+from safe2share.analyzers.breaker import CircuitBreaker
+from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from safe2share.config import settings
+
+REPLY = json.dumps(
+    {
+        "id": "stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": '{"score": 95}'},
+            }
+        ],
+    }
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible stub whose latency the test controls."""
+
+    delay = 0.0
+    requests = 0
+
+    def do_POST(self):
+        StubHandler.requests += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(StubHandler.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        settings, "llm_base_url", f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    monkeypatch.setattr(settings, "llm_model", "stub")
+    monkeypatch.setattr(settings, "llm_breaker_failures", 2)
+    monkeypatch.setattr(settings, "llm_breaker_cooldown", 0.5)
+    StubHandler.delay, StubHandler.requests = 0.0, 0
+    yield StubHandler
+    server.shutdown()
+
+
+def test_breaker_opens_then_probes_after_cooldown():
+    now = [0.0]
+    breaker = CircuitBreaker(2, cooldown=10, clock=lambda: now[0])
+    started = breaker.started()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    # A late success from before the failures does not close it
+    breaker.record_success(started)
+    assert breaker.state == "open"
+
+    now[0] = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()  # a single probe
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success(breaker.started())
+    assert breaker.state == "closed"
+
+
+def test_auto_falls_back_on_deadline_and_skips_open_circuit(stub):
+    llm = OpenAICompatibleAnalyzer()
+    auto = AutoCombinedAnalyzer(
+        llm=llm, policy=AutoPolicy(llm_deadline=0.2, speculative=False)
+    )
+    text = "my password is hunter42"
+
+    stub.delay = 1.0
+    t0 = time.perf_counter()
+    res = auto.analyze(text)
+    assert res.metadata["auto_path"] == "local_only_llm_timeout"
+    assert res.risk != "PUBLIC"
+    res = asyncio.run(auto.analyze_async(text))
+    assert res.metadata["auto_path"] == "local_only_llm_timeout"
+    assert time.perf_counter() - t0 < 0.9
+    assert llm.breaker.state == "open"
+
+    sent = stub.requests
+    res = auto.analyze(text)
+    assert res.metadata["auto_path"] == "local_only_llm_circuit_open"
+    assert stub.requests == sent
+
+    stub.delay = 0.0
+    time.sleep(0.6)
+    res = auto.analyze(text)
+    assert res.metadata["auto_path"] == "escalated_to_llm"
+    assert res.score == 95
+    assert llm.breaker.state == "closed"
+
+
+class LateFailingLLM:
+    """Fails after the deadline, recording the failure like the real client."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.breaker = CircuitBreaker(10, cooldown=10)
+        self.done = threading.Event()
+
+    def analyze(self, text):
+        try:
+            time.sleep(self.delay)
+            self.breaker.record_failure()
+            raise RuntimeError("LLM request timed out")
+        finally:
+            self.done.set()
+
+
+def test_timed_out_call_counts_one_breaker_failure():
+    llm = LateFailingLLM(delay=0.3)
+    auto = AutoCombinedAnalyzer(
+        llm=llm, policy=AutoPolicy(llm_deadline=0.1, speculative=False)
+    )
+    res = auto.analyze("my password is hunter42")
+    assert res.metadata["auto_path"] == "local_only_llm_timeout"
+    assert llm.done.wait(2)
+    assert llm.breaker.snapshot()["consecutive_failures"] == 1
+
+    # A failure within the deadline is counted once too
+    llm.delay, llm.done = 0.0, threading.Event()
+    with pytest.raises(RuntimeError):
+        auto.analyze("my password is hunter42")
+    assert llm.breaker.snapshot()["consecutive_failures"] == 2
+
+
+HUNG_AUTO_SCRIPT = """
+import time
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer, AutoPolicy
+
+class HungLLM:
+    def analyze(self, text):
+        time.sleep(30)
+
+auto = AutoCombinedAnalyzer(llm=HungLLM(), policy=AutoPolicy(llm_deadline=0.2))
+print(auto.analyze("my password is hunter42").metadata["auto_path"])
+"""
+
+
+def test_timed_out_call_does_not_delay_process_exit():
+    src = str(Path(safe2share.__file__).resolve().parents[1])
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", HUNG_AUTO_SCRIPT],
+        capture_output=True,
+        text=True,
+        timeout=20,
+        env={**os.environ, "PYTHONPATH": src},
+    )
+    assert out.stdout.strip() == "local_only_llm_timeout", out.stderr
+    assert time.perf_counter() - t0 < 10
+
+
+def test_breaker_state_endpoint():
+    resp = TestClient(api.app).get("/llm/breaker")
+    assert resp.status_code == 200
+    assert "breaker" in resp.json()
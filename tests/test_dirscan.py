@@ -0,0 +1,55 @@
+import json
+
+from safe2share import dirscan
+from safe2share.cli import main
+
+
+def make_tree(root):
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("API_KEY = 'x'\npassword = hunter42\n")
+    (root / "src" / "notes.md").write_text("meeting at 3pm")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("token: abc123")
+    (root / "README.md").write_text("contact alice@example.com")
+
+
+def test_iter_files_applies_include_and_default_excludes(tmp_path):
+    make_tree(tmp_path)
+    all_files = [
+        p.relative_to(tmp_path).as_posix() for p in dirscan.iter_files(tmp_path)
+    ]
+    assert all_files == ["README.md", "src/app.py", "src/notes.md"]
+
+    md = dirscan.iter_files(tmp_path, include=["*.md"], exclude=["src"])
+    assert [p.name for p in md] == ["README.md"]
+
+
+def test_scan_tree_pool_matches_in_process(tmp_path):
+    make_tree(tmp_path)
+    serial = list(dirscan.scan_tree(tmp_path, workers=1))
+    pooled = list(dirscan.scan_tree(tmp_path, workers=2))
+    assert serial == pooled
+    assert [r["path"] for r in serial] == ["README.md", "src/app.py", "src/notes.md"]
+
+
+def test_summary_reports_highest_risk(tmp_path):
+    make_tree(tmp_path)
+    summary = dirscan.summarize(dirscan.scan_tree(tmp_path, workers=1))
+    assert summary["files"] == 3
+    assert summary["errors"] == 0
+    assert summary["max_path"] == "src/app.py"
+    assert summary["max_risk"] == "HIGHLY_CONFIDENTIAL"
+    assert summary["by_risk"]["PUBLIC"] == 1
+
+
+def test_cli_scan_outputs_ndjson(tmp_path, capsys):
+    make_tree(tmp_path)
+    assert main(["scan", str(tmp_path), "--workers", "1"]) == 0
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [rec["path"] for rec in lines[:-1]] == [
+        "README.md",
+        "src/app.py",
+        "src/notes.md",
+    ]
+    assert lines[-1]["summary"]["max_path"] == "src/app.py"
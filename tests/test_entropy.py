@@ -0,0 +1,53 @@
+import math
+import random
+import string
+
+import pytest
+
+from safe2share.analyzers import entropy
+from safe2share.analyzers.entropy import entropies, randomness
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+
+BLOB = "QWxkb0FtZW5kb3NhZmUyU2hhcmVQcm9qZWN0VGVzdA=="
+
+
+def test_entropy_values():
+    values = entropies(["a" * 40, "abcd" * 10, "ab==", ""])
+    assert values == pytest.approx([0.0, 2.0, 1.0, 0.0])
+    # Hex-only spans are measured against a 16-symbol alphabet
+    assert randomness(["0123456789abcdef" * 2]) == pytest.approx([1.0])
+    assert randomness(["0123456789abcdeg" * 2]) == pytest.approx([4 / math.log2(32)])
+
+
+def test_vectorized_and_fallback_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(5)
+    alphabet = string.ascii_letters + string.digits + "+/"
+    spans = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 90)))
+        + "=" * rng.randint(0, 2)
+        for _ in range(2000)
+    ]
+    spans += ["deadbeef" * 5, "Kſ" * 20, "=="]
+    # Small batches exercise the row batching
+    monkeypatch.setattr(entropy, "_BATCH_CELLS", 500)
+    vectorized = entropy._entropy_and_max(spans)
+    monkeypatch.setattr(entropy, "np", None)
+    fallback = entropy._entropy_and_max(spans)
+    for got, want in zip(vectorized, fallback):
+        assert got == pytest.approx(want)
+
+
+def test_entropy_sets_or_suppresses_high_entropy_scores():
+    analyzer = RuleBasedAnalyzer()
+    text = f"bearer {'ab' * 20} usr/local/lib/python3/site/packages/foo/bar"
+    assert analyzer.analyze(text).risk == "PUBLIC"
+
+    random_key = "k3J9xQ7vLp2Zt8Wn5Rb1Yc6Hd4Fg0MsA"
+    result = analyzer.analyze(f"bearer {BLOB} and {random_key}")
+    scores = {d.span: d.score for d in result.detections}
+    base = next(d for d in analyzer.DETECTORS if d.label == "HIGH_ENTROPY")
+    assert base.base_score < scores[BLOB] < scores[random_key]
+
+    streamed = analyzer.analyze_stream([f"bearer {'ab' * 20}"])
+    assert streamed.risk == "PUBLIC"
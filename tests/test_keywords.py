@@ -0,0 +1,36 @@
+from safe2share.analyzers.keywords import KeywordIndex
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+
+
+def test_index_finds_all_keywords_with_positions():
+    index = KeywordIndex(["api", "api key", "key", "token"])
+    hits = index.scan("My API Key and token; another key")
+
+    assert hits.found == {"api", "api key", "key", "token"}
+    assert hits.positions("api") == [3]
+    assert hits.positions("api key") == [3]
+    assert hits.positions("key") == [7, 30]
+    assert hits.positions("missing") == []
+
+
+def test_index_matches_substring_semantics():
+    keywords = ["pin", "passcode", "safe code", "code to my safe", "otp"]
+    index = KeywordIndex(keywords)
+    for text in ["the code to my safe is 1", "Spinning", "PassCode: 9", "hello"]:
+        hits = index.scan(text)
+        assert hits.found == {kw for kw in keywords if kw in text.lower()}
+
+
+def test_empty_index_finds_nothing():
+    hits = KeywordIndex([]).scan("password token")
+    assert not hits
+    assert not hits.any(["password"])
+
+
+def test_boosters_applied_with_many_detections():
+    text = "password is x " + "alice@example.com " * 2000
+    r = RuleBasedAnalyzer().analyze(text)
+    emails = [d for d in r.detections if d.label == "EMAIL"]
+    assert len(emails) == 2000
+    # password (+20) is the only booster present
+    assert all(d.score == 60 for d in emails)
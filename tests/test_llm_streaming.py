@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from safe2share.analyzers.streamjson import JSONObjectStream, parse_json_object
+from safe2share.cli import EXIT_BLOCKED, main
+from safe2share.config import settings
+
+VERDICT = {
+    "score": 95,
+    "reasons": ["Contains a password value."],
+    "detections": [
+        {"label": "PASSWORD", "span": 'pass"word} hunter42', "score": 95},
+        {"label": "EMAIL", "span": "a@b.c", "score": 60},
+    ],
+    "suggested_rewrites": ["[REDACTED]"],
+}
+REPLY = "Sure, here it is:\n```json\n" + json.dumps(VERDICT) + "\n```\nDone {"
+
+
+def test_incremental_parse_matches_whole_reply_at_any_split():
+    for size in (1, 2, 5, 64, len(REPLY)):
+        parser = JSONObjectStream()
+        seen_score_before_done = False
+        for i in range(0, len(REPLY), size):
+            parser.feed(REPLY[i : i + size])
+            seen_score_before_done |= parser.score == 95 and not parser.done
+        assert parser.value == VERDICT
+        assert parser.detections == VERDICT["detections"]
+        assert seen_score_before_done or size == len(REPLY)
+
+
+def test_fields_and_detections_arrive_before_the_object_closes():
+    parser = JSONObjectStream()
+    parser.feed('{"score": 9')
+    assert parser.score is None
+    parser.feed('0, "detections": [{"label": "A", "span": "x"}')
+    assert parser.score == 90
+    assert parser.detections == [{"label": "A", "span": "x"}]
+    assert not parser.done
+
+
+def test_braces_in_prose_are_skipped():
+    assert parse_json_object('Note {this}: {"score": 1}') == {"score": 1}
+    assert parse_json_object("no json here") == {}
+
+
+class SSEHandler(BaseHTTPRequestHandler):
+    """Streams a verdict one small piece every `delay` seconds."""
+
+    protocol_version = "HTTP/1.1"
+    delay = 0.02
+    disconnected = threading.Event()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_response(200)
+        if not body.get("stream"):
+            payload = json.dumps(
+                {
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "stub",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": REPLY},
+                        }
+                    ],
+                }
+            ).encode()
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for i in range(0, len(REPLY), 4):
+                event = {
+                    "id": "stub",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": "stub",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": REPLY[i : i + 4]},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(SSEHandler.delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            SSEHandler.disconnected.set()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sse_stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        settings, "llm_base_url", f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    monkeypatch.setattr(settings, "llm_model", "stub")
+    SSEHandler.disconnected.clear()
+    yield SSEHandler
+    server.shutdown()
+
+
+def test_streamed_analyze_matches_buffered(sse_stub, monkeypatch):
+    analyzer = OpenAICompatibleAnalyzer()
+    buffered = analyzer.analyze("x")
+    monkeypatch.setattr(settings, "llm_stream", True)
+    streamed = analyzer.analyze("x")
+    assert streamed.model_dump() == buffered.model_dump()
+    assert "llm_partial" not in streamed.metadata
+
+
+def test_verdict_stops_generation_once_score_blocks(sse_stub):
+    analyzer = OpenAICompatibleAnalyzer()
+    # The full reply takes about len(REPLY) / 4 * delay = 1.5s to stream
+    t0 = time.perf_counter()
+    result = analyzer.analyze_verdict("x", block_score=80)
+    assert time.perf_counter() - t0 < 0.8
+    assert result.score == 95
+    assert result.metadata["llm_partial"] == "true"
+    assert result.suggested_rewrites == []
+    # The server notices the closed connection on its next write
+    assert sse_stub.disconnected.wait(2)
+
+    async_result = asyncio.run(analyzer.analyze_verdict_async("x", block_score=80))
+    assert async_result.score == 95
+
+
+def test_verdict_below_threshold_reads_the_whole_reply(sse_stub):
+    analyzer = OpenAICompatibleAnalyzer()
+    result = analyzer.analyze_verdict("x", block_score=99)
+    assert result.score == 95
+    assert result.detections[1].span == "a@b.c"
+    assert "llm_partial" not in result.metadata
+
+
+def test_cli_block_at_sets_exit_status(capsys):
+    assert main(["my password is hunter42", "--block-at", "50"]) == EXIT_BLOCKED
+    assert main(["hello team", "--block-at", "50"]) == 0
+
+
+def test_cli_block_at_applies_to_mmap_and_streamed_files(tmp_path, capsys):
+    leaky = tmp_path / "leaky.log"
+    leaky.write_text("line\n" * 50 + "my password is hunter42\n")
+    clean = tmp_path / "clean.log"
+    clean.write_text("hello team\n" * 50)
+
+    for flags in (["--mmap"], ["--max-chars", "100"]):
+        args = ["--file", str(leaky), "--block-at", "50", *flags]
+        assert main(args) == EXIT_BLOCKED
+        assert main(["--file", str(clean), "--block-at", "50", *flags]) == 0
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from safe2share.analyzers.llm_openai_compat import OpenAICompatibleAnalyzer
+from safe2share.analyzers.microbatch import MicroBatcher
+from safe2share.config import settings
+from safe2share.models import AnalyzeRequest
+from safe2share.providers import Provider
+from safe2share.service import ServiceRegistry, analyze_batch_async
+
+
+def verdict(text):
+    found = "hunter42" in text
+    return {
+        "score": 90 if found else 0,
+        "reasons": ["password"] if found else [],
+        "detections": (
+            [{"label": "PASSWORD", "span": "hunter42", "score": 90}] if found else []
+        ),
+        "suggested_rewrites": [text.replace("hunter42", "[REDACTED]")],
+    }
+
+
+def completion(data):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(data)))]
+    )
+
+
+def stub_analyzer(monkeypatch, drop_id=None):
+    """Analyzer whose endpoint answers packed requests, dropping item `drop_id`."""
+    monkeypatch.setattr(settings, "llm_base_url", "http://127.0.0.1:1/v1")
+    monkeypatch.setattr(settings, "llm_model", "stub")
+    analyzer = OpenAICompatibleAnalyzer()
+    calls = []
+
+    def create(**kwargs):
+        user = kwargs["messages"][-1]["content"]
+        try:
+            items = json.loads(user)["items"]
+        except (ValueError, KeyError, TypeError):
+            calls.append(1)
+            return completion(verdict(user))
+        calls.append(len(items))
+        results = [
+            {"id": item["id"], **verdict(item["text"])}
+            for item in items
+            if item["id"] != drop_id
+        ]
+        return completion({"results": results})
+
+    async def acreate(**kwargs):
+        return create(**kwargs)
+
+    for attr, fn in (("client", create), ("aclient", acreate)):
+        setattr(
+            analyzer.pool.backends[0],
+            attr,
+            SimpleNamespace(
+                chat=SimpleNamespace(completions=SimpleNamespace(create=fn))
+            ),
+        )
+    return analyzer, calls
+
+
+def test_analyze_many_packs_short_texts(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pack_max_items", 4)
+    monkeypatch.setattr(settings, "llm_pack_item_max_chars", 100)
+    analyzer, calls = stub_analyzer(monkeypatch)
+    texts = [f"note {i}" for i in range(6)] + ["my password is hunter42", "x" * 150]
+
+    results = analyzer.analyze_many(texts)
+
+    # 7 short texts in groups of 4 and 3; the long one on its own
+    assert sorted(calls) == [1, 3, 4]
+    assert [r.score for r in results] == [0] * 6 + [90, 0]
+    assert results[6].suggested_rewrites == ["my password is [REDACTED]"]
+    assert results[6].metadata["llm_packed"] == "3"
+    assert "llm_packed" not in results[7].metadata
+
+
+def test_malformed_packed_item_falls_back_to_single_call(monkeypatch):
+    analyzer, calls = stub_analyzer(monkeypatch, drop_id="1")
+    texts = ["hello", "the password is hunter42", "bye"]
+
+    results = asyncio.run(analyzer.analyze_many_async(texts))
+
+    assert calls == [3, 1]
+    assert [r.score for r in results] == [0, 90, 0]
+    assert "llm_packed" not in results[1].metadata
+
+
+def test_concurrent_analyze_async_share_a_completion(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pack_wait_ms", 50.0)
+    analyzer, calls = stub_analyzer(monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            analyzer.analyze_async("hunter42"),
+            analyzer.analyze_async("fine"),
+            analyzer.analyze_async("also fine"),
+        )
+
+    results = asyncio.run(run())
+    assert calls == [3]
+    assert [r.score for r in results] == [90, 0, 0]
+
+
+def test_micro_batcher_flushes_when_full_and_propagates_errors():
+    batches = []
+
+    async def flush(items):
+        batches.append(list(items))
+        if "boom" in items:
+            raise ValueError("boom")
+        return [i * 2 for i in items]
+
+    async def run():
+        batcher = MicroBatcher(flush, max_items=2, max_wait=10.0)
+        # Full batches go out without waiting for the timer
+        doubled = await asyncio.wait_for(
+            asyncio.gather(batcher.submit(1), batcher.submit(2)), 1.0
+        )
+        failed = await asyncio.gather(
+            batcher.submit("boom"), batcher.submit(3), return_exceptions=True
+        )
+        return doubled, failed
+
+    doubled, failed = asyncio.run(run())
+    assert doubled == [2, 4]
+    assert all(isinstance(e, ValueError) for e in failed)
+    assert batches == [[1, 2], ["boom", 3]]
+
+
+def test_batch_packs_short_llm_and_auto_items(monkeypatch):
+    monkeypatch.setattr(settings, "llm_pack_max_items", 4)
+    analyzer, calls = stub_analyzer(monkeypatch)
+    registry = ServiceRegistry()
+    registry._llm = analyzer
+    items = [
+        AnalyzeRequest(text=f"note {i}", provider=Provider.LLM) for i in range(6)
+    ] + [
+        AnalyzeRequest(text="my password is hunter42", provider=Provider.AUTO),
+        AnalyzeRequest(text="hello team", provider=Provider.AUTO),
+    ]
+
+    results = asyncio.run(analyze_batch_async(items, services=registry))
+
+    # LLM items in packs of 4 and 2; the one AUTO item that escalates alone
+    assert sorted(calls) == [1, 2, 4]
+    assert [r.result.score for r in results[:6]] == [0] * 6
+    assert results[0].result.metadata["llm_packed"] == "4"
+    assert results[6].result.metadata["auto_path"] == "escalated_to_llm"
+    assert results[6].result.score == 90
+    assert results[7].result.metadata["auto_path"] == "local_only"
@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+
+from safe2share import resultcache as rc
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer
+from safe2share.config import LLMBackend, settings
+from safe2share.models import AnalysisResult
+from safe2share.providers import Provider
+from safe2share.resultcache import MemoryLRU, ResultCache, TextRefs
+from safe2share.service import Safe2ShareService
+
+
+class CountingLLM:
+    is_available = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, text):
+        self.calls += 1
+        return AnalysisResult(risk="HIGHLY_CONFIDENTIAL", score=90, metadata={})
+
+
+def test_lru_is_bounded_by_entries_and_bytes():
+    lru = MemoryLRU(max_entries=2, max_bytes=10, ttl=60)
+    lru.put("a", "xxx")
+    lru.put("b", "yyy")
+    lru.get("a")  # "b" is now least recently used
+    lru.put("c", "zzz")
+    assert lru.get("b") is None and lru.get("a") == "xxx"
+
+    lru.put("d", "w" * 8)
+    assert len(lru) == 1 and lru.bytes == 8
+
+
+def test_service_caches_escalations_and_keys_on_model(tmp_path, monkeypatch):
+    llm = CountingLLM()
+    cache = ResultCache(100, 1 << 20, ttl=60, path=tmp_path / "results.sqlite3")
+    svc = Safe2ShareService(
+        Provider.AUTO, analyzer=AutoCombinedAnalyzer(llm=llm), cache=cache
+    )
+    text = "my password is hunter42"
+
+    first = svc.analyze(text)
+    first.metadata["mutated"] = "yes"  # hits return fresh copies
+    second = asyncio.run(svc.analyze_async(text))
+    assert llm.calls == 1
+    assert "mutated" not in second.metadata
+    assert second.metadata["auto_path"] == "escalated_to_llm"
+    assert cache.stats()["memory_hits"] == 1
+
+    monkeypatch.setattr(
+        settings,
+        "llm_backends",
+        [LLMBackend(base_url="http://127.0.0.1:1/v1", model="another-model")],
+    )
+    other = Safe2ShareService(
+        Provider.AUTO, analyzer=AutoCombinedAnalyzer(llm=llm), cache=cache
+    )
+    other.analyze(text)
+    assert llm.calls == 2
+
+    cache.close()
+    assert text.encode() not in (tmp_path / "results.sqlite3").read_bytes()
+
+
+def test_partial_results_are_not_cached(tmp_path):
+    class PartialLLM(CountingLLM):
+        def analyze(self, text):
+            res = super().analyze(text)
+            res.metadata["llm_partial"] = "true"
+            return res
+
+    llm = PartialLLM()
+    cache = ResultCache(100, 1 << 20, ttl=60, path=tmp_path / "results.sqlite3")
+    svc = Safe2ShareService(Provider.LLM, analyzer=llm, cache=cache)
+
+    svc.analyze("my password is hunter42")
+    asyncio.run(svc.analyze_async("my password is hunter42"))
+    assert llm.calls == 2
+    assert cache.stats()["entries"] == 0
+    (count,) = sqlite3.connect(tmp_path / "results.sqlite3").execute(
+        "SELECT COUNT(*) FROM results"
+    )
+    assert count == (0,)
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path, monkeypatch):
+    path = tmp_path / "results.sqlite3"
+    result = AnalysisResult(risk="PUBLIC", score=0)
+    cache = ResultCache(10, 1 << 20, ttl=60, path=path)
+    cache.put("k", result, "text")
+    cache.close()
+
+    restarted = ResultCache(10, 1 << 20, ttl=60, path=path)
+    assert restarted.get("k", "text") == result
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("k", "text") == result
+    assert restarted.stats()["memory_hits"] == 1
+    restarted.close()
+
+    now = rc.time.time()
+    monkeypatch.setattr(rc.time, "time", lambda: now + 120)
+    expired = ResultCache(10, 1 << 20, ttl=60, path=path)
+    assert expired.get("k", "text") is None
+    assert expired.stats()["misses"] == 1
+
+
+def test_disk_rows_hold_no_text_of_the_input(tmp_path):
+    text = "Deploy notes: my password is hunter42, mail ops@corp.example now"
+    path = tmp_path / "results.sqlite3"
+    result = Safe2ShareService(Provider.LOCAL).analyze(text)
+    result.metadata["llm_reason"] = "quoted: password is hunter42"
+    assert "hunter42" in result.model_dump_json()
+
+    cache = ResultCache(10, 1 << 20, ttl=60, path=path)
+    cache.put("k", result, text)
+    cache.close()
+    with sqlite3.connect(path) as conn:
+        (row,) = conn.execute("SELECT result FROM results").fetchone()
+    quoted = [text[i : i + 4] for i in range(len(text) - 3)]
+    assert not [q for q in quoted if q in row]
+
+    restarted = ResultCache(10, 1 << 20, ttl=60, path=path)
+    assert restarted.get("k", text) == result
+    assert restarted.stats()["disk_hits"] == 1
+    restarted.close()
+
+
+def test_text_refs_rebuild_any_string():
+    refs = TextRefs("the quick brown fox jumps over the lazy dog")
+    for s in ["", "fox", "a [REDACTED] fox jumps over", "zzz quick qu", "dog!"]:
+        pieces = refs.encode(s)
+        assert refs.decode(pieces) == s
+        assert not any(isinstance(p, str) and p in refs.text for p in pieces)
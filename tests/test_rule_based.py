@@ -1,4 +1,7 @@
-from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+import pytest
+
+from safe2share.analyzers.rule_based import PatternDetector, RuleBasedAnalyzer
+from safe2share.models import AnalysisResult, Detection
 
 
 def analyze(text: str):
@@ -118,3 +121,36 @@ def test_high_entropy_with_context_triggers():
     # In this case SECRET should trigger (token: ...)
     assert r.risk in ("CONFIDENTIAL", "HIGHLY_CONFIDENTIAL")
     assert ("SECRET" in labels(r)) or ("HIGH_ENTROPY" in labels(r))
+
+
+def test_detections_behave_like_validated_models():
+    r = analyze("password: hunter42 and mail bob@example.com")
+    for d in r.detections:
+        assert d == Detection.model_validate(d.model_dump())
+        assert d.model_fields_set == set(Detection.model_fields)
+    moved = r.detections[0].model_copy(update={"start": None})
+    assert moved.start is None and r.detections[0].start is not None
+    assert AnalysisResult.model_validate_json(r.model_dump_json()) == r
+
+
+@pytest.mark.parametrize("group", [-1, 2])
+def test_pattern_detector_rejects_redact_group_out_of_range(group):
+    with pytest.raises(ValueError, match="redact_group"):
+        PatternDetector("CUSTOM", r"key=(\w+)", 50, redact_group=group)
+
+
+def test_pattern_detector_rejects_base_score_out_of_range():
+    with pytest.raises(ValueError, match="base_score"):
+        PatternDetector("CUSTOM", r"key=\w+", 101)
+
+
+def test_unmatched_optional_redact_group_redacts_whole_match():
+    det = PatternDetector("CUSTOM", r"key(?:=(\w+))?", 50, redact_group=1)
+    found = det.find("a key here, key=abc")
+    assert [(d.span, d.start, d.end) for d in found] == [
+        ("key", 2, 5),
+        ("abc", 16, 19),
+    ]
+    # Each detection owns its fields set
+    assert found[0].model_fields_set is not found[1].model_fields_set
+    assert found[0].model_fields_set == set(Detection.model_fields)
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import stat
+
+from safe2share import dirscan
+from safe2share.analyzers.rule_based import PatternDetector, RuleBasedAnalyzer
+from safe2share.scancache import CacheReader, ScanCache
+
+
+def sweep(root, cache_path):
+    return {
+        r["path"]: r for r in dirscan.scan_tree(root, workers=1, cache_path=cache_path)
+    }
+
+
+def test_second_sweep_replays_unchanged_files(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.txt").write_text("password: hunter42")
+    (root / "b.txt").write_text("hello")
+    cache_path = tmp_path / "cache.sqlite3"
+
+    first = sweep(root, cache_path)
+    assert not any(r.get("cached") for r in first.values())
+
+    second = sweep(root, cache_path)
+    assert all(r["cached"] for r in second.values())
+    for path, rec in second.items():
+        assert {k: v for k, v in rec.items() if k != "cached"} == first[path]
+
+
+def test_changed_file_is_reanalyzed_and_touched_file_replayed(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.txt").write_text("hello")
+    (root / "b.txt").write_text("hello again")
+    cache_path = tmp_path / "cache.sqlite3"
+    sweep(root, cache_path)
+
+    (root / "a.txt").write_text("password: hunter42")
+    st = (root / "b.txt").stat()
+    os.utime(root / "b.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    records = sweep(root, cache_path)
+    assert "cached" not in records["a.txt"]
+    assert records["a.txt"]["risk"] != "PUBLIC"
+    # Same content, new mtime: found by content hash
+    assert records["b.txt"]["cached"] is True
+
+
+def test_rule_change_invalidates_cache(tmp_path, monkeypatch):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.txt").write_text("ticket ABC-123")
+    cache_path = tmp_path / "cache.sqlite3"
+    assert sweep(root, cache_path)["a.txt"]["risk"] == "PUBLIC"
+
+    monkeypatch.setattr(
+        RuleBasedAnalyzer,
+        "DETECTORS",
+        RuleBasedAnalyzer.DETECTORS + [PatternDetector("TICKET", r"ABC-\d+", 70)],
+    )
+    rec = sweep(root, cache_path)["a.txt"]
+    assert "cached" not in rec
+    assert rec["risk"] == "CONFIDENTIAL"
+
+
+def test_fingerprint_mismatch_drops_entries(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    with ScanCache(path, "rules-v1") as cache:
+        cache.store("/x", 1, 2, "d1", '{"risk": "PUBLIC"}')
+    assert CacheReader(path).by_digest("d1") is not None
+
+    ScanCache(path, "rules-v2").close()
+    assert CacheReader(path).by_digest("d1") is None
+
+
+def test_cache_file_holds_no_detected_text(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.txt").write_text(
+        "password: hunter42\napi_key = sk-abcdefghijklmnopqrstuv\n"
+    )
+    cache_path = tmp_path / "cache.sqlite3"
+
+    first = sweep(root, cache_path)
+    spans = [d["span"] for d in first["a.txt"]["detections"]]
+    assert spans
+
+    assert stat.S_IMODE(cache_path.stat().st_mode) == 0o600
+    raw = cache_path.read_bytes()
+    (row,) = sqlite3.connect(cache_path).execute("SELECT result FROM results")
+    for span in spans:
+        assert span not in row[0]
+        assert span.encode() not in raw
+
+    # Spans, reasons and metadata are rebuilt from the file
+    second = sweep(root, cache_path)
+    assert second["a.txt"]["cached"] is True
+    assert {k: v for k, v in second["a.txt"].items() if k != "cached"} == first["a.txt"]
+
+
+def test_changed_span_with_same_stat_is_reanalyzed(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    path = root / "a.txt"
+    path.write_text("password: hunter42")
+    cache_path = tmp_path / "cache.sqlite3"
+    sweep(root, cache_path)
+
+    st = path.stat()
+    path.write_text("password: hunter43")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    rec = sweep(root, cache_path)["a.txt"]
+    assert "cached" not in rec
+    assert rec["detections"][0]["span"] == "hunter43"
@@ -0,0 +1,38 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from safe2share import api
+from safe2share.analyzers.rule_based import RuleBasedAnalyzer
+from safe2share.cli import main
+from safe2share.models import AnalysisResult, BatchAnalyzeResponse
+
+client = TestClient(api.app)
+
+TEXT = "mail a@b.com and password=hunter42"
+
+
+def test_api_responses_are_the_model_json():
+    resp = client.post("/analyze", json={"text": TEXT})
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.content == RuleBasedAnalyzer().analyze(TEXT).model_dump_json().encode()
+    assert AnalysisResult.model_validate_json(resp.content).score == 100
+
+    batch = client.post("/analyze/batch", json={"items": [{"text": TEXT}]})
+    assert batch.status_code == 200
+    parsed = BatchAnalyzeResponse.model_validate_json(batch.content)
+    assert parsed.results[0].result.score == 100
+
+
+def test_cli_json_matches_the_previous_output(capsys):
+    assert main([TEXT, "--json"]) == 0
+    out = capsys.readouterr().out
+    expected = json.dumps(RuleBasedAnalyzer().analyze(TEXT).model_dump(), indent=2)
+    assert out == expected + "\n"
+
+
+def test_cli_json_compact_is_one_line(capsys):
+    assert main([TEXT, "--json-compact"]) == 0
+    out = capsys.readouterr().out
+    assert out.count("\n") == 1
+    assert json.loads(out)["risk"] == "HIGHLY_CONFIDENTIAL"
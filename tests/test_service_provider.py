@@ -1,7 +1,7 @@
 import pytest
 
 from safe2share.providers import Provider
-from safe2share.service import Safe2ShareService
+from safe2share.service import Safe2ShareService, ServiceRegistry
 
 
 def test_local_provider_initializes():
@@ -15,3 +15,18 @@ def test_llm_provider_requires_config(monkeypatch):
 
     with pytest.raises(RuntimeError):
         Safe2ShareService(provider=Provider.LLM)
+
+
+def test_registry_reuses_services_and_shares_llm_client():
+    registry = ServiceRegistry()
+    local = registry.get(Provider.LOCAL)
+    assert registry.get(Provider.LOCAL) is local
+
+    auto = registry.get(Provider.AUTO)
+    try:
+        llm = registry.get(Provider.LLM).analyzer
+    except RuntimeError:
+        # LLM not configured here; AUTO still holds the registry's one LLM analyzer
+        llm = registry._llm
+    assert auto.analyzer.llm is llm
+    registry.close()
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from safe2share.models import AnalysisResult
+from safe2share.providers import Provider
+from safe2share.service import Safe2ShareService
+from safe2share.singleflight import SingleFlight
+
+
+class SlowAnalyzer:
+    """Counts analyses; each takes `delay` seconds."""
+
+    def __init__(self, delay=0.2, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def analyze(self, text):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("endpoint down")
+        return AnalysisResult(risk="PUBLIC", score=len(text), reasons=[text])
+
+
+def test_concurrent_sync_callers_share_one_analysis():
+    analyzer = SlowAnalyzer()
+    svc = Safe2ShareService(Provider.LOCAL, analyzer=analyzer)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(svc.analyze, ["same log excerpt"] * 8))
+
+    assert analyzer.calls == 1
+    assert svc.flights.stats() == {"in_flight": 0, "unique": 1, "coalesced": 7}
+    assert all(r == results[0] for r in results)
+    # Every caller gets its own copy
+    assert len({id(r) for r in results}) == 8
+
+
+def test_async_callers_coalesce_per_text():
+    analyzer = SlowAnalyzer()
+    svc = Safe2ShareService(Provider.LOCAL, analyzer=analyzer)
+
+    async def run():
+        return await asyncio.gather(
+            *(svc.analyze_async("incident log") for _ in range(5)),
+            svc.analyze_async("other text"),
+        )
+
+    results = asyncio.run(run())
+    assert analyzer.calls == 2
+    assert [r.score for r in results] == [12] * 5 + [10]
+    assert svc.flights.stats()["coalesced"] == 4
+
+
+def test_sync_and_async_callers_share_flights():
+    analyzer = SlowAnalyzer()
+    svc = Safe2ShareService(Provider.LOCAL, analyzer=analyzer)
+
+    async def run():
+        thread = asyncio.to_thread(svc.analyze, "shared")
+        await asyncio.sleep(0.05)
+        return await asyncio.gather(thread, svc.analyze_async("shared"))
+
+    sync_result, async_result = asyncio.run(run())
+    assert analyzer.calls == 1
+    assert sync_result == async_result
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.1)
+        return AnalysisResult(risk="PUBLIC", score=1)
+
+    async def run():
+        leader = asyncio.ensure_future(flights.do_async("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flights.do_async("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter, leader
+
+    result, leader = asyncio.run(run())
+    assert result.score == 1
+    assert leader.cancelled()
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    analyzer = SlowAnalyzer(fail=True)
+    svc = Safe2ShareService(Provider.LOCAL, analyzer=analyzer)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(svc.analyze, "x") for _ in range(4)]
+    for f in futures:
+        with pytest.raises(RuntimeError, match="endpoint down"):
+            f.result()
+    assert analyzer.calls == 1
+
+    analyzer.fail = False
+    assert svc.analyze("x").score == 1
+    assert analyzer.calls == 2
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+from safe2share.analyzers.auto_combined import AutoCombinedAnalyzer, AutoPolicy
+from safe2share.models import AnalysisResult, Detection
+
+
+class SlowLocal:
+    """Local analyzer reporting one detection at a fixed offset, slowly."""
+
+    is_available = True
+
+    def __init__(self, start):
+        self.start = start
+
+    def analyze(self, text):
+        time.sleep(0.2)
+        span = text[self.start : self.start + 4]
+        return AnalysisResult(
+            risk="CONFIDENTIAL",
+            score=70,
+            detections=[
+                Detection(
+                    label="PIN",
+                    span=span,
+                    score=70,
+                    start=self.start,
+                    end=self.start + 4,
+                )
+            ],
+        )
+
+
+class SlowLLM:
+    is_available = True
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.sent = []
+        self.cancelled = 0
+
+    def analyze(self, text):
+        raise AssertionError("sync path not expected")
+
+    async def analyze_async(self, text):
+        self.sent.append(text)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return AnalysisResult(risk="HIGHLY_CONFIDENTIAL", score=90)
+
+
+TEXT = "x " * 2000 + "the door code is 4711 " + "y " * 2000
+
+
+def run(auto):
+    t0 = time.perf_counter()
+    res = asyncio.run(auto.analyze_async(TEXT))
+    return res, time.perf_counter() - t0
+
+
+def test_speculative_call_overlaps_local_pass():
+    llm = SlowLLM()
+    policy = AutoPolicy(context_radius=100, speculative=True)
+    auto = AutoCombinedAnalyzer(
+        local=SlowLocal(TEXT.index("4711")), llm=llm, policy=policy
+    )
+
+    res, elapsed = run(auto)
+    assert res.metadata["auto_speculative"] == "used"
+    assert res.metadata["auto_path"] == "escalated_to_llm"
+    assert len(llm.sent) == 1 and "door code" in llm.sent[0]
+    assert elapsed < 0.35  # local and LLM ran concurrently
+
+    sequential = AutoCombinedAnalyzer(
+        local=SlowLocal(TEXT.index("4711")),
+        llm=SlowLLM(),
+        policy=AutoPolicy(context_radius=100, speculative=False),
+    )
+    res, elapsed = run(sequential)
+    assert "auto_speculative" not in res.metadata
+    assert elapsed >= 0.4
+
+
+def test_speculative_call_is_cancelled_when_findings_fall_outside_it():
+    # Still in flight when the local pass (0.2 s) ends
+    llm = SlowLLM(delay=0.5)
+    policy = AutoPolicy(context_radius=100, speculative=True)
+    # The local detection is far from the hint, outside the speculative window
+    auto = AutoCombinedAnalyzer(local=SlowLocal(10), llm=llm, policy=policy)
+
+    res, _ = run(auto)
+    assert res.metadata["auto_speculative"] == "restarted"
+    assert llm.cancelled == 1
+    assert len(llm.sent) == 2
+    assert res.metadata["auto_llm_windows"] == "2"